@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for Auto Download Organizer.
+"""
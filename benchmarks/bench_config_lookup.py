@@ -0,0 +1,82 @@
+"""
+Benchmark of ConfigLoader.get_category_for_extension.
+
+Builds a configuration shaped like a large production setup (40
+categories, 600 extensions) and measures lookups per second through the
+reverse index, next to the previous linear scan over every category.
+
+Usage:
+    python -m benchmarks.bench_config_lookup [--lookups 1000000]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config_loader import ConfigLoader  # noqa: E402
+
+
+def build_loader(categories: int, extensions: int) -> ConfigLoader:
+    """Create a loader with synthetic categories and extensions."""
+    loader = ConfigLoader()
+    loader.config["categories"] = {}
+    per_category = extensions // categories
+    for c in range(categories):
+        loader.set_category(
+            f"Category{c:02d}",
+            [f".e{c:02d}x{e:03d}" for e in range(per_category)],
+        )
+    return loader
+
+
+def linear_lookup(loader: ConfigLoader, extension: str) -> str:
+    """The lookup as it was before the reverse index."""
+    extension = extension.lower()
+    for category, extensions in loader.config["categories"].items():
+        if extension in extensions:
+            return category
+    return "Others"
+
+
+def measure(lookup, extensions) -> float:
+    """Get lookups per second for a lookup function."""
+    start = time.perf_counter()
+    for extension in extensions:
+        lookup(extension)
+    return len(extensions) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--extensions", type=int, default=600)
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    loader = build_loader(args.categories, args.extensions)
+    known = [ext for exts in loader.config["categories"].values() for ext in exts]
+    rng = random.Random(42)
+    # Mix of known extensions and misses, as in a real Downloads folder
+    extensions = [
+        rng.choice(known) if rng.random() < 0.8 else ".unknown"
+        for _ in range(args.lookups)
+    ]
+
+    indexed = measure(loader.get_category_for_extension, extensions)
+    linear = measure(lambda ext: linear_lookup(loader, ext), extensions)
+
+    print(
+        f"{args.categories} categories, {args.extensions} extensions, "
+        f"{args.lookups} lookups"
+    )
+    print(f"  reverse index: {indexed:>14,.0f} lookups/s")
+    print(f"  linear scan:   {linear:>14,.0f} lookups/s")
+    print(f"  speedup:       {indexed / linear:>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
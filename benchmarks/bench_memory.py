@@ -0,0 +1,207 @@
+"""
+Peak memory of holding a million-file scan.
+
+Builds the same synthetic scan result in two layouts and records the peak
+resident set size (RSS) each needs:
+
+- entries: a list of FileEntry tuples, plus the duplicate map the cleaner
+  used to return, Path objects keyed by 64-character hex digests
+- index:   a FileIndex with a 32-byte binary digest per file
+
+Every layout runs in a fresh child process, so the peaks do not mix. The
+entries are generated lazily and every file gets a digest, the worst case
+of a scan where every file is hashed.
+
+Usage:
+    python -m benchmarks.bench_memory [--entries 1000000] [--output mem.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic_tree import DEFAULT_EXTENSIONS  # noqa: E402
+from src.file_index import FileIndex  # noqa: E402
+from src.walker import FileEntry  # noqa: E402
+
+LAYOUTS = ("entries", "index")
+
+DEFAULT_ENTRIES = 1_000_000
+
+# Directories of the synthetic scan, like a deep Downloads archive
+DIRECTORIES = 2000
+
+
+def peak_rss() -> int:
+    """Get the peak resident set size of this process in bytes."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return _peak_working_set()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _peak_working_set() -> int:
+    """Get the peak working set of this process on Windows."""
+    import ctypes
+    from ctypes import wintypes
+
+    class Counters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = Counters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    ctypes.windll.psapi.GetProcessMemoryInfo(
+        process, ctypes.byref(counters), counters.cb
+    )
+    return counters.PeakWorkingSetSize
+
+
+def synthetic_entries(count: int, seed: int = 42) -> Iterator[FileEntry]:
+    """
+    Generate a deterministic scan result without keeping it.
+
+    Args:
+        count: Number of files
+        seed: Random seed
+
+    Yields:
+        FileEntry per file, as walk() would produce them
+    """
+    rng = random.Random(seed)
+    root = os.path.join(os.sep, "home", "user", "Downloads")
+    directories = [
+        os.path.join(root, f"dir_{index // 50}", f"dir_{index}")
+        for index in range(DIRECTORIES)
+    ]
+    extensions = list(DEFAULT_EXTENSIONS)
+    for index in range(count):
+        name = f"file_{index:07d}{rng.choice(extensions)}"
+        yield FileEntry(
+            os.path.join(rng.choice(directories), name),
+            int(rng.lognormvariate(0, 2) * 200_000),
+            1_700_000_000_000_000_000 + rng.randrange(10**17),
+            1_000_000 + index,
+            2049,
+        )
+
+
+def _digest(index: int) -> bytes:
+    """Stand-in content digest of a file."""
+    return hashlib.sha256(index.to_bytes(8, "little")).digest()
+
+
+def build(layout: str, count: int) -> Any:
+    """Build one layout of the synthetic scan and return it."""
+    entries = synthetic_entries(count)
+    if layout == "entries":
+        scanned = list(entries)
+        duplicates = defaultdict(list)
+        for index, entry in enumerate(scanned):
+            duplicates[_digest(index).hex()].append(Path(entry.path))
+        return scanned, duplicates
+    if layout == "index":
+        index = FileIndex.from_entries(entries)
+        for row in range(len(index)):
+            index.set_digest(row, _digest(row))
+        return index
+    raise ValueError(f"Unknown layout: {layout}")
+
+
+def measure(layout: str, count: int) -> Dict[str, Any]:
+    """Build a layout in this process and report its memory."""
+    baseline = peak_rss()
+    started = time.perf_counter()
+    built = build(layout, count)
+    seconds = time.perf_counter() - started
+    peak = peak_rss()
+    del built
+    return {
+        "layout": layout,
+        "entries": count,
+        "seconds": seconds,
+        "baseline_rss_bytes": baseline,
+        "peak_rss_bytes": peak,
+        "bytes_per_file": (peak - baseline) / max(count, 1),
+    }
+
+
+def measure_in_child(layout: str, count: int) -> Dict[str, Any]:
+    """Measure a layout in a fresh interpreter."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_memory",
+            "--child",
+            layout,
+            "--entries",
+            str(count),
+        ],
+        cwd=str(Path(__file__).parent.parent),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=DEFAULT_ENTRIES)
+    parser.add_argument(
+        "--layout",
+        action="append",
+        choices=LAYOUTS,
+        help="Layout to measure (repeatable, default: all)",
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--child", choices=LAYOUTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.entries)))
+        return
+
+    layouts = args.layout or LAYOUTS
+    results = [measure_in_child(layout, args.entries) for layout in layouts]
+    print(f"{args.entries:,} entries, one process per layout")
+    for result in results:
+        print(
+            f"  {result['layout']:<10}"
+            f"{result['peak_rss_bytes'] / 2**20:10.1f} MiB peak RSS"
+            f"{result['bytes_per_file']:10.1f} bytes/file"
+            f"{result['seconds']:10.2f} s"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
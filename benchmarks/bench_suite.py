@@ -0,0 +1,319 @@
+"""
+End-to-end benchmark suite with comparable JSON results.
+
+Times the main operations on deterministic synthetic trees (see
+benchmarks/synthetic_tree.py):
+
+- organize:         FileOrganizer.organize on a flat tree
+- find_duplicates:  DuplicateCleaner.find_duplicates, no hash cache
+- clean_duplicates: DuplicateCleaner.clean_duplicates, removing the copies
+- logger_save:      logging one operation per file, then OrganizerLogger.save
+- config_lookup:    ConfigLoader.get_category_for_extension, 100 times per file
+- rule_engine:      RuleSet.match with 10,000 rules, once per file
+- rule_linear:      the same rules tested one by one (RuleSet.match_linear),
+                    on the first 1% of the files
+
+Each benchmark runs --repeat times on a fresh tree; the median is reported.
+Results are written as JSON, and --baseline compares them with an earlier
+run, exiting with status 1 when a benchmark got slower than --threshold.
+
+Usage:
+    python -m benchmarks.bench_suite [--files 2000] [--output results.json]
+    python -m benchmarks.bench_suite --baseline main.json --output branch.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic_tree import (  # noqa: E402
+    TreeSpec,
+    add_spec_arguments,
+    generate_tree,
+    plan_tree,
+    spec_from_arguments,
+    synthetic_rules,
+)
+from src.config_loader import ConfigLoader  # noqa: E402
+from src.duplicate_cleaner import DuplicateCleaner  # noqa: E402
+from src.file_organizer import FileOrganizer  # noqa: E402
+from src.logger import OrganizerLogger  # noqa: E402
+from src.rules import FileFacts, RuleSet  # noqa: E402
+
+RESULTS_VERSION = 1
+
+# Lookups are too fast to time once per file
+LOOKUP_PASSES = 100
+
+RULE_COUNT = 10000
+
+# Testing every rule is too slow to run on the whole tree
+LINEAR_SHARE = 0.01
+
+# A benchmark gets a fresh working directory and the tree spec, prepares
+# everything it needs, and returns the timed callable and its item count
+Benchmark = Callable[[str, TreeSpec], Tuple[Callable[[], Any], int]]
+
+
+def bench_organize(work_dir: str, spec: TreeSpec):
+    """Organize a flat tree (the organizer does not descend)."""
+    source = os.path.join(work_dir, "tree")
+    generate_tree(source, spec._replace(depth=0))
+    logger = OrganizerLogger(os.path.join(work_dir, "log.json"))
+    organizer = FileOrganizer(source, logger=logger)
+    return organizer.organize, spec.files
+
+
+def bench_find_duplicates(work_dir: str, spec: TreeSpec):
+    """Find the duplicates of a tree without a hash cache."""
+    source = os.path.join(work_dir, "tree")
+    generate_tree(source, spec)
+    logger = OrganizerLogger(os.path.join(work_dir, "log.json"))
+    cleaner = DuplicateCleaner(source, logger)
+    return cleaner.find_duplicates, spec.files
+
+
+def bench_clean_duplicates(work_dir: str, spec: TreeSpec):
+    """Find and delete the duplicates of a tree."""
+    source = os.path.join(work_dir, "tree")
+    generate_tree(source, spec)
+    logger = OrganizerLogger(os.path.join(work_dir, "log.json"))
+    cleaner = DuplicateCleaner(source, logger)
+    return cleaner.clean_duplicates, spec.files
+
+
+def bench_logger_save(work_dir: str, spec: TreeSpec):
+    """Log one move per file of the tree and save the session."""
+    paths = [path for path, _, _ in plan_tree(spec)]
+    logger = OrganizerLogger(os.path.join(work_dir, "log.json"))
+
+    def run():
+        for path in paths:
+            logger.log_operation("move", path, os.path.join("Documents", path))
+        logger.save()
+
+    return run, len(paths)
+
+
+def bench_config_lookup(work_dir: str, spec: TreeSpec):
+    """Look up the category of every file of the tree."""
+    extensions = [os.path.splitext(path)[1] for path, _, _ in plan_tree(spec)]
+    loader = ConfigLoader()
+
+    def run():
+        for _ in range(LOOKUP_PASSES):
+            for extension in extensions:
+                loader.get_category_for_extension(extension)
+
+    return run, len(extensions) * LOOKUP_PASSES
+
+
+def _rule_inputs(spec: TreeSpec):
+    """Compile the synthetic rules and describe the files of the tree."""
+    rule_set = RuleSet.from_config(synthetic_rules(RULE_COUNT, spec.seed))
+    files = [FileFacts(path, size, 0.0) for path, size, _ in plan_tree(spec)]
+    return rule_set, files
+
+
+def bench_rule_engine(work_dir: str, spec: TreeSpec):
+    """Classify every file of the tree with the compiled rules."""
+    rule_set, files = _rule_inputs(spec)
+
+    def run():
+        for file in files:
+            rule_set.match(file, 0.0)
+
+    return run, len(files)
+
+
+def bench_rule_linear(work_dir: str, spec: TreeSpec):
+    """Classify a sample of the files by testing the rules one by one."""
+    rule_set, files = _rule_inputs(spec)
+    files = files[: max(1, int(len(files) * LINEAR_SHARE))]
+
+    def run():
+        for file in files:
+            rule_set.match_linear(file, 0.0)
+
+    return run, len(files)
+
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "organize": bench_organize,
+    "find_duplicates": bench_find_duplicates,
+    "clean_duplicates": bench_clean_duplicates,
+    "logger_save": bench_logger_save,
+    "config_lookup": bench_config_lookup,
+    "rule_engine": bench_rule_engine,
+    "rule_linear": bench_rule_linear,
+}
+
+
+def run_benchmark(benchmark: Benchmark, spec: TreeSpec, repeat: int) -> Dict[str, Any]:
+    """
+    Time a benchmark, preparing it from scratch for every run.
+
+    Args:
+        benchmark: Function from BENCHMARKS
+        spec: Tree shape
+        repeat: Number of timed runs
+
+    Returns:
+        Dictionary with the run times, their median and minimum, the item
+        count and the items processed per second at the median
+    """
+    runs = []
+    items = 0
+    for _ in range(repeat):
+        work_dir = tempfile.mkdtemp(prefix="organizer-bench-")
+        try:
+            func, items = benchmark(work_dir, spec)
+            # The console output is part of the cost, but not of the report
+            with open(os.devnull, "w") as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    start = time.perf_counter()
+                    func()
+                    runs.append(time.perf_counter() - start)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    median = statistics.median(runs)
+    return {
+        "runs": runs,
+        "median": median,
+        "min": min(runs),
+        "items": items,
+        "items_per_second": items / median if median else None,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Compare the medians of two result documents.
+
+    Args:
+        baseline: Earlier results
+        current: New results
+        threshold: Relative slowdown above which a benchmark regressed
+
+    Returns:
+        One dictionary per benchmark present in both documents, with the
+        two medians, their ratio (current / baseline) and whether it
+        regressed
+    """
+    comparison = []
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else None
+        comparison.append(
+            {
+                "name": name,
+                "baseline": before["median"],
+                "current": result["median"],
+                "ratio": ratio,
+                "regressed": ratio is not None and ratio > 1 + threshold,
+            }
+        )
+    return comparison
+
+
+def git_commit() -> str:
+    """Get the checked-out commit of the repository, if available."""
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_spec_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--only",
+        default=",".join(BENCHMARKS),
+        help="Comma-separated benchmarks to run (default: all)",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with an earlier results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as a regression (default: 0.1)",
+    )
+    parser.set_defaults(depth=2, median_size=4096)
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    spec = spec_from_arguments(args)
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spec": spec.to_dict(),
+        "repeat": args.repeat,
+        "benchmarks": {},
+    }
+
+    print(f"{spec.files} files, depth {spec.depth}, {args.repeat} runs each")
+    for name in names:
+        result = run_benchmark(BENCHMARKS[name], spec, args.repeat)
+        results["benchmarks"][name] = result
+        print(
+            f"  {name:<17} {result['median'] * 1000:>10.1f} ms "
+            f"{result['items_per_second']:>14,.0f} items/s"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("spec") != results["spec"]:
+            print("Warning: the baseline was measured on a different tree")
+
+        comparison = compare_results(baseline, results, args.threshold)
+        print(f"\nCompared with {baseline.get('commit') or args.baseline}:")
+        for item in comparison:
+            marker = "  REGRESSION" if item["regressed"] else ""
+            print(f"  {item['name']:<17} {item['ratio']:>6.2f}x{marker}")
+        if any(item["regressed"] for item in comparison):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Deterministic synthetic download trees for benchmarks.
+
+The same TreeSpec always produces the same files with the same names,
+sizes and contents, so timings taken on different commits are comparable.
+
+Usage:
+    python -m benchmarks.synthetic_tree OUTPUT_DIR [--files 10000] [--depth 2]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+KIB = 1024
+MIB = 1024 * KIB
+
+# Extension mix of a typical Downloads folder, as relative weights
+DEFAULT_EXTENSIONS: Dict[str, float] = {
+    ".pdf": 20,
+    ".jpg": 18,
+    ".png": 10,
+    ".zip": 8,
+    ".docx": 6,
+    ".mp4": 4,
+    ".mp3": 4,
+    ".exe": 3,
+    ".txt": 6,
+    ".csv": 4,
+    ".py": 3,
+    ".epub": 2,
+    ".pptx": 2,
+    ".iso": 1,
+    ".bin": 5,
+    "": 4,
+}
+
+
+class TreeSpec(NamedTuple):
+    """Shape of a synthetic tree."""
+
+    files: int = 1000
+    # Median file size and log-normal spread; sizes are capped at max_size
+    median_size: int = 16 * KIB
+    size_sigma: float = 1.5
+    max_size: int = 8 * MIB
+    # Share of files that are byte-identical copies of an earlier file
+    duplicate_ratio: float = 0.2
+    # Directory levels below the root and subdirectories per directory;
+    # depth 0 puts every file directly in the root
+    depth: int = 0
+    fanout: int = 4
+    extensions: Dict[str, float] = DEFAULT_EXTENSIONS
+    seed: int = 42
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the spec as a JSON-serializable dictionary."""
+        return dict(self._asdict())
+
+
+def plan_tree(spec: TreeSpec) -> List[Tuple[str, int, int]]:
+    """
+    Decide every file of a tree without writing anything.
+
+    Args:
+        spec: Tree shape
+
+    Returns:
+        List of (relative path, size, content id); files sharing a content
+        id have identical contents
+    """
+    if spec.files < 0:
+        raise ValueError(f"File count must not be negative: {spec.files}")
+    if not 0 <= spec.duplicate_ratio < 1:
+        raise ValueError(f"Duplicate ratio must be in [0, 1): {spec.duplicate_ratio}")
+
+    rng = random.Random(spec.seed)
+    directories = _directories(spec.depth, spec.fanout)
+    extensions = list(spec.extensions)
+    weights = [spec.extensions[ext] for ext in extensions]
+
+    files = []
+    originals: List[Tuple[int, int, str]] = []
+    for index in range(spec.files):
+        directory = rng.choice(directories)
+        if originals and rng.random() < spec.duplicate_ratio:
+            size, content_id, extension = rng.choice(originals)
+        else:
+            size = int(rng.lognormvariate(0, spec.size_sigma) * spec.median_size)
+            size = max(0, min(size, spec.max_size))
+            content_id = index
+            extension = rng.choices(extensions, weights)[0]
+            originals.append((size, content_id, extension))
+
+        name = f"file_{index:07d}{extension}"
+        files.append((os.path.join(directory, name), size, content_id))
+    return files
+
+
+def generate_tree(root: str, spec: TreeSpec = TreeSpec()) -> Dict[str, int]:
+    """
+    Write a synthetic tree.
+
+    Args:
+        root: Directory to create the files in (created if missing)
+        spec: Tree shape
+
+    Returns:
+        Dictionary with the number of files, duplicates, directories and
+        total bytes written
+    """
+    files = plan_tree(spec)
+    root = os.fspath(root)
+
+    directories = {os.path.dirname(path) for path, _, _ in files}
+    for directory in directories:
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+    seen = set()
+    total_bytes = 0
+    for path, size, content_id in files:
+        with open(os.path.join(root, path), "wb") as f:
+            f.write(_content(spec.seed, content_id, size))
+        seen.add(content_id)
+        total_bytes += size
+
+    return {
+        "files": len(files),
+        "duplicates": len(files) - len(seen),
+        "directories": len(directories),
+        "bytes": total_bytes,
+    }
+
+
+def synthetic_rules(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Build a deterministic list of category rules of every kind.
+
+    About a third use extensions, a third name globs with a literal prefix
+    or suffix, and the rest size ranges, globs without literal ends and
+    regular expressions. Most file names of plan_tree() match some of them.
+
+    Args:
+        count: Number of rules
+        seed: Random seed
+
+    Returns:
+        Rule mappings as in the 'rules' configuration list
+    """
+    rng = random.Random(seed)
+    extensions = list(DEFAULT_EXTENSIONS) + [f".x{index}" for index in range(500)]
+    rules = []
+    for index in range(count):
+        rule: Dict[str, Any] = {"category": f"Rule{index}"}
+        kind = index % 9
+        if kind < 3:
+            rule["extensions"] = rng.sample(extensions, 2)
+            rule["min_size"] = rng.randint(0, 64 * KIB)
+        elif kind < 5:
+            rule["name"] = f"file_{rng.randint(0, 99999):05d}*"
+        elif kind < 6:
+            rule["name"] = f"*{rng.randint(0, 999):03d}{rng.choice(extensions)}"
+        elif kind < 7:
+            low = rng.randint(0, MIB)
+            rule["min_size"] = low
+            rule["max_size"] = low + rng.randint(0, 4 * KIB)
+        elif kind < 8:
+            rule["name"] = f"*_{rng.randint(0, 9999):04d}?*"
+        else:
+            rule["regex"] = rf"_{rng.randint(0, 9999):04d}\d"
+        rule["priority"] = rng.randint(0, 9)
+        rules.append(rule)
+    return rules
+
+
+def _directories(depth: int, fanout: int) -> List[str]:
+    """List every directory of a tree, relative to its root."""
+    levels = [[""]]
+    for level in range(depth):
+        levels.append(
+            [
+                os.path.join(parent, f"dir_{level}_{child}")
+                for parent in levels[-1]
+                for child in range(fanout)
+            ]
+        )
+    return [directory for level in levels for directory in level]
+
+
+def _content(seed: int, content_id: int, size: int) -> bytes:
+    """Build the deterministic contents of one file."""
+    # A unique block at both ends separates files of the same size in the
+    # edge hashing stage, as real files would be
+    block = hashlib.sha256(f"{seed}:{content_id}".encode()).digest() * 128
+    if size <= 2 * len(block):
+        return (block * 2)[:size]
+    filler = b"\0" * (size - 2 * len(block))
+    return block + filler + block
+
+
+def parse_extensions(text: str) -> Dict[str, float]:
+    """Parse an extension mix such as '.pdf=3,.jpg=2,=1' ('' = no extension)."""
+    mix = {}
+    for item in text.split(","):
+        extension, _, weight = item.strip().partition("=")
+        mix[extension.lower()] = float(weight or 1)
+    return mix
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    """Add an option for every TreeSpec field to a parser."""
+    defaults = TreeSpec()
+    parser.add_argument("--files", type=int, default=defaults.files)
+    parser.add_argument("--median-size", type=int, default=defaults.median_size)
+    parser.add_argument("--size-sigma", type=float, default=defaults.size_sigma)
+    parser.add_argument("--max-size", type=int, default=defaults.max_size)
+    parser.add_argument(
+        "--duplicate-ratio", type=float, default=defaults.duplicate_ratio
+    )
+    parser.add_argument("--depth", type=int, default=defaults.depth)
+    parser.add_argument("--fanout", type=int, default=defaults.fanout)
+    parser.add_argument(
+        "--extensions",
+        type=parse_extensions,
+        default=defaults.extensions,
+        help="Extension mix as weights, e.g. '.pdf=3,.jpg=2,=1'",
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_arguments(args: argparse.Namespace) -> TreeSpec:
+    """Build a TreeSpec from parsed add_spec_arguments() options."""
+    return TreeSpec(**{field: getattr(args, field) for field in TreeSpec._fields})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("output", help="Directory to create the tree in")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    summary = generate_tree(args.output, spec_from_arguments(args))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -27,6 +27,9 @@ setup(
         "click>=8.1.0",
         "colorama>=0.4.6",
     ],
+    extras_require={
+        "watch": ["watchdog>=3.0"],
+    },
     entry_points={
         "console_scripts": [
             "organize=src.cli:main",
@@ -0,0 +1,166 @@
+"""
+Concurrent file system calls for high-latency (network) mounts.
+
+On NFS and SMB shares every stat, rename and read waits for a round trip,
+so the serial loops spend most of their time idle. AsyncFileSystem runs
+those blocking calls in a thread pool from asyncio code and bounds how many
+are in flight on each mount, as configured by MountLimits.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .walker import FileEntry, stat_file
+
+
+class MountLimits:
+    """Maximum number of concurrent file system calls per mount."""
+
+    def __init__(self, default: int = 16, mounts: Dict[str, int] = None):
+        """
+        Initialize mount limits.
+
+        Mounts are told apart by device number: a configured path applies
+        to every file on the same filesystem as that path.
+
+        Args:
+            default: Limit for filesystems without an entry in mounts
+            mounts: Mapping of mount point (or any path on it) to its limit
+        """
+        mounts = dict(mounts or {})
+        for limit in [default, *mounts.values()]:
+            if not isinstance(limit, int) or limit < 1:
+                raise ValueError(f"Concurrency limit must be at least 1: {limit}")
+
+        self.default = default
+        self.mounts = {os.path.abspath(path): limit for path, limit in mounts.items()}
+        self._devices: Optional[Dict[int, int]] = None
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any] = None) -> "MountLimits":
+        """
+        Build limits from the 'io_concurrency' configuration setting.
+
+        Args:
+            settings: Setting dictionary with 'default' and 'mounts' keys
+
+        Returns:
+            MountLimits instance
+        """
+        settings = dict(settings or {})
+        unknown = set(settings) - {"default", "mounts"}
+        if unknown:
+            raise ValueError(
+                f"Unknown io_concurrency settings: {', '.join(sorted(unknown))}"
+            )
+        return cls(settings.get("default", 16), settings.get("mounts") or {})
+
+    @property
+    def max_workers(self) -> int:
+        """Threads needed to reach every limit at the same time."""
+        return self.default + sum(self.mounts.values())
+
+    def device_limit(self, device: Optional[int]) -> int:
+        """
+        Get the limit for files on a device.
+
+        Args:
+            device: Device number (st_dev), or None if unknown
+
+        Returns:
+            Maximum number of concurrent calls on that device
+        """
+        if self._devices is None:
+            self._devices = {}
+            for path, limit in self.mounts.items():
+                try:
+                    self._devices[os.stat(path).st_dev] = limit
+                except OSError:
+                    # Share not mounted right now
+                    continue
+        return self._devices.get(device, self.default)
+
+
+class AsyncFileSystem:
+    """Runs blocking file system calls in threads, bounded per mount."""
+
+    def __init__(self, limits: MountLimits = None):
+        """
+        Initialize asynchronous file system access.
+
+        Args:
+            limits: Per-mount concurrency limits (default: MountLimits())
+        """
+        self.limits = limits or MountLimits()
+        self.max_workers = self.limits.max_workers
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._loop = None
+        self._semaphores: Dict[Optional[int], asyncio.Semaphore] = {}
+
+    async def run(self, device: Optional[int], func: Callable, *args, **kwargs):
+        """
+        Call a blocking function in the thread pool.
+
+        Args:
+            device: Device the call touches, used for throttling
+            func: Function to call
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The function's return value; its exceptions propagate
+        """
+        async with self._semaphore(device):
+            loop = asyncio.get_running_loop()
+            call = functools.partial(func, *args, **kwargs)
+            return await loop.run_in_executor(self._pool, call)
+
+    async def stat_files(
+        self, paths: List[str], device: Optional[int] = None
+    ) -> List[Union[FileEntry, OSError]]:
+        """
+        Stat many files concurrently.
+
+        Args:
+            paths: Files to stat
+            device: Device the files are expected on
+
+        Returns:
+            List aligned with paths holding each FileEntry, or the OSError
+            raised for files that could not be read
+        """
+
+        async def stat_one(path: str) -> Union[FileEntry, OSError]:
+            try:
+                return await self.run(device, stat_file, path)
+            except OSError as e:
+                return e
+
+        return await asyncio.gather(*(stat_one(path) for path in paths))
+
+    def close(self):
+        """Shut down the thread pool."""
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _semaphore(self, device: Optional[int]) -> asyncio.Semaphore:
+        """Get the semaphore of a device for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores belong to the loop they were first used in
+            self._loop = loop
+            self._semaphores = {}
+
+        semaphore = self._semaphores.get(device)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.device_limit(device))
+            self._semaphores[device] = semaphore
+        return semaphore
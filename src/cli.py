@@ -2,26 +2,141 @@
 Command-line interface for Auto Download Organizer.
 """
 
+import asyncio
 import click
 import os
+from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
+from typing import Optional
 
+from . import metrics, profiling, reporter
+from .async_io import MountLimits
 from .file_organizer import FileOrganizer
-from .duplicate_cleaner import DuplicateCleaner
+from .duplicate_cleaner import KEEP_STRATEGIES, DuplicateCleaner
 from .logger import OrganizerLogger
 from .config_loader import ConfigLoader
+from .content_type import ContentTypeDetector
+from .hash_cache import HashCache
+from .hashing import available_algorithms
+from .journal import (
+    compact,
+    is_legacy_log,
+    iter_sessions,
+    iter_sessions_reversed,
+    list_segments,
+    migrate_legacy_log,
+    rotate,
+)
+from .linking import DEDUP_MODES
+from .log_segments import RetentionPolicy
+from .mover import MoveExecutor, has_pending, intent_path_for_log
+from .reference_index import ReferenceIndex
+from .reporter import REPORTER_MODES, Reporter
+from .scan_state import ScanState
+from .watcher import WATCH_BACKENDS, DirectoryWatcher
+
+
+def _retention_policy(config: ConfigLoader) -> RetentionPolicy:
+    """Get the log retention policy from a configuration."""
+    return RetentionPolicy.from_settings(config.get_setting("log_retention"))
+
+
+def _open_scan_state(state_file: str, log_file: str, read_only: bool) -> ScanState:
+    """Open the incremental scan state; runs that change nothing only read it."""
+    return ScanState(state_file or ScanState.path_for_log(log_file), read_only)
+
+
+def _attach_content_types(
+    organizer: FileOrganizer, detect_content: bool, cache_path: str = None
+) -> Optional[HashCache]:
+    """
+    Give an organizer a content type detector, if enabled.
+
+    Returns:
+        The hash cache storing the detections, which the caller closes
+    """
+    if not (detect_content or organizer.config.get_setting("content_detection")):
+        return None
+    cache = HashCache(cache_path) if cache_path else None
+    organizer.content_types = ContentTypeDetector(cache)
+    return cache
 
 
 @click.group()
 @click.version_option(version="1.0.0")
-def cli():
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Print a breakdown of time spent per phase when the command ends",
+)
+@click.option(
+    "--profile-output",
+    type=str,
+    default=None,
+    help="Also write a trace: Chrome format, or speedscope for *.speedscope.json",
+)
+@click.option(
+    "--metrics-port",
+    type=click.IntRange(min=0, max=65535),
+    default=None,
+    help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics",
+)
+@click.option(
+    "--metrics-textfile",
+    type=str,
+    default=None,
+    help="Write Prometheus metrics to this file for the textfile collector",
+)
+@click.option(
+    "--output-mode",
+    type=click.Choice(REPORTER_MODES),
+    default="verbose",
+    help="Console output: every file, a progress line, or warnings only",
+)
+@click.pass_context
+def cli(ctx, profile, profile_output, metrics_port, metrics_textfile, output_mode):
     """
     Auto Download Organizer - Automatically organize your Downloads folder.
 
     A professional tool to keep your files organized with automatic categorization,
     duplicate detection, and detailed logging.
     """
-    pass
+    reporter.set_default(Reporter(output_mode))
+    ctx.call_on_close(lambda: reporter.set_default(None))
+
+    if profile or profile_output:
+        profiling.enable(record_events=bool(profile_output))
+        ctx.call_on_close(lambda: _finish_profile(profile_output))
+
+    if metrics_port is not None or metrics_textfile:
+        registry = metrics.enable(textfile=metrics_textfile).registry
+        server = None
+        if metrics_port is not None:
+            server = metrics.MetricsServer(registry, metrics_port).start()
+            click.echo(f"Serving metrics on http://127.0.0.1:{server.port}/metrics")
+        ctx.call_on_close(lambda: _finish_metrics(server))
+
+
+def _finish_profile(output: str = None):
+    """Print the profile of the command and write its trace."""
+    profiler = profiling.disable()
+    if profiler is None:
+        return
+    click.echo("\n" + profiler.report())
+    if output:
+        profiler.write_trace(output)
+        click.echo(f"Trace written to: {output}")
+
+
+def _finish_metrics(server: metrics.MetricsServer = None):
+    """Write the final metrics textfile and stop the metrics endpoint."""
+    try:
+        metrics.publish()
+    finally:
+        if server is not None:
+            server.stop()
+        metrics.disable()
 
 
 @cli.command()
@@ -53,7 +168,39 @@ def cli():
     default="organizer_log.json",
     help="Path to log file (default: organizer_log.json)",
 )
-def organize(directory, config, date_folders, dry_run, log_file):
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only process files that are new or changed since the last run",
+)
+@click.option(
+    "--state-file",
+    type=str,
+    default=None,
+    help="Path to incremental scan state (default: next to the log file)",
+)
+@click.option(
+    "--async",
+    "use_async",
+    is_flag=True,
+    help="Overlap file system calls (for network mounts, see io_concurrency)",
+)
+@click.option(
+    "--detect-content",
+    is_flag=True,
+    help="Recognize files with a missing or unknown extension by their content",
+)
+def organize(
+    directory,
+    config,
+    date_folders,
+    dry_run,
+    log_file,
+    incremental,
+    state_file,
+    use_async,
+    detect_content,
+):
     """Organize files in the specified directory."""
 
     # Use Downloads folder if no directory specified
@@ -65,10 +212,23 @@ def organize(directory, config, date_folders, dry_run, log_file):
         click.echo(f"Error: Directory does not exist: {directory}", err=True)
         return
 
+    scan_state = None
+    content_cache = None
     try:
         logger = OrganizerLogger(log_file)
-        organizer = FileOrganizer(directory, config, logger, dry_run)
-        organizer.organize(create_date_folders=date_folders)
+        if incremental:
+            scan_state = _open_scan_state(state_file, log_file, dry_run)
+        organizer = FileOrganizer(
+            directory, config, logger, dry_run, scan_state=scan_state
+        )
+        logger.retention = _retention_policy(organizer.config)
+        content_cache = _attach_content_types(
+            organizer, detect_content, HashCache.path_for_log(log_file)
+        )
+        if use_async:
+            asyncio.run(organizer.organize_async(create_date_folders=date_folders))
+        else:
+            organizer.organize(create_date_folders=date_folders)
 
         if dry_run:
             click.echo("\nThis was a dry run. No files were actually moved.")
@@ -77,6 +237,118 @@ def organize(directory, config, date_folders, dry_run, log_file):
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
+    finally:
+        if content_cache is not None:
+            content_cache.close()
+        if scan_state is not None:
+            scan_state.close()
+
+
+@cli.command()
+@click.option(
+    "--directory",
+    "-d",
+    type=click.Path(exists=True),
+    default=None,
+    help="Directory to watch (default: Downloads folder)",
+)
+@click.option(
+    "--config",
+    "-c",
+    type=click.Path(exists=True),
+    default=None,
+    help="Path to custom configuration file",
+)
+@click.option(
+    "--date-folders",
+    is_flag=True,
+    help="Create subdirectories based on file modification date (YYYY-MM)",
+)
+@click.option(
+    "--dry-run", is_flag=True, help="Simulate operations without actually moving files"
+)
+@click.option(
+    "--log-file",
+    type=str,
+    default="organizer_log.json",
+    help="Path to log file (default: organizer_log.json)",
+)
+@click.option(
+    "--settle",
+    type=click.FloatRange(min=0),
+    default=2.0,
+    help="Seconds a file must stay unchanged before it is organized (default: 2)",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(WATCH_BACKENDS),
+    default="auto",
+    help="File event source: watchdog, polling, or auto (watchdog if installed)",
+)
+@click.option(
+    "--poll-interval",
+    type=click.FloatRange(min=0.1),
+    default=1.0,
+    help="Seconds between directory scans with the polling backend (default: 1)",
+)
+@click.option(
+    "--detect-content",
+    is_flag=True,
+    help="Recognize files with a missing or unknown extension by their content",
+)
+def watch(
+    directory,
+    config,
+    date_folders,
+    dry_run,
+    log_file,
+    settle,
+    backend,
+    poll_interval,
+    detect_content,
+):
+    """Organize files as they arrive, until interrupted with Ctrl+C."""
+
+    # Use Downloads folder if no directory specified
+    if not directory:
+        directory = str(Path.home() / "Downloads")
+        click.echo(f"No directory specified, using: {directory}")
+
+    if not os.path.exists(directory):
+        click.echo(f"Error: Directory does not exist: {directory}", err=True)
+        return
+
+    content_cache = None
+    try:
+        logger = OrganizerLogger(log_file)
+        organizer = FileOrganizer(directory, config, logger, dry_run)
+        logger.retention = _retention_policy(organizer.config)
+        content_cache = _attach_content_types(
+            organizer, detect_content, HashCache.path_for_log(log_file)
+        )
+        watcher = DirectoryWatcher(
+            organizer,
+            create_date_folders=date_folders,
+            settle_seconds=settle,
+            poll_interval=poll_interval,
+            backend=backend,
+        )
+
+        click.echo(
+            f"Watching {directory} ({watcher.backend} backend). Press Ctrl+C to stop."
+        )
+        watcher.run()
+        click.echo(
+            f"\nStopped. Organized {watcher.files_organized} files "
+            f"in {watcher.batches} batches."
+        )
+        logger.print_summary()
+
+    except Exception as e:
+        click.echo(f"Error: {e}", err=True)
+    finally:
+        if content_cache is not None:
+            content_cache.close()
 
 
 @cli.command()
@@ -87,6 +359,13 @@ def organize(directory, config, date_folders, dry_run, log_file):
     default=None,
     help="Directory to scan for duplicates (default: Downloads folder)",
 )
+@click.option(
+    "--config",
+    "-c",
+    type=click.Path(exists=True),
+    default=None,
+    help="Path to custom configuration file",
+)
 @click.option(
     "--recursive",
     "-r",
@@ -96,10 +375,52 @@ def organize(directory, config, date_folders, dry_run, log_file):
 )
 @click.option(
     "--keep",
-    type=click.Choice(["newest", "oldest", "shortest"]),
+    type=click.Choice(KEEP_STRATEGIES),
     default="newest",
     help="Strategy for which duplicate to keep (default: newest)",
 )
+@click.option(
+    "--prefer-dir",
+    "prefer_dirs",
+    multiple=True,
+    type=click.Path(file_okay=False),
+    help="Directory whose copies --keep preferred-directory keeps (repeatable, "
+    "most preferred first)",
+)
+@click.option(
+    "--target",
+    "target_dirs",
+    multiple=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Another directory to clean in the same run (repeatable)",
+)
+@click.option(
+    "--reference",
+    "reference_dirs",
+    multiple=True,
+    type=click.Path(exists=True, file_okay=False),
+    help="Directory compared against but never modified, e.g. an archive "
+    "(repeatable)",
+)
+@click.option(
+    "--reference-index",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Reference index built with 'index update', looked up instead of "
+    "hashing the indexed directories",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(DEDUP_MODES),
+    default="delete",
+    help="Delete duplicates, or replace them with hardlinks or reflinks to the "
+    "kept file (default: delete)",
+)
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="Compare duplicates with the kept file byte by byte before removing them",
+)
 @click.option(
     "--dry-run",
     is_flag=True,
@@ -116,7 +437,84 @@ def organize(directory, config, date_folders, dry_run, log_file):
     default="organizer_log.json",
     help="Path to log file (default: organizer_log.json)",
 )
-def clean_duplicates(directory, recursive, keep, dry_run, report_only, log_file):
+@click.option(
+    "--cache-file",
+    type=str,
+    default=None,
+    help="Path to hash cache (default: next to the log file)",
+)
+@click.option("--no-cache", is_flag=True, help="Do not use the persistent hash cache")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files hashed concurrently (default: 1)",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["thread", "process"]),
+    default="thread",
+    help="Hashing executor backend (default: thread)",
+)
+@click.option(
+    "--hash",
+    "hash_algorithm",
+    type=click.Choice(available_algorithms()),
+    default=None,
+    help="Content hash algorithm (default: hash_algorithm setting, sha256)",
+)
+@click.option(
+    "--confirm-sha256",
+    is_flag=True,
+    help="Re-check duplicates found with a fast hash using SHA256",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    help="Glob pattern of files or directories to skip (repeatable)",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only process files that are new or changed since the last run",
+)
+@click.option(
+    "--state-file",
+    type=str,
+    default=None,
+    help="Path to incremental scan state (default: next to the log file)",
+)
+@click.option(
+    "--async",
+    "use_async",
+    is_flag=True,
+    help="Overlap file system calls (for network mounts, see io_concurrency)",
+)
+def clean_duplicates(
+    directory,
+    config,
+    recursive,
+    keep,
+    prefer_dirs,
+    target_dirs,
+    reference_dirs,
+    reference_index,
+    mode,
+    verify,
+    dry_run,
+    report_only,
+    log_file,
+    cache_file,
+    no_cache,
+    workers,
+    backend,
+    hash_algorithm,
+    confirm_sha256,
+    exclude,
+    incremental,
+    state_file,
+    use_async,
+):
     """Find and remove duplicate files."""
 
     # Use Downloads folder if no directory specified
@@ -128,12 +526,52 @@ def clean_duplicates(directory, recursive, keep, dry_run, report_only, log_file)
         click.echo(f"Error: Directory does not exist: {directory}", err=True)
         return
 
+    hash_cache = None
+    scan_state = None
+    index = None
     try:
-        logger = OrganizerLogger(log_file)
-        cleaner = DuplicateCleaner(directory, logger, dry_run)
+        settings = ConfigLoader(config)
+        logger = OrganizerLogger(log_file, retention=_retention_policy(settings))
+        if not no_cache:
+            hash_cache = HashCache(cache_file or HashCache.path_for_log(log_file))
+        if incremental:
+            scan_state = _open_scan_state(state_file, log_file, dry_run or report_only)
+        if reference_index:
+            index = ReferenceIndex(reference_index)
+        if not hash_algorithm:
+            # The index's digests can only be compared in its own algorithm
+            hash_algorithm = index.algorithm if index else None
+            hash_algorithm = hash_algorithm or settings.get_setting(
+                "hash_algorithm", "sha256"
+            )
+        cleaner = DuplicateCleaner(
+            directory,
+            logger,
+            dry_run,
+            hash_cache=hash_cache,
+            workers=workers,
+            backend=backend,
+            hash_algorithm=hash_algorithm,
+            confirm_sha256=confirm_sha256,
+            exclude=settings.get_setting("exclude", []) + list(exclude),
+            symlinks=settings.get_setting("symlinks", "files"),
+            scan_state=scan_state,
+            mount_limits=MountLimits.from_settings(
+                settings.get_setting("io_concurrency")
+            ),
+            mode=mode,
+            verify=verify or settings.get_setting("verify_duplicates", False),
+            preferred_directories=list(prefer_dirs),
+            target_directories=list(target_dirs),
+            reference_directories=list(reference_dirs),
+            reference_index=index,
+        )
 
         if report_only:
-            report = cleaner.get_duplicate_report(recursive)
+            if use_async:
+                report = asyncio.run(cleaner.get_duplicate_report_async(recursive))
+            else:
+                report = cleaner.get_duplicate_report(recursive)
             click.echo("\n" + "=" * 50)
             click.echo("DUPLICATE FILES REPORT")
             click.echo("=" * 50)
@@ -141,9 +579,28 @@ def clean_duplicates(directory, recursive, keep, dry_run, report_only, log_file)
             click.echo(f"Total files involved: {report['total_files_involved']}")
             click.echo(f"Total duplicates: {report['total_duplicates']}")
             click.echo(f"Wasted space: {report['wasted_space_mb']} MB")
+            click.echo(f"Hash algorithm: {report['hash_algorithm']}")
+            click.echo("\nScan stages:")
+            for stage, counters in report["stages"].items():
+                click.echo(
+                    f"  {stage}: {counters['files_in']} in, "
+                    f"{counters['files_out']} out, "
+                    f"{counters['bytes_read']} bytes read, "
+                    f"{counters['bytes_avoided']} bytes avoided"
+                )
+            if report["incremental"]:
+                counters = report["incremental"]
+                click.echo(
+                    f"\nIncremental scan: {counters['dirs_listed']} directories "
+                    f"listed, {counters['dirs_reused']} reused, "
+                    f"{counters['files_fresh']} new or changed files"
+                )
             click.echo("=" * 50)
         else:
-            cleaner.clean_duplicates(recursive, keep)
+            if use_async:
+                asyncio.run(cleaner.clean_duplicates_async(recursive, keep))
+            else:
+                cleaner.clean_duplicates(recursive, keep)
 
             if dry_run:
                 click.echo("\nThis was a dry run. No files were actually deleted.")
@@ -152,6 +609,13 @@ def clean_duplicates(directory, recursive, keep, dry_run, report_only, log_file)
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
+    finally:
+        if hash_cache is not None:
+            hash_cache.close()
+        if scan_state is not None:
+            scan_state.close()
+        if index is not None:
+            index.close()
 
 
 @cli.command()
@@ -175,7 +639,19 @@ def create_config(output_path):
     default="organizer_log.json",
     help="Path to log file (default: organizer_log.json)",
 )
-def show_log(log_file):
+@click.option(
+    "--last",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Only show the N most recent sessions (read from the end of the log)",
+)
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    default=None,
+    help="Only show sessions started at or after this date",
+)
+def show_log(log_file, last, since):
     """Display the organization log."""
 
     if not os.path.exists(log_file):
@@ -183,32 +659,169 @@ def show_log(log_file):
         return
 
     try:
-        import json
-
-        with open(log_file, "r", encoding="utf-8") as f:
-            logs = json.load(f)
-
-        if not logs:
-            click.echo("No logs found.")
-            return
+        if last:
+            recent = iter_sessions_reversed(
+                log_file, include_operations=False, since=since
+            )
+            logs = list(reversed(list(islice(recent, last))))
+            labels = [f"{i} of last {len(logs)}" for i in range(1, len(logs) + 1)]
+        else:
+            logs = iter_sessions(log_file, include_operations=False, since=since)
+            labels = None
 
+        shown = 0
         for i, session in enumerate(logs, 1):
+            shown += 1
             click.echo(f"\n{'='*50}")
-            click.echo(f"Session {i}")
+            click.echo(f"Session {labels[i - 1] if labels else i}")
             click.echo(f"{'='*50}")
             click.echo(f"Start: {session['session_start']}")
             click.echo(f"End: {session['session_end']}")
             click.echo(f"Total operations: {session['total_operations']}")
+            if session.get("compacted"):
+                click.echo("(compacted: only the summary was kept)")
 
             if session.get("by_type"):
                 click.echo("\nOperations by type:")
                 for op_type, count in session["by_type"].items():
                     click.echo(f"  {op_type}: {count}")
 
+        if not shown:
+            click.echo("No logs found.")
+
     except Exception as e:
         click.echo(f"Error reading log: {e}", err=True)
 
 
+@cli.command()
+@click.option(
+    "--log-file",
+    type=click.Path(exists=True),
+    default="organizer_log.json",
+    help="Path to log file (default: organizer_log.json)",
+)
+@click.option("--no-backup", is_flag=True, help="Do not keep a .bak copy")
+def migrate_log(log_file, no_backup):
+    """Convert an old JSON log file to the append-only journal format."""
+
+    try:
+        if not is_legacy_log(log_file):
+            click.echo(f"Log file already uses the journal format: {log_file}")
+            return
+
+        count = migrate_legacy_log(log_file, backup=not no_backup)
+        click.echo(f"Migrated {count} sessions in {log_file}")
+        if not no_backup:
+            click.echo(f"Original log kept as: {log_file}.bak")
+
+    except Exception as e:
+        click.echo(f"Error migrating log: {e}", err=True)
+
+
+@cli.command()
+@click.option(
+    "--log-file",
+    type=click.Path(exists=True),
+    default="organizer_log.json",
+    help="Path to log file (default: organizer_log.json)",
+)
+@click.option(
+    "--config",
+    "-c",
+    type=click.Path(exists=True),
+    default=None,
+    help="Path to custom configuration file",
+)
+@click.option(
+    "--older-than",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Compact sessions older than DAYS (default: compact_after_days setting)",
+)
+@click.option(
+    "--rotate",
+    "force_rotate",
+    is_flag=True,
+    help="Archive the active log first so its sessions can be compacted too",
+)
+def compact_log(log_file, config, older_than, force_rotate):
+    """Rotate, prune and compact archived log segments."""
+
+    try:
+        policy = _retention_policy(ConfigLoader(config))
+        if older_than is None:
+            older_than = policy.compact_after_days
+        if older_than is None:
+            click.echo("No compaction age given (--older-than).", err=True)
+            return
+
+        if force_rotate:
+            segment = rotate(log_file, policy, force=True)
+            if segment:
+                click.echo(
+                    f"Archived {segment['sessions']} sessions to {segment['file']}"
+                )
+
+        cutoff = datetime.now() - timedelta(days=older_than)
+        stats = compact(log_file, cutoff)
+
+        click.echo(
+            f"Compacted {stats['sessions']} sessions in {stats['segments']} "
+            f"segments ({stats['operations_removed']} operation records removed)"
+        )
+        click.echo(
+            f"Archive size: {stats['bytes_before'] / 1024:.1f} KiB -> "
+            f"{stats['bytes_after'] / 1024:.1f} KiB "
+            f"in {len(list_segments(log_file))} segments"
+        )
+
+    except Exception as e:
+        click.echo(f"Error compacting log: {e}", err=True)
+
+
+@cli.command()
+@click.option(
+    "--log-file",
+    type=str,
+    default="organizer_log.json",
+    help="Path to log file (default: organizer_log.json)",
+)
+@click.option(
+    "--rollback",
+    is_flag=True,
+    help="Move files of the interrupted run back instead of finishing it",
+)
+def recover(log_file, rollback):
+    """Resume or roll back an interrupted organization run."""
+
+    intent_log = intent_path_for_log(log_file)
+    if not has_pending(intent_log):
+        click.echo("No interrupted run found.")
+        return
+
+    try:
+        logger = OrganizerLogger(log_file)
+        executor = MoveExecutor(intent_log, logger)
+        states = [item["state"] for item in executor.pending()]
+        click.echo(
+            f"Interrupted run: {states.count('done')} of {len(states)} moves done"
+        )
+
+        if rollback:
+            restored = executor.rollback()
+            click.echo(f"Rolled back: {restored} files restored")
+        else:
+            stats = executor.resume()
+            click.echo(
+                f"Resumed: {stats['renamed'] + stats['copied']} files moved, "
+                f"{stats['errors']} errors"
+            )
+        logger.save()
+
+    except Exception as e:
+        click.echo(f"Error recovering: {e}", err=True)
+
+
 @cli.command()
 @click.option(
     "--directory",
@@ -232,31 +845,176 @@ def show_log(log_file):
 @click.option("--clean-duplicates", is_flag=True, help="Also remove duplicate files")
 @click.option(
     "--keep",
-    type=click.Choice(["newest", "oldest", "shortest"]),
+    type=click.Choice(KEEP_STRATEGIES),
     default="newest",
     help="Strategy for which duplicate to keep (default: newest)",
 )
+@click.option(
+    "--prefer-dir",
+    "prefer_dirs",
+    multiple=True,
+    type=click.Path(file_okay=False),
+    help="Directory whose copies --keep preferred-directory keeps (repeatable, "
+    "most preferred first)",
+)
+@click.option(
+    "--mode",
+    type=click.Choice(DEDUP_MODES),
+    default="delete",
+    help="Delete duplicates, or replace them with hardlinks or reflinks to the "
+    "kept file (default: delete)",
+)
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="Compare duplicates with the kept file byte by byte before removing them",
+)
 @click.option(
     "--dry-run", is_flag=True, help="Simulate operations without making changes"
 )
-def full(directory, config, date_folders, clean_duplicates, keep, dry_run):
+@click.option(
+    "--cache-file",
+    type=str,
+    default=None,
+    help="Path to hash cache (default: next to the log file)",
+)
+@click.option("--no-cache", is_flag=True, help="Do not use the persistent hash cache")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files hashed concurrently (default: 1)",
+)
+@click.option(
+    "--backend",
+    type=click.Choice(["thread", "process"]),
+    default="thread",
+    help="Hashing executor backend (default: thread)",
+)
+@click.option(
+    "--hash",
+    "hash_algorithm",
+    type=click.Choice(available_algorithms()),
+    default=None,
+    help="Content hash algorithm (default: hash_algorithm setting, sha256)",
+)
+@click.option(
+    "--confirm-sha256",
+    is_flag=True,
+    help="Re-check duplicates found with a fast hash using SHA256",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    help="Glob pattern of files or directories to skip (repeatable)",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only process files that are new or changed since the last run",
+)
+@click.option(
+    "--state-file",
+    type=str,
+    default=None,
+    help="Path to incremental scan state (default: next to the log file)",
+)
+@click.option(
+    "--async",
+    "use_async",
+    is_flag=True,
+    help="Overlap file system calls (for network mounts, see io_concurrency)",
+)
+@click.option(
+    "--detect-content",
+    is_flag=True,
+    help="Recognize files with a missing or unknown extension by their content",
+)
+def full(
+    directory,
+    config,
+    date_folders,
+    clean_duplicates,
+    keep,
+    prefer_dirs,
+    mode,
+    verify,
+    dry_run,
+    cache_file,
+    no_cache,
+    workers,
+    backend,
+    hash_algorithm,
+    confirm_sha256,
+    exclude,
+    incremental,
+    state_file,
+    use_async,
+    detect_content,
+):
     """Run full organization process (organize + clean duplicates)."""
 
     click.echo("Starting full organization process...")
 
+    hash_cache = None
+    scan_state = None
+    content_cache = None
     try:
         logger = OrganizerLogger()
+        if incremental:
+            scan_state = _open_scan_state(state_file, logger.log_file, dry_run)
 
         # Step 1: Organize files
         click.echo("\n[Step 1/2] Organizing files...")
-        organizer = FileOrganizer(directory, config, logger, dry_run)
-        organizer.organize(create_date_folders=date_folders)
+        organizer = FileOrganizer(
+            directory, config, logger, dry_run, scan_state=scan_state
+        )
+        logger.retention = _retention_policy(organizer.config)
+        content_cache = _attach_content_types(
+            organizer,
+            detect_content,
+            None if no_cache else cache_file or HashCache.path_for_log(logger.log_file),
+        )
+        if use_async:
+            asyncio.run(organizer.organize_async(create_date_folders=date_folders))
+        else:
+            organizer.organize(create_date_folders=date_folders)
 
         # Step 2: Clean duplicates
         if clean_duplicates:
             click.echo("\n[Step 2/2] Cleaning duplicates...")
-            cleaner = DuplicateCleaner(directory, logger, dry_run)
-            cleaner.clean_duplicates(recursive=True, keep_strategy=keep)
+            if not no_cache:
+                hash_cache = HashCache(
+                    cache_file or HashCache.path_for_log(logger.log_file)
+                )
+            if not hash_algorithm:
+                hash_algorithm = organizer.config.get_setting(
+                    "hash_algorithm", "sha256"
+                )
+            cleaner = DuplicateCleaner(
+                directory,
+                logger,
+                dry_run,
+                hash_cache=hash_cache,
+                workers=workers,
+                backend=backend,
+                hash_algorithm=hash_algorithm,
+                confirm_sha256=confirm_sha256,
+                exclude=organizer.config.get_setting("exclude", []) + list(exclude),
+                symlinks=organizer.config.get_setting("symlinks", "files"),
+                scan_state=scan_state,
+                mount_limits=MountLimits.from_settings(
+                    organizer.config.get_setting("io_concurrency")
+                ),
+                mode=mode,
+                verify=verify
+                or organizer.config.get_setting("verify_duplicates", False),
+                preferred_directories=list(prefer_dirs),
+            )
+            if use_async:
+                asyncio.run(cleaner.clean_duplicates_async(True, keep))
+            else:
+                cleaner.clean_duplicates(recursive=True, keep_strategy=keep)
         else:
             click.echo(
                 "\n[Step 2/2] Skipping duplicate cleaning (use --clean-duplicates to enable)"
@@ -271,6 +1029,187 @@ def full(directory, config, date_folders, clean_duplicates, keep, dry_run):
 
     except Exception as e:
         click.echo(f"Error: {e}", err=True)
+    finally:
+        if content_cache is not None:
+            content_cache.close()
+        if hash_cache is not None:
+            hash_cache.close()
+        if scan_state is not None:
+            scan_state.close()
+
+
+@cli.group()
+def cache():
+    """Inspect and maintain the persistent hash cache."""
+    pass
+
+
+@cache.command("stats")
+@click.option(
+    "--cache-file",
+    type=str,
+    default=HashCache.DEFAULT_FILENAME,
+    help=f"Path to hash cache (default: {HashCache.DEFAULT_FILENAME})",
+)
+def cache_stats(cache_file):
+    """Show hash cache statistics."""
+
+    if not os.path.exists(cache_file):
+        click.echo(f"Hash cache not found: {cache_file}", err=True)
+        return
+
+    try:
+        hash_cache = HashCache(cache_file)
+        stats = hash_cache.stats()
+        hash_cache.close()
+
+        click.echo("\n" + "=" * 50)
+        click.echo("HASH CACHE")
+        click.echo("=" * 50)
+        click.echo(f"File: {stats['db_path']}")
+        click.echo(f"Size: {round(stats['db_size_bytes'] / (1024 * 1024), 2)} MB")
+        click.echo(f"Entries: {stats['entries']} (max {stats['max_entries']})")
+        for kind, count in stats["by_kind"].items():
+            click.echo(f"  {kind}: {count}")
+        click.echo("=" * 50)
+
+    except Exception as e:
+        click.echo(f"Error reading hash cache: {e}", err=True)
+
+
+@cache.command("prune")
+@click.option(
+    "--cache-file",
+    type=str,
+    default=HashCache.DEFAULT_FILENAME,
+    help=f"Path to hash cache (default: {HashCache.DEFAULT_FILENAME})",
+)
+@click.option(
+    "--max-entries",
+    type=int,
+    default=HashCache.DEFAULT_MAX_ENTRIES,
+    help="Keep at most this many most recently used entries",
+)
+@click.option("--all", "clear_all", is_flag=True, help="Remove every entry")
+def cache_prune(cache_file, max_entries, clear_all):
+    """Evict least recently used hash cache entries."""
+
+    if not os.path.exists(cache_file):
+        click.echo(f"Hash cache not found: {cache_file}", err=True)
+        return
+
+    try:
+        hash_cache = HashCache(cache_file, max_entries)
+        if clear_all:
+            removed = hash_cache.count()
+            hash_cache.clear()
+        else:
+            removed = hash_cache.prune()
+        hash_cache.close()
+        click.echo(f"Removed {removed} entries from {cache_file}")
+
+    except Exception as e:
+        click.echo(f"Error pruning hash cache: {e}", err=True)
+
+
+@cli.group("index")
+def reference_index_group():
+    """Build and inspect the reference index of archive directories."""
+    pass
+
+
+@reference_index_group.command("update")
+@click.argument(
+    "directories",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=False),
+)
+@click.option(
+    "--index-file",
+    type=str,
+    default=ReferenceIndex.DEFAULT_FILENAME,
+    help=f"Path to reference index (default: {ReferenceIndex.DEFAULT_FILENAME})",
+)
+@click.option(
+    "--hash",
+    "hash_algorithm",
+    type=click.Choice(available_algorithms()),
+    default=None,
+    help="Content hash algorithm (default: the index's own, sha256 for a new one)",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files hashed concurrently (default: 1)",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    help="Glob pattern of files or directories to skip (repeatable)",
+)
+def index_update(directories, index_file, hash_algorithm, workers, exclude):
+    """Add directories to the reference index, hashing new and changed files."""
+
+    def report_error(path, error):
+        click.echo(f"Error processing {os.path.basename(path)}: {error}", err=True)
+
+    try:
+        with ReferenceIndex(index_file, hash_algorithm) as index:
+            for directory in directories:
+                click.echo(f"Indexing {directory}...")
+                counters = index.update(
+                    directory,
+                    workers=workers,
+                    exclude=list(exclude),
+                    on_error=report_error,
+                )
+                click.echo(
+                    f"  {counters['files']} files: {counters['hashed']} hashed "
+                    f"({round(counters['bytes_hashed'] / (1024 * 1024), 2)} MB), "
+                    f"{counters['unchanged']} unchanged, "
+                    f"{counters['removed']} removed"
+                )
+
+    except Exception as e:
+        click.echo(f"Error updating reference index: {e}", err=True)
+
+
+@reference_index_group.command("stats")
+@click.option(
+    "--index-file",
+    type=str,
+    default=ReferenceIndex.DEFAULT_FILENAME,
+    help=f"Path to reference index (default: {ReferenceIndex.DEFAULT_FILENAME})",
+)
+def index_stats(index_file):
+    """Show reference index statistics."""
+
+    if not os.path.exists(index_file):
+        click.echo(f"Reference index not found: {index_file}", err=True)
+        return
+
+    try:
+        with ReferenceIndex(index_file) as index:
+            stats = index.stats()
+
+        click.echo("\n" + "=" * 50)
+        click.echo("REFERENCE INDEX")
+        click.echo("=" * 50)
+        click.echo(f"File: {stats['db_path']}")
+        click.echo(f"Size: {round(stats['db_size_bytes'] / (1024 * 1024), 2)} MB")
+        click.echo(f"Hash algorithm: {stats['algorithm']}")
+        click.echo(
+            f"Files: {stats['files']} "
+            f"({round(stats['bytes'] / (1024 * 1024), 2)} MB indexed)"
+        )
+        for root, count in stats["roots"].items():
+            click.echo(f"  {root}: {count}")
+        click.echo("=" * 50)
+
+    except Exception as e:
+        click.echo(f"Error reading reference index: {e}", err=True)
 
 
 def main():
@@ -2,10 +2,14 @@
 Configuration loader for file organization rules.
 """
 
+import copy
 import yaml
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from .rules import FileFacts, RuleSet
+from .walker import FileEntry
 
 
 class ConfigLoader:
@@ -58,7 +62,21 @@ class ConfigLoader:
             "create_date_folders": False,
             "log_file": "organizer_log.json",
             "dry_run": False,
+            "hash_algorithm": "sha256",
+            "exclude": [],
+            "symlinks": "files",
+            "log_retention": {
+                "max_bytes": 10 * 1024 * 1024,
+                "max_age_days": 30,
+                "compression": "gzip",
+                "keep_segments": None,
+                "compact_after_days": 90,
+            },
+            "io_concurrency": {"default": 16, "mounts": {}},
+            "content_detection": False,
+            "verify_duplicates": False,
         },
+        "rules": [],
     }
 
     def __init__(self, config_path: str = None):
@@ -70,13 +88,79 @@ class ConfigLoader:
         """
         self.config_path = config_path
         self.config = self._load_config()
+        self._extension_index = self._build_extension_index(self.config)
+        self._rules = RuleSet.from_config(self.config.get("rules"))
 
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration from file or use defaults."""
         if self.config_path and os.path.exists(self.config_path):
             with open(self.config_path, "r", encoding="utf-8") as f:
                 return yaml.safe_load(f)
-        return self.DEFAULT_CONFIG.copy()
+        return copy.deepcopy(self.DEFAULT_CONFIG)
+
+    @staticmethod
+    def _build_extension_index(config: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Build the extension to category lookup table.
+
+        Args:
+            config: Configuration holding the categories
+
+        Returns:
+            Dictionary mapping lowercase extensions to category names
+
+        Raises:
+            ValueError: If an extension is listed under more than one category
+        """
+        index = {}
+        conflicts = []
+
+        for category, extensions in config["categories"].items():
+            for extension in extensions or []:
+                extension = extension.lower()
+                owner = index.setdefault(extension, category)
+                if owner != category:
+                    conflicts.append(f"{extension} ({owner}, {category})")
+
+        if conflicts:
+            raise ValueError(
+                "Extensions assigned to more than one category: " + ", ".join(conflicts)
+            )
+
+        return index
+
+    def reload(self):
+        """
+        Reload configuration from file and rebuild the lookup tables.
+
+        The new configuration only replaces the current one if its lookup
+        tables build; otherwise the error is raised and nothing changes.
+        """
+        config = self._load_config()
+        extension_index = self._build_extension_index(config)
+        rules = RuleSet.from_config(config.get("rules"))
+        self.config = config
+        self._extension_index = extension_index
+        self._rules = rules
+
+    def set_category(self, category: str, extensions: List[str]):
+        """
+        Add or replace a category and rebuild the lookup table.
+
+        Args:
+            category: Category name
+            extensions: File extensions belonging to the category
+        """
+        previous = self.config["categories"].get(category)
+        self.config["categories"][category] = list(extensions)
+        try:
+            self._extension_index = self._build_extension_index(self.config)
+        except ValueError:
+            if previous is None:
+                del self.config["categories"][category]
+            else:
+                self.config["categories"][category] = previous
+            raise
 
     def get_category_for_extension(self, extension: str) -> str:
         """
@@ -88,11 +172,43 @@ class ConfigLoader:
         Returns:
             Category name or 'Others' if not found
         """
-        extension = extension.lower()
-        for category, extensions in self.config["categories"].items():
-            if extension in extensions:
-                return category
-        return "Others"
+        return self._extension_index.get(extension.lower(), "Others")
+
+    def get_category_for_file(
+        self, entry: FileEntry, content_types=None, now: float = None
+    ) -> str:
+        """
+        Get category name for a file, applying the rules first.
+
+        The winning rule decides; without one, the extension does. Files
+        whose extension is missing or unknown are then recognized by their
+        content if a detector is given.
+
+        Args:
+            entry: Scanned file
+            content_types: ContentTypeDetector for unknown extensions and
+                           MIME rules (optional)
+            now: Current time for age rules (default: time.time())
+
+        Returns:
+            Category name or 'Others' if nothing matches
+        """
+        if self._rules:
+            rule = self._rules.match(FileFacts.from_entry(entry, content_types), now)
+            if rule is not None:
+                return rule.category
+
+        category = self.get_category_for_extension(Path(entry.path).suffix)
+        if category == "Others" and content_types is not None:
+            detected = content_types.detect(entry)
+            if detected is not None:
+                category = self.get_category_for_extension(detected)
+        return category
+
+    @property
+    def rules(self) -> RuleSet:
+        """Compiled category rules."""
+        return self._rules
 
     def get_all_categories(self) -> list:
         """Get list of all category names."""
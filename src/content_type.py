@@ -0,0 +1,162 @@
+"""
+Content-based file type detection from magic bytes.
+
+Files without an extension, or with one no category knows, are recognized
+from the first bytes of their content. The signatures are compiled into a
+single regular expression matched once against a header of HEADER_BYTES
+bytes. Detections are stored in the persistent hash cache, keyed by the
+stat identity of the file, so later runs do not read the header again.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from . import profiling
+from .hash_cache import HashCache, Identity
+from .walker import FileEntry
+
+# Enough for every signature below (tar's marker sits at offset 257)
+HEADER_BYTES = 512
+
+# Hash cache kind of the detections; files with no match are stored as ''
+CACHE_KIND = "content_type"
+
+# (regular expression matched at the start of the header, extension),
+# in priority order: more specific signatures come before the containers
+# they are a special case of
+SIGNATURES: List[Tuple[bytes, str]] = [
+    # ZIP-based formats, recognized from the first member names
+    (rb"PK\x03\x04.{26}mimetypeapplication/epub\+zip", ".epub"),
+    (rb"PK\x03\x04.{26,480}?word/", ".docx"),
+    (rb"PK\x03\x04.{26,480}?xl/", ".xlsx"),
+    (rb"PK\x03\x04.{26,480}?ppt/", ".pptx"),
+    (rb"PK(?:\x03\x04|\x05\x06|\x07\x08)", ".zip"),
+    # Documents
+    (rb"(?:\xef\xbb\xbf)?%PDF-", ".pdf"),
+    (rb"\{\\rtf", ".rtf"),
+    (rb".{60}BOOKMOBI", ".mobi"),
+    # Images
+    (rb"\x89PNG\r\n\x1a\n", ".png"),
+    (rb"\xff\xd8\xff", ".jpg"),
+    (rb"GIF8[79]a", ".gif"),
+    (rb"RIFF.{4}WEBP", ".webp"),
+    (rb"II\*\x00|MM\x00\*", ".tiff"),
+    # Audio and video
+    (rb".{4}ftypqt  ", ".mov"),
+    (rb".{4}ftypM4A ", ".m4a"),
+    (rb".{4}ftyp(?:heic|heix|mif1)", ".heic"),
+    (rb".{4}ftyp", ".mp4"),
+    (rb"\x1a\x45\xdf\xa3.{0,60}?webm", ".webm"),
+    (rb"\x1a\x45\xdf\xa3", ".mkv"),
+    (rb"RIFF.{4}AVI ", ".avi"),
+    (rb"RIFF.{4}WAVE", ".wav"),
+    (rb"fLaC", ".flac"),
+    (rb"OggS", ".ogg"),
+    (rb"ID3|\xff[\xfb\xf3\xf2]", ".mp3"),
+    # Archives
+    (rb"Rar!\x1a\x07", ".rar"),
+    (rb"7z\xbc\xaf\x27\x1c", ".7z"),
+    (rb"\xfd7zXZ\x00", ".xz"),
+    (rb"BZh[1-9]", ".bz2"),
+    (rb"\x1f\x8b", ".gz"),
+    (rb".{257}ustar", ".tar"),
+    # Programs
+    (rb"!<arch>\ndebian", ".deb"),
+    (rb"\xed\xab\xee\xdb", ".rpm"),
+    (rb"MZ", ".exe"),
+    # Linux executables are categorized like AppImages, which are ELF files
+    (rb"\x7fELF", ".appimage"),
+]
+
+
+def _compile(signatures: List[Tuple[bytes, str]]):
+    """Combine the signatures into one pattern with a group per signature."""
+    pattern = b"|".join(
+        b"(?P<s%d>%s)" % (index, regex) for index, (regex, _) in enumerate(signatures)
+    )
+    return re.compile(pattern, re.DOTALL)
+
+
+_PATTERN = _compile(SIGNATURES)
+_EXTENSIONS = {f"s{index}": ext for index, (_, ext) in enumerate(SIGNATURES)}
+
+
+def detect_extension(header: bytes) -> Optional[str]:
+    """
+    Recognize a file type from the first bytes of a file.
+
+    Args:
+        header: Start of the file, HEADER_BYTES long unless the file is shorter
+
+    Returns:
+        Extension of the detected type (e.g. '.pdf'), or None if unknown
+    """
+    match = _PATTERN.match(header)
+    if match is None:
+        return None
+    return _EXTENSIONS[match.lastgroup]
+
+
+def read_header(path: str, size: int = HEADER_BYTES) -> bytes:
+    """Read the first bytes of a file."""
+    profiling.count("calls.open")
+    with open(path, "rb") as f:
+        header = f.read(size)
+    profiling.count("bytes_read", len(header))
+    return header
+
+
+class ContentTypeDetector:
+    """Detects file types from magic bytes, memoizing every detection."""
+
+    def __init__(self, cache: HashCache = None):
+        """
+        Initialize content type detector.
+
+        Args:
+            cache: Persistent cache for the detections; without one they are
+                   only remembered for the lifetime of the detector
+        """
+        self.cache = cache
+        self.headers_read = 0
+        self._memo: Dict[Identity, str] = {}
+
+    def detect(self, entry: FileEntry) -> Optional[str]:
+        """
+        Get the type of a file from its content.
+
+        Args:
+            entry: File to inspect
+
+        Returns:
+            Extension of the detected type, or None if unknown or unreadable
+        """
+        identity = entry.identity
+        detected = self._lookup(identity)
+        if detected is None:
+            try:
+                header = read_header(entry.path)
+            except OSError:
+                return None
+            self.headers_read += 1
+            detected = detect_extension(header) or ""
+            self._store(identity, detected)
+        return detected or None
+
+    def flush(self):
+        """Write pending detections to the persistent cache."""
+        if self.cache is not None:
+            self.cache.flush()
+
+    def _lookup(self, identity: Identity) -> Optional[str]:
+        """Get a remembered detection ('' for no match), or None."""
+        if self.cache is not None:
+            return self.cache.get(identity, CACHE_KIND)
+        return self._memo.get(identity)
+
+    def _store(self, identity: Identity, detected: str):
+        """Remember a detection."""
+        if self.cache is not None:
+            self.cache.put(identity, CACHE_KIND, detected)
+        else:
+            self._memo[identity] = detected
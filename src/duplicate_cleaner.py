@@ -3,19 +3,140 @@ Duplicate file cleaner module.
 """
 
 import os
-import hashlib
 from pathlib import Path
-from typing import Dict, List, Set
-from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from collections import Counter, defaultdict
 
+from . import profiling
+from .async_io import AsyncFileSystem, MountLimits
+from .file_index import FileIndex
+from .hash_cache import HashCache, stat_identity
+from .hashing import (
+    DEFAULT_ALGORITHM,
+    HashExecutor,
+    hash_file,
+    hash_file_edges,
+    new_hasher,
+)
+from .linking import DEDUP_MODES, replace_with_link
 from .logger import OrganizerLogger
+from .reference_index import ReferenceIndex
+from .scan_state import ScanState
+from .verification import FileComparer
+from .walker import FileEntry, stat_file, walk
+
+KEEP_STRATEGIES = (
+    "newest",
+    "oldest",
+    "shortest",
+    "largest-path-depth",
+    "preferred-directory",
+)
+
+
+class DuplicateFile(NamedTuple):
+    """A file of a duplicate set, with the stat data read during the scan."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+    device: int
+    hash: str
+    # "target" files are cleaned, "reference" files are never modified
+    role: str = "target"
+
+    @property
+    def name(self) -> str:
+        """File name without the directory."""
+        return os.path.basename(self.path)
+
+
+def choose_keep(
+    files: List[DuplicateFile], strategy: str, preferred: Sequence[str] = ()
+) -> DuplicateFile:
+    """
+    Pick the file of a duplicate set to keep, from the scanned records alone.
+
+    Args:
+        files: Records of one duplicate set
+        strategy: One of KEEP_STRATEGIES:
+                  - "newest": Latest modification time
+                  - "oldest": Earliest modification time
+                  - "shortest": Shortest file name
+                  - "largest-path-depth": Most deeply nested path
+                  - "preferred-directory": Inside the earliest listed of the
+                    preferred directories, the newest such file; the newest
+                    file if none is in one
+        preferred: Absolute directories for "preferred-directory"
+
+    Returns:
+        The record of the file to keep
+    """
+    if strategy == "newest":
+        return max(files, key=lambda f: f.mtime_ns)
+    if strategy == "oldest":
+        return min(files, key=lambda f: f.mtime_ns)
+    if strategy == "shortest":
+        return min(files, key=lambda f: len(f.name))
+    if strategy == "largest-path-depth":
+        return max(files, key=lambda f: os.path.normpath(f.path).count(os.sep))
+    if strategy == "preferred-directory":
+        prefixes = [os.path.join(directory, "") for directory in preferred]
+
+        def rank(file: DuplicateFile) -> Tuple[int, int]:
+            path = os.path.abspath(file.path)
+            for index, prefix in enumerate(prefixes):
+                if path.startswith(prefix):
+                    return index, -file.mtime_ns
+            return len(prefixes), -file.mtime_ns
+
+        return min(files, key=rank)
+    raise ValueError(
+        f"Unknown keep strategy: {strategy} "
+        f"(expected one of {', '.join(KEEP_STRATEGIES)})"
+    )
 
 
 class DuplicateCleaner:
-    """Finds and removes duplicate files based on content hash."""
+    """Finds and removes (or links) duplicate files based on content hash."""
+
+    # Bytes hashed from each end of a file during the edge stage
+    EDGE_SIZE = 4096
 
     def __init__(
-        self, directory: str, logger: OrganizerLogger = None, dry_run: bool = False
+        self,
+        directory: str,
+        logger: OrganizerLogger = None,
+        dry_run: bool = False,
+        hash_cache: HashCache = None,
+        workers: int = 1,
+        backend: str = "thread",
+        hash_algorithm: str = DEFAULT_ALGORITHM,
+        confirm_sha256: bool = False,
+        exclude: List[str] = None,
+        symlinks: str = "files",
+        max_depth: int = None,
+        scan_state: ScanState = None,
+        mount_limits: MountLimits = None,
+        mode: str = "delete",
+        verify: bool = False,
+        preferred_directories: List[str] = None,
+        target_directories: List[str] = None,
+        reference_directories: List[str] = None,
+        reference_index: ReferenceIndex = None,
     ):
         """
         Initialize duplicate cleaner.
@@ -24,13 +145,90 @@ class DuplicateCleaner:
             directory: Directory to scan for duplicates
             logger: Logger instance for tracking operations
             dry_run: If True, only simulate operations without deleting files
+            hash_cache: Persistent hash cache consulted before reading files
+            workers: Number of files hashed concurrently
+            backend: Hashing executor backend, 'thread' or 'process'
+            hash_algorithm: Content hash algorithm (e.g. 'sha256', 'blake2b')
+            confirm_sha256: Re-check colliding groups with SHA256 when a
+                            faster algorithm is used
+            exclude: Glob patterns of files and directories to skip
+            symlinks: Symlink policy ('ignore', 'files' or 'follow')
+            max_depth: Deepest subdirectory level scanned when recursive
+            scan_state: Scan state of previous runs; when given, only size
+                        groups with a new or changed file are examined
+            mount_limits: Concurrent file system calls allowed per mount
+            mode: What happens to each duplicate: 'delete', or 'hardlink' /
+                  'reflink' to replace it with a link to the kept file
+            verify: Compare each duplicate with the kept file byte by byte
+                    before removing it; differing files are kept
+            preferred_directories: Directories whose copies the
+                                   'preferred-directory' strategy keeps,
+                                   most preferred first
+            target_directories: More directories cleaned in the same run;
+                                duplicates are found across all of them
+            reference_directories: Directories compared against but never
+                                   modified; a duplicate set with a
+                                   reference file keeps one of those and
+                                   cleans every target copy
+            reference_index: Prebuilt index of reference files, looked up
+                             instead of walking and hashing them
         """
+        if mode not in DEDUP_MODES:
+            raise ValueError(
+                f"Unknown mode: {mode} (expected one of {', '.join(DEDUP_MODES)})"
+            )
+        # Fail early on algorithms that are unknown or not installed
+        new_hasher(hash_algorithm)
+        if reference_index is not None and reference_index.algorithm != hash_algorithm:
+            raise ValueError(
+                f"Reference index holds {reference_index.algorithm} digests, "
+                f"not {hash_algorithm}"
+            )
+
         self.directory = Path(directory)
+        # Targets first: the scan rows of reference roots follow theirs
+        self.roots: List[Tuple[Path, str]] = [
+            (Path(root), "target") for root in [directory, *(target_directories or [])]
+        ] + [(Path(root), "reference") for root in reference_directories or []]
+        self.reference_index = reference_index
         self.logger = logger or OrganizerLogger()
         self.dry_run = dry_run
+        self.mode = mode
+        self.comparer = FileComparer() if verify else None
+        self.preferred_directories = [
+            os.path.abspath(directory) for directory in preferred_directories or []
+        ]
+        self.hash_cache = hash_cache
+        self.mount_limits = mount_limits or MountLimits()
+        self.executor = HashExecutor(workers, backend, mount_limits=mount_limits)
+        self.hash_algorithm = hash_algorithm
+        self.confirm_sha256 = confirm_sha256 and hash_algorithm != "sha256"
+        self.exclude = list(exclude or [])
+        self.symlinks = symlinks
+        self.max_depth = max_depth
+        self.scan_state = scan_state
+        self.bytes_hashed = 0
+        self.scan_stats = self._new_scan_stats()
+        # Every file of the last scan, with the digests of the fully hashed ones
+        self.index = FileIndex()
+        self._candidate_rows: Dict[str, int] = {}
+        self._reference_start = 0
+        self._indexed_sizes: Set[int] = set()
 
-        if not self.directory.exists():
-            raise ValueError(f"Directory does not exist: {directory}")
+        for root, _ in self.roots:
+            if not root.exists():
+                raise ValueError(f"Directory does not exist: {root}")
+        self._check_roots()
+
+    def _check_roots(self):
+        """Reject roots that are the same or nested, so no file has two roles."""
+        # Resolved paths, so a root reached through a symlink is caught too
+        paths = [os.path.realpath(root) for root, _ in self.roots]
+        for index, path in enumerate(paths):
+            for other in paths[index + 1 :]:
+                inner, outer = sorted((path, other), key=len, reverse=True)
+                if inner == outer or inner.startswith(os.path.join(outer, "")):
+                    raise ValueError(f"Directories overlap: {outer} and {inner}")
 
     def find_duplicates(self, recursive: bool = True) -> Dict[str, List[Path]]:
         """
@@ -42,38 +240,234 @@ class DuplicateCleaner:
         Returns:
             Dictionary mapping file hashes to lists of file paths
         """
-        print(
-            f"\n{'[DRY RUN] ' if self.dry_run else ''}Scanning for duplicates in: {self.directory}"
+        return self._as_paths(self.find_duplicate_files(recursive))
+
+    def find_duplicate_files(
+        self, recursive: bool = True
+    ) -> Dict[str, List[DuplicateFile]]:
+        """
+        Find duplicate files, with the data the scan read about each.
+
+        Args:
+            recursive: If True, scan subdirectories recursively
+
+        Returns:
+            Dictionary mapping file hashes to the records of their files
+        """
+        self._start_scan()
+        return self._find_in(self._scan(recursive))
+
+    async def find_duplicates_async(
+        self, recursive: bool = True
+    ) -> Dict[str, List[Path]]:
+        """
+        Find duplicate files with overlapping I/O (see find_duplicate_files_async).
+
+        Args:
+            recursive: If True, scan subdirectories recursively
+
+        Returns:
+            Dictionary mapping file hashes to lists of file paths
+        """
+        return self._as_paths(await self.find_duplicate_files_async(recursive))
+
+    async def find_duplicate_files_async(
+        self, recursive: bool = True
+    ) -> Dict[str, List[DuplicateFile]]:
+        """
+        Find duplicate files with overlapping I/O.
+
+        Meant for network mounts: the files are stat'ed concurrently, and
+        each hashing stage hashes its files concurrently, bounded per mount
+        by mount_limits. The stages still run one after another because
+        each one works on the groups left by the previous one.
+
+        Args:
+            recursive: If True, scan subdirectories recursively
+
+        Returns:
+            Dictionary mapping file hashes to the records of their files
+        """
+        self._start_scan()
+        with AsyncFileSystem(self.mount_limits) as fs:
+            if self.scan_state is not None:
+                # The scan state's database is bound to this thread
+                scanned = list(self._scan(recursive))
+            else:
+                scanned = await self._scan_async(recursive, fs)
+
+        # The jobs of each stage run in the executor's threads; the stages
+        # themselves stay on this thread, which owns the hash cache database
+        executor = self.executor
+        self.executor = HashExecutor(
+            max(executor.workers, self.mount_limits.max_workers),
+            executor.backend,
+            mount_limits=self.mount_limits,
         )
+        try:
+            return self._find_in(scanned)
+        finally:
+            self.executor = executor
 
-        hash_map = defaultdict(list)
+    def _find_in(
+        self, scanned: Iterable[Tuple[FileEntry, bool, str]]
+    ) -> Dict[str, List[DuplicateFile]]:
+        """
+        Run the duplicate detection stages over scanned files.
+
+        Args:
+            scanned: Tuples of (entry, fresh, role) as yielded by _scan()
+
+        Returns:
+            Dictionary mapping file hashes to the records of their files
+        """
+        # Stage 1: group by size, a file with a unique size has no duplicate.
+        # The scanned files are held in a columnar index, and only the
+        # candidates are turned back into entries.
+        index = self.index = FileIndex()
+        fresh_sizes = set()
+        reference_start = None
+        with profiling.span("scan"):
+            for entry, fresh, role in scanned:
+                row = index.add(entry)
+                if role == "reference" and reference_start is None:
+                    reference_start = row
+                if fresh and self.scan_state is not None:
+                    fresh_sizes.add(entry.size)
+        if reference_start is None:
+            reference_start = len(index)
+        self._reference_start = reference_start
+
+        reporter = self.logger.reporter
+        reporter.info(f"Scanning {len(index)} files...")
 
-        # Get all files
-        if recursive:
-            files = [f for f in self.directory.rglob("*") if f.is_file()]
+        if self.scan_state is not None:
+            counters = self.scan_state.last_scan
+            reporter.info(
+                f"Incremental scan: {counters['files_fresh']} new or changed files, "
+                f"{counters['dirs_reused']} unchanged directories not re-read"
+            )
+            candidates = self._run_size_stage(index, fresh_sizes)
+            candidates = self._restat_candidates(candidates)
         else:
-            files = [f for f in self.directory.iterdir() if f.is_file()]
+            candidates = self._run_size_stage(index)
 
-        print(f"Scanning {len(files)} files...")
+        # The reference index has no edge digests: files of a size it holds
+        # skip the edge stage and are hashed in full
+        indexed = [
+            entry
+            for size, entries in candidates
+            if size in self._indexed_sizes
+            for entry in entries
+        ]
+        if indexed:
+            candidates = [
+                group for group in candidates if group[0] not in self._indexed_sizes
+            ]
 
-        # Calculate hashes
-        for file_path in files:
-            try:
-                file_hash = self._calculate_hash(file_path)
-                hash_map[file_hash].append(file_path)
-            except Exception as e:
-                print(f"Error processing {file_path.name}: {e}")
+        reporter.begin("Hashing")
+        try:
+            # Stage 2: hash only the first and last few KiB of each candidate
+            edge_groups = self._run_edge_stage(candidates)
+
+            # Stage 3: full content hash for files that still collide
+            hash_map = self._run_full_stage(edge_groups, indexed)
+            if indexed:
+                self._add_indexed_references(hash_map)
+
+            # Optional stage 4: confirm fast-hash collisions with SHA256
+            if self.confirm_sha256:
+                hash_map = self._run_confirm_stage(hash_map)
+        finally:
+            reporter.end()
+
+        if self.hash_cache is not None:
+            self.hash_cache.flush()
 
-        # Filter to only duplicates (hash appears more than once)
-        duplicates = {h: paths for h, paths in hash_map.items() if len(paths) > 1}
+        # Filter to only duplicates (hash appears more than once) with at
+        # least one file to clean
+        duplicates = {}
+        for h, entries in hash_map.items():
+            if len(entries) > 1:
+                files = [
+                    DuplicateFile(*entry, h, self._role(entry)) for entry in entries
+                ]
+                if any(file.role == "target" for file in files):
+                    duplicates[h] = files
 
+        self._store_digests(hash_map)
         return duplicates
 
+    def _role(self, entry: FileEntry) -> str:
+        """Get the role of a candidate, or of a file from the reference index."""
+        row = self._candidate_rows.get(entry.path)
+        if row is None or row >= self._reference_start:
+            return "reference"
+        return "target"
+
+    def _add_indexed_references(self, hash_map: Dict[str, List[FileEntry]]):
+        """
+        Add the reference index's files to the groups of scanned files.
+
+        An indexed file only joins a group while its size and modification
+        time still match the index, so a stale index or an unreachable
+        archive never leads to a target copy being removed.
+
+        Args:
+            hash_map: Groups produced by the full stage, extended in place
+        """
+        target_roots = tuple(
+            os.path.join(os.path.abspath(root), "")
+            for root, role in self.roots
+            if role == "target"
+        )
+        with profiling.span("stat"):
+            for file_hash, entries in hash_map.items():
+                if entries[0].size not in self._indexed_sizes:
+                    continue
+                if all(self._role(entry) == "reference" for entry in entries):
+                    continue
+                for reference in self.reference_index.files_with_digest(
+                    bytes.fromhex(file_hash)
+                ):
+                    # Files scanned in this run are already in the group
+                    if reference.path in self._candidate_rows:
+                        continue
+                    if reference.path.startswith(target_roots):
+                        continue
+                    try:
+                        current = stat_file(reference.path)
+                    except OSError:
+                        continue
+                    if (current.size, current.mtime_ns) == (
+                        reference.size,
+                        reference.mtime_ns,
+                    ):
+                        entries.append(current)
+
+    def _store_digests(self, hash_map: Dict[str, List[FileEntry]]):
+        """Record the full content digests in the scan's index, in binary."""
+        rows = self._candidate_rows
+        for file_hash, entries in hash_map.items():
+            digest = bytes.fromhex(file_hash)
+            for entry in entries:
+                # Files from the reference index are not part of the scan
+                if entry.path in rows:
+                    self.index.set_digest(rows[entry.path], digest)
+        self._candidate_rows = {}
+
+    @staticmethod
+    def _as_paths(duplicates: Dict[str, List[DuplicateFile]]) -> Dict[str, List[Path]]:
+        """Reduce duplicate sets to the paths of their files."""
+        return {
+            h: [Path(file.path) for file in files] for h, files in duplicates.items()
+        }
+
     def clean_duplicates(
         self, recursive: bool = True, keep_strategy: str = "newest"
     ) -> int:
         """
-        Find and remove duplicate files.
+        Find and remove duplicate files, or replace them with links.
 
         Args:
             recursive: If True, scan subdirectories recursively
@@ -81,44 +475,125 @@ class DuplicateCleaner:
                           - "newest": Keep the newest file (by modification time)
                           - "oldest": Keep the oldest file
                           - "shortest": Keep file with shortest name
+                          - "largest-path-depth": Keep the most nested file
+                          - "preferred-directory": Keep the file in the first
+                            of preferred_directories holding one
 
         Returns:
-            Number of files removed
+            Number of files removed or replaced
         """
-        duplicates = self.find_duplicates(recursive)
+        self._check_strategy(keep_strategy)
+        return self._remove_duplicates(
+            self.find_duplicate_files(recursive), keep_strategy
+        )
 
+    async def clean_duplicates_async(
+        self, recursive: bool = True, keep_strategy: str = "newest"
+    ) -> int:
+        """
+        Find duplicate files with overlapping I/O and remove them.
+
+        Args:
+            recursive: If True, scan subdirectories recursively
+            keep_strategy: Strategy for which file to keep (see clean_duplicates)
+
+        Returns:
+            Number of files removed or replaced
+        """
+        self._check_strategy(keep_strategy)
+        duplicates = await self.find_duplicate_files_async(recursive)
+        return self._remove_duplicates(duplicates, keep_strategy)
+
+    def _check_strategy(self, keep_strategy: str):
+        """Reject a keep strategy before any file is read."""
+        if keep_strategy not in KEEP_STRATEGIES:
+            raise ValueError(
+                f"Unknown keep strategy: {keep_strategy} "
+                f"(expected one of {', '.join(KEEP_STRATEGIES)})"
+            )
+        if keep_strategy == "preferred-directory" and not self.preferred_directories:
+            raise ValueError("'preferred-directory' needs preferred_directories")
+
+    def _remove_duplicates(
+        self, duplicates: Dict[str, List[DuplicateFile]], keep_strategy: str
+    ) -> int:
+        """
+        Remove all but one file of every duplicate set.
+
+        In a link mode the duplicates are replaced with links to the kept
+        file instead; paths that already are hardlinks of it are skipped.
+        The kept file is chosen from the records, without stat calls, among
+        the reference files of a set if it has any; reference files are
+        never removed.
+
+        Args:
+            duplicates: Dictionary mapping file hashes to duplicate records
+            keep_strategy: Strategy for which file to keep
+
+        Returns:
+            Number of files removed or replaced
+        """
+        reporter = self.logger.reporter
         if not duplicates:
-            print("\nNo duplicates found!")
+            reporter.info("\nNo duplicates found!")
             return 0
 
-        total_duplicates = sum(len(paths) - 1 for paths in duplicates.values())
-        print(
-            f"\nFound {len(duplicates)} sets of duplicates ({total_duplicates} files to remove)"
+        linking = self.mode != "delete"
+        total_duplicates = sum(map(self._removable, duplicates.values()))
+        action = "replace" if linking else "remove"
+        reporter.info(
+            f"\nFound {len(duplicates)} sets of duplicates ({total_duplicates} files to {action})"
         )
 
         removed_count = 0
+        # Duplicates left in place, offered again by the next incremental scan
+        skipped = []
+        if self.comparer is not None:
+            self.comparer.stats = FileComparer.new_stats()
+        reporter.begin("Linking" if linking else "Removing")
 
-        for file_hash, paths in duplicates.items():
-            # Determine which file to keep
-            if keep_strategy == "newest":
-                keep_file = max(paths, key=lambda p: p.stat().st_mtime)
-            elif keep_strategy == "oldest":
-                keep_file = min(paths, key=lambda p: p.stat().st_mtime)
-            elif keep_strategy == "shortest":
-                keep_file = min(paths, key=lambda p: len(p.name))
-            else:
-                keep_file = paths[0]
+        for file_hash, files in duplicates.items():
+            references = [file for file in files if file.role == "reference"]
+            keep = choose_keep(
+                references or files, keep_strategy, self.preferred_directories
+            )
+            keep_file = Path(keep.path)
+            # Paths of these files must survive, whatever root they were found in
+            protected = {(file.device, file.inode) for file in references}
+            protected.add((keep.device, keep.inode))
 
-            print(f"\nDuplicate set (hash: {file_hash[:8]}...):")
-            print(f"  Keeping: {keep_file}")
+            if reporter.verbose:
+                reporter.detail(f"\nDuplicate set (hash: {file_hash[:8]}...):")
+                reporter.detail(f"  Keeping: {keep_file}")
 
             # Remove duplicates
-            for path in paths:
-                if path != keep_file:
-                    print(f"  {'[DRY RUN] ' if self.dry_run else ''}Removing: {path}")
+            for file in files:
+                if file is keep or file.role == "reference":
+                    continue
+                if (file.device, file.inode) in protected:
+                    # A reference or the kept file itself, reached through a
+                    # symlinked directory or a bind mount, or a hardlink of it
+                    continue
+                path = Path(file.path)
+                if self.comparer is not None:
+                    if not self._verify(path, keep_file, file_hash):
+                        skipped.append(file.path)
+                        continue
+                if reporter.verbose:
+                    reporter.detail(
+                        f"  {'[DRY RUN] ' if self.dry_run else ''}"
+                        f"{'Linking' if linking else 'Removing'}: {path}"
+                    )
 
+                if linking:
+                    if not self._link_duplicate(path, keep_file, file_hash):
+                        skipped.append(file.path)
+                        continue
+                else:
                     if not self.dry_run:
-                        path.unlink()
+                        profiling.count("calls.unlink")
+                        with profiling.span("delete"):
+                            path.unlink()
 
                     self.logger.log_operation(
                         "delete_duplicate",
@@ -126,37 +601,507 @@ class DuplicateCleaner:
                         destination=str(keep_file),
                         status="success" if not self.dry_run else "dry_run",
                         details=f"Duplicate of {keep_file.name}",
+                        extra={
+                            "hash": file_hash,
+                            "hash_algorithm": self.result_algorithm,
+                        },
                     )
-                    removed_count += 1
+                removed_count += 1
+                reporter.advance(1, file.size)
 
+        reporter.end()
+        if self.scan_state is not None:
+            self.scan_state.forget(skipped)
         self.logger.save()
-        print(
-            f"\n{'[DRY RUN] ' if self.dry_run else ''}Removed {removed_count} duplicate files"
-        )
+        if linking:
+            summary = f"Replaced {removed_count} duplicate files with {self.mode}s"
+        else:
+            summary = f"Removed {removed_count} duplicate files"
+        reporter.info(f"\n{'[DRY RUN] ' if self.dry_run else ''}{summary}")
+        if self.comparer is not None:
+            stats = self.comparer.stats
+            reporter.info(
+                f"Verified {stats['files_verified']} files byte by byte: "
+                f"{stats['bytes_read'] / (1024 * 1024):.1f} MB read in "
+                f"{stats['seconds']:.2f}s, {stats['mismatches']} mismatches"
+            )
 
         return removed_count
 
-    def _calculate_hash(self, file_path: Path, block_size: int = 65536) -> str:
+    @staticmethod
+    def _removable(files: List[DuplicateFile]) -> int:
+        """Count the files of a duplicate set that cleaning removes."""
+        targets = sum(file.role == "target" for file in files)
+        # Without a reference file, one target copy is kept
+        return targets if targets < len(files) else targets - 1
+
+    def _verify(self, path: Path, keep_file: Path, file_hash: str) -> bool:
+        """
+        Compare a duplicate with the kept file before it is replaced.
+
+        A duplicate that differs, or cannot be compared, is logged as
+        skipped and left alone.
+
+        Args:
+            path: Duplicate about to be removed or linked
+            keep_file: File that is kept
+            file_hash: Content hash shared by both files
+
+        Returns:
+            True if the files are byte-for-byte identical
+        """
+        try:
+            if self.comparer.same_content(str(keep_file), str(path)):
+                return True
+            details = f"Content differs from {keep_file.name} despite equal hashes"
+        except OSError as e:
+            details = f"Verification failed: {e}"
+
+        self.logger.reporter.warning(f"Keeping {path}: {details}")
+        self.logger.log_operation(
+            "delete_duplicate" if self.mode == "delete" else "link_duplicate",
+            path,
+            destination=str(keep_file),
+            status="skipped",
+            details=details,
+            extra={"hash": file_hash, "hash_algorithm": self.result_algorithm},
+        )
+        return False
+
+    def _link_duplicate(self, path: Path, keep_file: Path, file_hash: str) -> bool:
+        """
+        Replace a duplicate with a link to the kept file and log it.
+
+        The operation is logged as 'link_duplicate' with the mode, which
+        FileOrganizer.undo_last_session() reverses by copying the content
+        back into an independent file.
+
+        Args:
+            path: Duplicate to replace
+            keep_file: File that is kept
+            file_hash: Content hash of both files
+
+        Returns:
+            True if the duplicate was replaced (or would be, in a dry run)
+        """
+        extra = {
+            "hash": file_hash,
+            "hash_algorithm": self.result_algorithm,
+            "mode": self.mode,
+        }
+        if not self.dry_run:
+            try:
+                replace_with_link(keep_file, path, self.mode)
+            except OSError as e:
+                self._report_error(str(path), e)
+                self.logger.log_operation(
+                    "link_duplicate",
+                    path,
+                    destination=str(keep_file),
+                    status="error",
+                    details=str(e),
+                    extra=extra,
+                )
+                return False
+
+        self.logger.log_operation(
+            "link_duplicate",
+            path,
+            destination=str(keep_file),
+            status="success" if not self.dry_run else "dry_run",
+            details=f"Replaced by a {self.mode} to {keep_file.name}",
+            extra=extra,
+        )
+        return True
+
+    def _start_scan(self):
+        """Announce a scan and reset its counters."""
+        self.logger.reporter.info(
+            f"\n{'[DRY RUN] ' if self.dry_run else ''}Scanning for duplicates in: {self.directory}"
+        )
+        for root, role in self.roots[1:]:
+            self.logger.reporter.info(f"  and {root} ({role})")
+        if self.reference_index is not None:
+            self.logger.reporter.info(
+                f"  and the reference index {self.reference_index.db_path}"
+            )
+        self.scan_stats = self._new_scan_stats()
+
+    def _report_error(self, path: str, error: Exception):
+        """Print an error for a file that could not be processed."""
+        self.logger.reporter.warning(
+            f"Error processing {os.path.basename(path)}: {error}"
+        )
+
+    @property
+    def result_algorithm(self) -> str:
+        """Algorithm of the hashes returned by find_duplicates."""
+        return "sha256" if self.confirm_sha256 else self.hash_algorithm
+
+    @staticmethod
+    def _new_scan_stats() -> Dict[str, Dict[str, int]]:
+        """Create empty per-stage counters for a duplicate scan."""
+        counters = ("files_in", "files_out", "bytes_read", "bytes_avoided")
+        return {
+            stage: {counter: 0 for counter in counters}
+            for stage in ("size", "edge", "full", "confirm")
+        }
+
+    def _scan_options(self, recursive: bool) -> Dict[str, Any]:
+        """Get the walk options for the directory."""
+        return {
+            "max_depth": self.max_depth if recursive else 0,
+            "exclude": self.exclude,
+            "symlinks": self.symlinks,
+            "on_error": self._report_error,
+        }
+
+    def _scan(self, recursive: bool) -> Iterator[Tuple[FileEntry, bool, str]]:
+        """
+        Walk the roots, through the scan state if one is configured.
+
+        Args:
+            recursive: If True, scan subdirectories recursively
+
+        Yields:
+            Tuples of (entry, fresh, role); without scan state every file is
+            fresh
+        """
+        options = self._scan_options(recursive)
+        if self.scan_state is not None:
+            # The state counts per walk; report the totals over all roots
+            totals = Counter()
+            for root, role in self.roots:
+                for entry, fresh in self.scan_state.walk(root, **options):
+                    yield entry, fresh, role
+                totals.update(self.scan_state.last_scan)
+            self.scan_state.last_scan = dict(totals)
+        else:
+            for root, role in self.roots:
+                for entry in walk(root, **options):
+                    yield entry, True, role
+
+    async def _scan_async(
+        self, recursive: bool, fs: AsyncFileSystem
+    ) -> List[Tuple[FileEntry, bool, str]]:
+        """
+        List the roots, then stat the files concurrently.
+
+        Args:
+            recursive: If True, scan subdirectories recursively
+            fs: Asynchronous file system access
+
+        Returns:
+            List of (entry, fresh, role) tuples, every file being fresh
+        """
+        scanned = []
+        for root, role in self.roots:
+            device = (await fs.run(None, os.stat, root)).st_dev
+            scan = walk(root, stat=False, **self._scan_options(recursive))
+            listing = await fs.run(device, list, scan)
+
+            paths = [entry.path for entry in listing]
+            for path, result in zip(paths, await fs.stat_files(paths, device)):
+                if isinstance(result, OSError):
+                    self._report_error(path, result)
+                    continue
+                scanned.append((result, True, role))
+        return scanned
+
+    def _run_size_stage(
+        self,
+        index: FileIndex,
+        fresh_sizes: Set[int] = None,
+    ) -> List[Tuple[int, List[FileEntry]]]:
         """
-        Calculate SHA256 hash of a file.
+        Drop every file whose size is unique.
+
+        Args:
+            index: Scanned files
+            fresh_sizes: If given, also drop groups without a new or changed
+                         file; their duplicates were reported by earlier runs
+
+        Returns:
+            List of (size, entries) groups that may contain duplicates
+        """
+        stats = self.scan_stats["size"]
+        stats["files_in"] += len(index)
+        candidates = []
+        self._candidate_rows = {}
+
+        groups = index.rows_by_shared_size()
+        self._indexed_sizes = set()
+        if self.reference_index is not None:
+            # A target file with a unique size may still have a copy in the
+            # reference index
+            lone = {}
+            for row in range(self._reference_start):
+                size = index.sizes[row]
+                if size not in groups:
+                    lone[size] = row
+            self._indexed_sizes = self.reference_index.sizes_present([*groups, *lone])
+            for size in self._indexed_sizes.intersection(lone):
+                groups[size] = [lone[size]]
+
+        kept_bytes = 0
+        for size, rows in groups.items():
+            # Rows are in scan order, so a group holds a target file exactly
+            # when its first row is one
+            if rows[0] >= self._reference_start:
+                continue
+            if fresh_sizes is None or size in fresh_sizes:
+                stats["files_out"] += len(rows)
+                kept_bytes += size * len(rows)
+                entries = [index[row] for row in rows]
+                self._candidate_rows.update(zip((e.path for e in entries), rows))
+                candidates.append((size, entries))
+        stats["bytes_avoided"] += sum(index.sizes) - kept_bytes
+
+        return candidates
+
+    def _restat_candidates(
+        self, candidates: List[Tuple[int, List[FileEntry]]]
+    ) -> List[Tuple[int, List[FileEntry]]]:
+        """
+        Refresh the stat data of candidates taken from the scan state.
+
+        A file modified in place keeps its directory's mtime, so its stored
+        identity may be stale; hashing and the hash cache need the current one.
+
+        Args:
+            candidates: Size groups produced by the size stage
+
+        Returns:
+            Size groups rebuilt from the current stat data
+        """
+        groups = defaultdict(list)
+        with profiling.span("stat"):
+            for _, entries in candidates:
+                for entry in entries:
+                    try:
+                        entry = stat_file(entry.path)
+                    except OSError as e:
+                        self._report_error(entry.path, e)
+                        continue
+                    groups[entry.size].append(entry)
+        return [
+            (size, entries)
+            for size, entries in groups.items()
+            if len(entries) > 1 or size in self._indexed_sizes
+        ]
+
+    def _run_edge_stage(
+        self, candidates: List[Tuple[int, List[FileEntry]]]
+    ) -> Dict[Tuple[int, str, bool], List[FileEntry]]:
+        """
+        Split size groups by a hash of the first and last bytes of each file.
+
+        Files small enough to be read completely get their full hash here,
+        so they skip the last stage.
+
+        Args:
+            candidates: Size groups produced by the size stage
+
+        Returns:
+            Mapping of (size, digest, complete) to entries sharing that key
+        """
+        stats = self.scan_stats["edge"]
+        small, large = [], []
+        for size, entries in candidates:
+            (small if size <= 2 * self.EDGE_SIZE else large).extend(entries)
+
+        algorithm = self.hash_algorithm
+        results = {}
+        for entries, kind, func, args in (
+            (small, algorithm, hash_file, (algorithm,)),
+            (
+                large,
+                f"{algorithm}-edge{self.EDGE_SIZE}",
+                hash_file_edges,
+                (self.EDGE_SIZE, algorithm),
+            ),
+        ):
+            outcomes = self._hash_entries(entries, kind, func, *args)
+            results.update(zip((entry.path for entry in entries), outcomes))
+
+        edge_groups = defaultdict(list)
+        for size, entries in candidates:
+            complete = size <= 2 * self.EDGE_SIZE
+            for entry in entries:
+                stats["files_in"] += 1
+                digest, read = results[entry.path]
+                stats["bytes_read"] += read
+                if digest is not None:
+                    edge_groups[(size, digest, complete)].append(entry)
+
+        for (size, _, _), entries in edge_groups.items():
+            if len(entries) > 1:
+                stats["files_out"] += len(entries)
+            else:
+                stats["bytes_avoided"] += size - results[entries[0].path][1]
+
+        return edge_groups
+
+    def _run_full_stage(
+        self,
+        edge_groups: Dict[Tuple[int, str, bool], List[FileEntry]],
+        indexed: List[FileEntry] = (),
+    ) -> Dict[str, List[FileEntry]]:
+        """
+        Fully hash the files that still collide after the edge stage.
+
+        Args:
+            edge_groups: Groups produced by the edge stage
+            indexed: Files of a size the reference index holds, hashed
+                     whether or not they collide with a scanned file
+
+        Returns:
+            Dictionary mapping file hashes to entries
+        """
+        stats = self.scan_stats["full"]
+        hash_map = defaultdict(list)
+
+        pending = list(indexed)
+        for (size, digest, complete), entries in edge_groups.items():
+            if len(entries) < 2:
+                continue
+            if complete:
+                # The edge stage already read these files end to end
+                hash_map[digest].extend(entries)
+            else:
+                pending.extend(entries)
+
+        algorithm = self.hash_algorithm
+        outcomes = self._hash_entries(pending, algorithm, hash_file, algorithm)
+        for entry, (file_hash, read) in zip(pending, outcomes):
+            stats["files_in"] += 1
+            stats["bytes_read"] += read
+            if file_hash is None:
+                continue
+            stats["bytes_avoided"] += entry.size - read
+            hash_map[file_hash].append(entry)
+
+        for entries in hash_map.values():
+            if len(entries) > 1:
+                stats["files_out"] += len(entries)
+
+        return hash_map
+
+    def _run_confirm_stage(
+        self, hash_map: Dict[str, List[FileEntry]]
+    ) -> Dict[str, List[FileEntry]]:
+        """
+        Re-hash colliding groups with SHA256.
+
+        Args:
+            hash_map: Groups produced by the full stage
+
+        Returns:
+            Dictionary mapping SHA256 hashes to entries
+        """
+        stats = self.scan_stats["confirm"]
+        pending = [
+            entry
+            for entries in hash_map.values()
+            if len(entries) > 1
+            for entry in entries
+        ]
+
+        confirmed = defaultdict(list)
+        outcomes = self._hash_entries(pending, "sha256", hash_file, "sha256")
+        for entry, (file_hash, read) in zip(pending, outcomes):
+            stats["files_in"] += 1
+            stats["bytes_read"] += read
+            if file_hash is not None:
+                confirmed[file_hash].append(entry)
+
+        for entries in confirmed.values():
+            if len(entries) > 1:
+                stats["files_out"] += len(entries)
+
+        return confirmed
+
+    def _hash_entries(
+        self, entries: List[FileEntry], kind: str, func: Callable, *args
+    ) -> List[Tuple[Optional[str], int]]:
+        """
+        Hash files through the cache and the executor.
+
+        Args:
+            entries: Files to hash
+            kind: Hash kind used as the cache key
+            func: Hashing function from the hashing module
+            *args: Extra arguments passed to func after the path
+
+        Returns:
+            List aligned with entries of (digest, bytes read); the digest
+            is None for files that could not be read
+        """
+        results: List[Tuple[Optional[str], int]] = [(None, 0)] * len(entries)
+        misses = []
+
+        for index, entry in enumerate(entries):
+            if self.hash_cache is not None:
+                cached = self.hash_cache.get(entry.identity, kind)
+                if cached is not None:
+                    results[index] = (cached, 0)
+                    continue
+            misses.append(index)
+
+        with profiling.span("hash"):
+            outcomes = self.executor.map(
+                func,
+                [(entries[index].path,) + args for index in misses],
+                [entries[index].device for index in misses],
+            )
+        profiling.count("calls.open", len(misses))
+        profiling.count("files_hashed", len(misses))
+        hashed_bytes = 0
+
+        for index, outcome in zip(misses, outcomes):
+            entry = entries[index]
+            if isinstance(outcome, Exception):
+                self._report_error(entry.path, outcome)
+                continue
+            digest, read = outcome
+            self.bytes_hashed += read
+            hashed_bytes += read
+            profiling.count("bytes_read", read)
+            if self.hash_cache is not None:
+                self.hash_cache.put(entry.identity, kind, digest)
+            results[index] = (digest, read)
+
+        self.logger.reporter.advance(len(entries), hashed_bytes)
+        return results
+
+    def _calculate_hash(self, file_path: Path, block_size: int = None) -> str:
+        """
+        Calculate the content hash of a file with the configured algorithm.
+
+        When a hash cache is configured it is consulted first, and the
+        file is only read if its stat identity changed since it was cached.
 
         Args:
             file_path: Path to the file
-            block_size: Size of blocks to read at a time
+            block_size: Size of blocks to read at a time (default: adaptive)
 
         Returns:
             Hexadecimal hash string
         """
-        hasher = hashlib.sha256()
+        algorithm = self.hash_algorithm
+        identity = None
+        if self.hash_cache is not None:
+            identity = stat_identity(os.stat(file_path))
+            cached = self.hash_cache.get(identity, algorithm)
+            if cached is not None:
+                return cached
 
-        with open(file_path, "rb") as f:
-            while True:
-                block = f.read(block_size)
-                if not block:
-                    break
-                hasher.update(block)
+        digest, read = hash_file(str(file_path), algorithm, block_size)
+        self.bytes_hashed += read
 
-        return hasher.hexdigest()
+        if identity is not None:
+            self.hash_cache.put(identity, algorithm, digest)
+        return digest
 
     def get_duplicate_report(self, recursive: bool = True) -> Dict:
         """
@@ -168,16 +1113,37 @@ class DuplicateCleaner:
         Returns:
             Dictionary with duplicate statistics and details
         """
-        duplicates = self.find_duplicates(recursive)
+        return self._build_report(self.find_duplicate_files(recursive))
+
+    async def get_duplicate_report_async(self, recursive: bool = True) -> Dict:
+        """
+        Get a duplicate report, finding the duplicates with overlapping I/O.
+
+        Args:
+            recursive: If True, scan subdirectories recursively
+
+        Returns:
+            Dictionary with duplicate statistics and details
+        """
+        return self._build_report(await self.find_duplicate_files_async(recursive))
 
-        total_files = sum(len(paths) for paths in duplicates.values())
-        total_duplicates = sum(len(paths) - 1 for paths in duplicates.values())
+    def _build_report(self, duplicates: Dict[str, List[DuplicateFile]]) -> Dict:
+        """
+        Summarize the result of a duplicate search from the scanned records.
+
+        Args:
+            duplicates: Dictionary mapping file hashes to duplicate records
+
+        Returns:
+            Dictionary with duplicate statistics and details
+        """
+        total_files = sum(len(files) for files in duplicates.values())
+        total_duplicates = sum(map(self._removable, duplicates.values()))
 
         # Calculate wasted space
         wasted_space = 0
-        for paths in duplicates.values():
-            file_size = paths[0].stat().st_size
-            wasted_space += file_size * (len(paths) - 1)
+        for files in duplicates.values():
+            wasted_space += files[0].size * self._removable(files)
 
         report = {
             "duplicate_sets": len(duplicates),
@@ -185,18 +1151,27 @@ class DuplicateCleaner:
             "total_duplicates": total_duplicates,
             "wasted_space_bytes": wasted_space,
             "wasted_space_mb": round(wasted_space / (1024 * 1024), 2),
+            "hash_algorithm": self.result_algorithm,
+            "stages": self.scan_stats,
+            "cache": self.hash_cache.stats() if self.hash_cache else None,
+            "incremental": (
+                dict(self.scan_state.last_scan) if self.scan_state else None
+            ),
             "details": [],
         }
 
-        for file_hash, paths in duplicates.items():
-            file_size = paths[0].stat().st_size
+        for file_hash, files in duplicates.items():
+            file_size = files[0].size
             report["details"].append(
                 {
                     "hash": file_hash[:16],
-                    "count": len(paths),
+                    "count": len(files),
                     "size_bytes": file_size,
                     "size_mb": round(file_size / (1024 * 1024), 2),
-                    "files": [str(p) for p in paths],
+                    "files": [file.path for file in files],
+                    "references": [
+                        file.path for file in files if file.role == "reference"
+                    ],
                 }
             )
 
@@ -0,0 +1,203 @@
+"""
+Columnar index of scanned files.
+
+A list of FileEntry tuples costs a few hundred bytes per file: the tuple,
+a path string repeating the directory, and an int object per stat field.
+FileIndex stores the same data column by column instead:
+
+- every (directory, device) pair once, files referring to it by number
+- file names encoded back to back in one bytearray, with end offsets
+- sizes, modification times and inodes in typed arrays
+- content digests as raw bytes (16 or 32 per file for the usual
+  algorithms) in one bytearray, instead of hexadecimal strings
+
+which comes to well under 100 bytes per file. Rows are turned back into
+FileEntry tuples when accessed, so code iterating over entries works
+unchanged.
+"""
+
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .walker import FileEntry
+
+# Stored for stat fields that were not read (walk(stat=False))
+MISSING = -1
+
+# Inodes are unsigned, so their missing marker is the largest value
+MISSING_INODE = 2**64 - 1
+
+# Bits per file in each bitmap of rows_by_shared_size(); more bits mean
+# fewer unique sizes sharing a bucket with another size
+SIZE_BUCKET_BITS = 32
+
+_SEPARATORS = os.sep + (os.altsep or "")
+
+
+class FileIndex:
+    """Files of a scan, stored column by column."""
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self._directories: List[Tuple[str, Optional[int]]] = []
+        self._directory_ids: Dict[Tuple[str, Optional[int]], int] = {}
+        self.directory_ids = array("I")
+        self._names = bytearray()
+        self._name_ends = array("Q")
+        self.sizes = array("q")
+        self.mtimes_ns = array("q")
+        self.inodes = array("Q")
+        self.digest_size = 0
+        self._digests: Optional[bytearray] = None
+        self._has_digest: Optional[bytearray] = None
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[FileEntry]) -> "FileIndex":
+        """
+        Build an index from scanned files.
+
+        Args:
+            entries: Files, e.g. from walk()
+
+        Returns:
+            FileIndex holding one row per entry, in order
+        """
+        index = cls()
+        for entry in entries:
+            index.add(entry)
+        return index
+
+    def add(self, entry: FileEntry) -> int:
+        """
+        Append a file.
+
+        Args:
+            entry: Scanned file
+
+        Returns:
+            Row number of the file
+        """
+        path = entry.path
+        cut = max(path.rfind(separator) for separator in _SEPARATORS) + 1
+        # The directory keeps its trailing separator, so paths round-trip
+        key = (path[:cut], entry.device)
+        directory_id = self._directory_ids.get(key)
+        if directory_id is None:
+            directory_id = len(self._directories)
+            self._directory_ids[key] = directory_id
+            self._directories.append(key)
+
+        self.directory_ids.append(directory_id)
+        self._names += os.fsencode(path[cut:])
+        self._name_ends.append(len(self._names))
+        self.sizes.append(MISSING if entry.size is None else entry.size)
+        self.mtimes_ns.append(MISSING if entry.mtime_ns is None else entry.mtime_ns)
+        self.inodes.append(MISSING_INODE if entry.inode is None else entry.inode)
+        if self._digests is not None:
+            self._digests.extend(bytes(self.digest_size))
+            self._has_digest.append(0)
+        return len(self.sizes) - 1
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def __getitem__(self, row: int) -> FileEntry:
+        """Get the file of a row as a FileEntry."""
+        size = self.sizes[row]
+        mtime_ns = self.mtimes_ns[row]
+        inode = self.inodes[row]
+        return FileEntry(
+            self.path(row),
+            None if size == MISSING else size,
+            None if mtime_ns == MISSING else mtime_ns,
+            None if inode == MISSING_INODE else inode,
+            self._directories[self.directory_ids[row]][1],
+        )
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def path(self, row: int) -> str:
+        """Get the path of the file in a row."""
+        start = self._name_ends[row - 1] if row else 0
+        name = os.fsdecode(bytes(self._names[start : self._name_ends[row]]))
+        return self._directories[self.directory_ids[row]][0] + name
+
+    def set_digest(self, row: int, digest: bytes):
+        """
+        Store the binary content digest of a file.
+
+        Args:
+            row: Row of the file
+            digest: Raw digest; every digest in an index has the same length
+        """
+        if self._digests is None:
+            self.digest_size = len(digest)
+            self._digests = bytearray(len(self) * self.digest_size)
+            self._has_digest = bytearray(len(self))
+        elif len(digest) != self.digest_size:
+            raise ValueError(
+                f"Digest of {len(digest)} bytes in an index of "
+                f"{self.digest_size}-byte digests"
+            )
+        start = row * self.digest_size
+        self._digests[start : start + self.digest_size] = digest
+        self._has_digest[row] = 1
+
+    def digest(self, row: int) -> Optional[bytes]:
+        """Get the binary digest of a file, or None if none is stored."""
+        if self._has_digest is None or not self._has_digest[row]:
+            return None
+        start = row * self.digest_size
+        return bytes(self._digests[start : start + self.digest_size])
+
+    def rows_by_shared_size(self) -> Dict[int, List[int]]:
+        """
+        Group the rows of files whose size another file has too.
+
+        Sizes are first hashed into two bitmaps, 'seen' and 'seen again',
+        a few bytes per file in total. Only rows whose bucket was seen again
+        are then grouped by their exact size, so the many files with a
+        unique size never get a dictionary entry.
+
+        Returns:
+            Dictionary mapping each shared size to its rows
+        """
+        # Odd, so sizes that are multiples of a power of two still spread
+        buckets = len(self) * SIZE_BUCKET_BITS + 1
+        seen = bytearray(buckets // 8 + 1)
+        again = bytearray(buckets // 8 + 1)
+        for size in self.sizes:
+            bucket = size % buckets
+            byte, bit = bucket >> 3, 1 << (bucket & 7)
+            if seen[byte] & bit:
+                again[byte] |= bit
+            else:
+                seen[byte] |= bit
+
+        groups: Dict[int, List[int]] = {}
+        for row, size in enumerate(self.sizes):
+            bucket = size % buckets
+            if again[bucket >> 3] & (1 << (bucket & 7)):
+                groups.setdefault(size, []).append(row)
+        return {size: rows for size, rows in groups.items() if len(rows) > 1}
+
+    def nbytes(self) -> int:
+        """Estimate the memory held by the index, in bytes."""
+        total = len(self._names)
+        for column in (
+            self.directory_ids,
+            self._name_ends,
+            self.sizes,
+            self.mtimes_ns,
+            self.inodes,
+        ):
+            total += column.itemsize * len(column)
+        if self._digests is not None:
+            total += len(self._digests) + len(self._has_digest)
+        # Interned directories: the key tuple, its string and the dict slot
+        for directory, _ in self._directories:
+            total += 150 + len(directory)
+        return total
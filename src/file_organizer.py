@@ -2,15 +2,30 @@
 File organizer module for managing and categorizing files.
 """
 
+import asyncio
 import os
-import json
 import shutil
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Dict, Optional, Sequence, Tuple
 from datetime import datetime
 
+from . import profiling
+from .async_io import AsyncFileSystem, MountLimits
 from .config_loader import ConfigLoader
+from .content_type import ContentTypeDetector
+from .file_index import FileIndex
+from .journal import read_last_session
+from .linking import break_link
 from .logger import OrganizerLogger
+from .mover import (
+    DestinationNames,
+    MoveExecutor,
+    MovePlan,
+    has_pending,
+    intent_path_for_log,
+)
+from .scan_state import ScanState
+from .walker import FileEntry, walk
 
 
 class FileOrganizer:
@@ -22,6 +37,8 @@ class FileOrganizer:
         config_path: str = None,
         logger: OrganizerLogger = None,
         dry_run: bool = False,
+        scan_state: ScanState = None,
+        content_types: ContentTypeDetector = None,
     ):
         """
         Initialize file organizer.
@@ -31,11 +48,21 @@ class FileOrganizer:
             config_path: Path to configuration file
             logger: Logger instance for tracking operations
             dry_run: If True, only simulate operations without moving files
+            scan_state: Scan state of previous runs; when given, only new or
+                        changed files are organized
+            content_types: Detector for files whose extension is missing or
+                           unknown (default: an uncached one if the
+                           'content_detection' setting is on, else none)
         """
         self.source_dir = Path(source_dir)
         self.config = ConfigLoader(config_path)
         self.logger = logger or OrganizerLogger()
         self.dry_run = dry_run
+        self.scan_state = scan_state
+        self.content_types = content_types
+        if content_types is None and self.config.get_setting("content_detection"):
+            self.content_types = ContentTypeDetector()
+        self.intent_log = intent_path_for_log(self.logger.log_file)
 
         if not self.source_dir.exists():
             raise ValueError(f"Source directory does not exist: {source_dir}")
@@ -44,118 +71,328 @@ class FileOrganizer:
         """
         Organize all files in the source directory.
 
+        The complete move plan is built first and then applied by a
+        MoveExecutor, which keeps a write-ahead intent log next to the
+        operation log until the run has finished.
+
         Args:
             create_date_folders: If True, create subdirectories based on file date
         """
-        print(
-            f"\n{'[DRY RUN] ' if self.dry_run else ''}Starting organization of: {self.source_dir}"
-        )
+        if not self._start():
+            return
 
-        files = [f for f in self.source_dir.iterdir() if f.is_file()]
-        print(f"Found {len(files)} files to organize\n")
+        # The listing is taken up front because files are moved out of the
+        # directory while it is processed; a columnar index keeps it small
+        with profiling.span("scan"):
+            if self.scan_state is not None:
+                scanned = self.scan_state.walk(self.source_dir, **self._scan_options())
+                entries = FileIndex.from_entries(
+                    entry for entry, fresh in scanned if fresh
+                )
+            else:
+                entries = FileIndex.from_entries(
+                    walk(self.source_dir, **self._scan_options())
+                )
+        if self.scan_state is not None:
+            self.logger.reporter.info(
+                f"Found {len(entries)} new or changed files to organize\n"
+            )
+        else:
+            self.logger.reporter.info(f"Found {len(entries)} files to organize\n")
 
-        for file_path in files:
-            try:
-                self._organize_file(file_path, create_date_folders)
-            except Exception as e:
-                self.logger.log_operation(
-                    "move", file_path, status="error", details=str(e)
+        self.organize_files(entries, create_date_folders)
+        self._forget_scanned(entries)
+
+        self.logger.save()
+        self.logger.print_summary()
+
+    async def organize_async(
+        self, create_date_folders: bool = False, limits: MountLimits = None
+    ) -> Dict[str, int]:
+        """
+        Organize all files in the source directory with overlapping I/O.
+
+        Meant for network mounts, where every stat and rename waits for a
+        round trip: the files are stat'ed, their destination directories
+        listed and the moves applied concurrently, bounded per mount.
+
+        Args:
+            create_date_folders: If True, create subdirectories based on file date
+            limits: Concurrency limits per mount (default: the
+                    'io_concurrency' setting)
+
+        Returns:
+            Dictionary with renamed/copied/error counts and the number of
+            directories created
+        """
+        if not self._start():
+            return MoveExecutor.new_stats()
+
+        with AsyncFileSystem(limits or self._mount_limits()) as fs:
+            if self.scan_state is not None:
+                # The scan state's database is bound to this thread
+                with profiling.span("scan"):
+                    options = self._scan_options()
+                    scanned = self.scan_state.walk(self.source_dir, **options)
+                    entries = FileIndex.from_entries(
+                        entry for entry, fresh in scanned if fresh
+                    )
+                self.logger.reporter.info(
+                    f"Found {len(entries)} new or changed files to organize\n"
                 )
-                print(f"Error organizing {file_path.name}: {e}")
+            else:
+                with profiling.span("scan"):
+                    device = (await fs.run(None, os.stat, self.source_dir)).st_dev
+                    scan = walk(self.source_dir, stat=False, **self._scan_options())
+                    listing = await fs.run(device, list, scan)
+                    paths = [entry.path for entry in listing]
+                    results = await fs.stat_files(paths, device)
+                # Files that vanished since the listing are skipped
+                entries = [entry for entry in results if isinstance(entry, FileEntry)]
+                self.logger.reporter.info(f"Found {len(entries)} files to organize\n")
+
+            stats = await self.organize_files_async(entries, create_date_folders, fs)
+        self._forget_scanned(entries)
 
         self.logger.save()
         self.logger.print_summary()
+        return stats
 
-    def _organize_file(self, file_path: Path, create_date_folders: bool = False):
+    def organize_files(
+        self, entries: Sequence[FileEntry], create_date_folders: bool = False
+    ) -> Dict[str, int]:
         """
-        Organize a single file.
+        Plan and apply the moves of the given files.
 
         Args:
-            file_path: Path to the file
+            entries: Files in the source directory to organize (a list or a
+                     FileIndex)
             create_date_folders: Whether to create date-based subdirectories
+
+        Returns:
+            Dictionary with renamed/copied/error counts and the number of
+            directories created (all zero in dry run mode)
         """
-        # Get category for file
-        extension = file_path.suffix.lower()
-        category = self.config.get_category_for_extension(extension)
+        plan = self.plan(entries, create_date_folders)
 
-        # Create destination directory
-        dest_dir = self.source_dir / category
+        if self.dry_run:
+            self._log_dry_run(plan)
+            return MoveExecutor.new_stats()
 
-        if create_date_folders:
-            # Get file modification date
-            mod_time = datetime.fromtimestamp(file_path.stat().st_mtime)
-            date_folder = mod_time.strftime("%Y-%m")
-            dest_dir = dest_dir / date_folder
+        stats = MoveExecutor(self.intent_log, self.logger).execute(plan)
+        self._print_moves(plan, stats)
+        return stats
+
+    async def organize_files_async(
+        self,
+        entries: Sequence[FileEntry],
+        create_date_folders: bool = False,
+        fs: AsyncFileSystem = None,
+    ) -> Dict[str, int]:
+        """
+        Plan and apply the moves of the given files concurrently.
+
+        Args:
+            entries: Files in the source directory to organize
+            create_date_folders: Whether to create date-based subdirectories
+            fs: Asynchronous file system access (default: one using the
+                'io_concurrency' setting)
+
+        Returns:
+            Dictionary with renamed/copied/error counts and the number of
+            directories created (all zero in dry run mode)
+        """
+        if fs is None:
+            with AsyncFileSystem(self._mount_limits()) as fs:
+                return await self.organize_files_async(entries, create_date_folders, fs)
+
+        # List every destination directory up front, concurrently
+        directories = set()
+        for entry in entries:
+            try:
+                _, dest_path = self._destination_for(entry, create_date_folders)
+            except Exception:
+                # Reported when the plan is built
+                continue
+            directories.add(os.fspath(dest_path.parent))
+        directories = sorted(directories)
+        listings = await asyncio.gather(
+            *(fs.run(None, DestinationNames.list_directory, d) for d in directories)
+        )
+        names = DestinationNames()
+        for directory, listing in zip(directories, listings):
+            names.preload(directory, listing)
+
+        plan = self.plan(entries, create_date_folders, names)
 
-        # Create directory if it doesn't exist
-        if not self.dry_run:
-            dest_dir.mkdir(parents=True, exist_ok=True)
+        if self.dry_run:
+            self._log_dry_run(plan)
+            return MoveExecutor.new_stats()
 
-        # Destination file path
-        dest_path = dest_dir / file_path.name
+        executor = MoveExecutor(self.intent_log, self.logger)
+        stats = await executor.execute_async(plan, fs)
+        self._print_moves(plan, stats)
+        return stats
 
-        # Handle file name conflicts
-        if dest_path.exists():
-            dest_path = self._get_unique_filename(dest_path)
+    def plan(
+        self,
+        entries: Sequence[FileEntry],
+        create_date_folders: bool = False,
+        names: DestinationNames = None,
+    ):
+        """
+        Decide the destination of every file without touching the disk.
 
-        # Move file
-        action = f"{'[DRY RUN] ' if self.dry_run else ''}Moving"
-        print(f"{action} {file_path.name} -> {category}/{dest_path.name}")
+        Args:
+            entries: Files to organize
+            create_date_folders: Whether to create date-based subdirectories
+            names: Name allocator, possibly with directory listings already
+                   loaded (default: a new one)
 
-        if not self.dry_run:
-            shutil.move(str(file_path), str(dest_path))
+        Returns:
+            MovePlan with conflict-free destinations
+        """
+        with profiling.span("categorize"):
+            plan = self._plan(entries, create_date_folders, names)
+            if self.content_types is not None:
+                self.content_types.flush()
+            return plan
+
+    def _plan(
+        self,
+        entries: Sequence[FileEntry],
+        create_date_folders: bool,
+        names: Optional[DestinationNames],
+    ) -> MovePlan:
+        """Build the move plan (see plan())."""
+        plan = MovePlan()
+        names = names or DestinationNames()
+        for entry in entries:
+            file_path = Path(entry.path)
+            try:
+                category, dest_path = self._destination_for(entry, create_date_folders)
+
+                # Handle file name conflicts, on disk and within the plan
+                dest_path = Path(names.allocate(dest_path.parent, dest_path.name))
+
+                plan.add(file_path, dest_path, category, entry.device, entry.size)
+            except Exception as e:
+                self.logger.log_operation(
+                    "move", file_path, status="error", details=str(e)
+                )
+                self.logger.reporter.warning(f"Error organizing {file_path.name}: {e}")
+        return plan
 
-        self.logger.log_operation(
-            "move",
-            file_path,
-            dest_path,
-            status="success" if not self.dry_run else "dry_run",
-            details=f"Organized to {category}",
+    def _start(self) -> bool:
+        """Announce a run; False if an interrupted run must be recovered first."""
+        self.logger.reporter.info(
+            f"\n{'[DRY RUN] ' if self.dry_run else ''}Starting organization of: {self.source_dir}"
         )
 
-    def _get_unique_filename(self, file_path: Path) -> Path:
+        if has_pending(self.intent_log):
+            self.logger.reporter.warning(
+                f"An interrupted run left unfinished moves in {self.intent_log}.\n"
+                "Resume or roll it back with the 'recover' command first."
+            )
+            return False
+        return True
+
+    def _forget_scanned(self, entries: Sequence[FileEntry]):
+        """
+        Make the scanned files fresh again for the next incremental run.
+
+        Files that could not be moved are retried, and moved files that an
+        undo puts back unchanged are organized again.
+        """
+        if self.scan_state is not None:
+            self.scan_state.forget(entry.path for entry in entries)
+
+    def _log_dry_run(self, plan: MovePlan):
+        """Print and log the moves of a plan without applying them."""
+        reporter = self.logger.reporter
+        for move in plan.moves:
+            if reporter.verbose:
+                name = os.path.basename(move.source)
+                relative = os.path.relpath(move.destination, self.source_dir)
+                reporter.detail(f"[DRY RUN] Moving {name} -> {relative}")
+            self.logger.log_operation(
+                "move",
+                move.source,
+                move.destination,
+                status="dry_run",
+                details=f"Organized to {move.category}",
+            )
+
+    def _print_moves(self, plan: MovePlan, stats: Dict[str, int]):
+        """Print the outcome of an applied plan."""
+        for category, count in plan.by_category().items():
+            self.logger.reporter.info(f"Moved {count} files to {category}")
+        if stats["errors"]:
+            self.logger.reporter.warning(f"{stats['errors']} files could not be moved")
+
+    def _mount_limits(self) -> MountLimits:
+        """Get the per-mount concurrency limits from the configuration."""
+        return MountLimits.from_settings(self.config.get_setting("io_concurrency"))
+
+    def _scan_options(self) -> Dict[str, Any]:
+        """Get the walk options for the source directory."""
+        return {
+            "max_depth": 0,
+            "exclude": self.config.get_setting("exclude", []),
+            "symlinks": self.config.get_setting("symlinks", "files"),
+        }
+
+    def _destination_for(
+        self, entry: FileEntry, create_date_folders: bool
+    ) -> Tuple[str, Path]:
         """
-        Generate a unique filename if file already exists.
+        Get the category and destination path of a file, ignoring conflicts.
 
         Args:
-            file_path: Original file path
+            entry: File to organize
+            create_date_folders: Whether to create date-based subdirectories
 
         Returns:
-            Unique file path
+            Tuple of (category, destination path)
         """
-        base = file_path.stem
-        extension = file_path.suffix
-        parent = file_path.parent
-        counter = 1
+        file_path = Path(entry.path)
 
-        while True:
-            new_name = f"{base}_{counter}{extension}"
-            new_path = parent / new_name
-            if not new_path.exists():
-                return new_path
-            counter += 1
+        # Get category for file
+        category = self.config.get_category_for_file(entry, self.content_types)
+
+        dest_dir = self.source_dir / category
+
+        if create_date_folders:
+            # Get file modification date
+            mod_time = datetime.fromtimestamp(entry.mtime_ns / 1e9)
+            date_folder = mod_time.strftime("%Y-%m")
+            dest_dir = dest_dir / date_folder
+
+        return category, dest_dir / file_path.name
 
     def undo_last_session(self):
         """
         Undo the last organization session.
 
+        Moves are reversed, and duplicates replaced with links become
+        independent copies again.
+
         Note: This requires the log file to be present.
         """
+        reporter = self.logger.reporter
         if not os.path.exists(self.logger.log_file):
-            print("No log file found. Cannot undo.")
+            reporter.warning("No log file found. Cannot undo.")
             return
 
-        with open(self.logger.log_file, "r", encoding="utf-8") as f:
-            logs = json.load(f)
+        last_session = read_last_session(self.logger.log_file)
 
-        if not logs:
-            print("No operations to undo.")
+        if not last_session:
+            reporter.warning("No operations to undo.")
             return
 
-        last_session = logs[-1]
         operations = last_session.get("operations", [])
 
-        print(f"\nUndoing {len(operations)} operations from last session...")
+        reporter.info(f"\nUndoing {len(operations)} operations from last session...")
 
         for op in reversed(operations):
             if op["type"] == "move" and op["status"] == "success":
@@ -164,6 +401,12 @@ class FileOrganizer:
 
                 if src.exists():
                     shutil.move(str(src), str(dst))
-                    print(f"Restored: {src.name} -> {dst}")
+                    reporter.detail(f"Restored: {src.name} -> {dst}")
+            elif op["type"] == "link_duplicate" and op["status"] == "success":
+                path = Path(op["source"])
+
+                if path.exists():
+                    break_link(path)
+                    reporter.detail(f"Unlinked: {path} ({op['mode']} removed)")
 
-        print("\nUndo completed!")
+        reporter.info("\nUndo completed!")
@@ -0,0 +1,241 @@
+"""
+Persistent cache of file content hashes.
+"""
+
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import profiling
+
+# (device, inode, size, mtime_ns) of a file
+Identity = Tuple[int, int, int, int]
+
+
+def stat_identity(stat_result: os.stat_result) -> Identity:
+    """Get the cache identity of a file from its stat result."""
+    return (
+        stat_result.st_dev,
+        stat_result.st_ino,
+        stat_result.st_size,
+        stat_result.st_mtime_ns,
+    )
+
+
+class HashCache:
+    """Stores content hashes in SQLite, keyed by the stat identity of a file."""
+
+    DEFAULT_FILENAME = "organizer_hash_cache.db"
+    DEFAULT_MAX_ENTRIES = 1_000_000
+
+    # Pending writes are committed in batches of this size
+    COMMIT_EVERY = 500
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_FILENAME,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        """
+        Initialize hash cache.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_entries: Maximum number of entries kept after pruning
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._pending = 0
+        self._touched: Dict[Tuple[int, int, str], float] = {}
+
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (device, inode, kind)
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def path_for_log(log_file: str) -> str:
+        """
+        Get the default cache location, next to the given log file.
+
+        Args:
+            log_file: Path to the operation log
+
+        Returns:
+            Path to the cache database
+        """
+        log_dir = os.path.dirname(os.path.abspath(log_file))
+        return os.path.join(log_dir, HashCache.DEFAULT_FILENAME)
+
+    def get(self, identity: Identity, kind: str) -> Optional[str]:
+        """
+        Look up a cached hash.
+
+        An entry whose size or modification time no longer matches the
+        file is discarded.
+
+        Args:
+            identity: Current (device, inode, size, mtime_ns) of the file
+            kind: Hash kind (e.g. 'sha256' or an edge-hash variant)
+
+        Returns:
+            Cached digest or None if there is no valid entry
+        """
+        device, inode, current_size, current_mtime_ns = identity
+        key = (device, inode, kind)
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, digest FROM hashes "
+            "WHERE device = ? AND inode = ? AND kind = ?",
+            key,
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            profiling.count("hash_cache.misses")
+            return None
+
+        size, mtime_ns, digest = row
+        if size != current_size or mtime_ns != current_mtime_ns:
+            self._conn.execute(
+                "DELETE FROM hashes WHERE device = ? AND inode = ? AND kind = ?",
+                key,
+            )
+            self._mark_dirty()
+            self.misses += 1
+            profiling.count("hash_cache.misses")
+            return None
+
+        self._touched[key] = time.time()
+        self.hits += 1
+        profiling.count("hash_cache.hits")
+        return digest
+
+    def put(self, identity: Identity, kind: str, digest: str):
+        """
+        Store a hash for a file.
+
+        Args:
+            identity: (device, inode, size, mtime_ns) taken before hashing
+            kind: Hash kind
+            digest: Hexadecimal digest
+        """
+        device, inode, size, mtime_ns = identity
+        self._conn.execute(
+            "INSERT OR REPLACE INTO hashes "
+            "(device, inode, kind, size, mtime_ns, digest, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (device, inode, kind, size, mtime_ns, digest, time.time()),
+        )
+        self.stores += 1
+        self._mark_dirty()
+
+    def prune(self, max_entries: int = None) -> int:
+        """
+        Evict least recently used entries above the size cap.
+
+        Args:
+            max_entries: Size cap to enforce (default: the cache's own cap)
+
+        Returns:
+            Number of evicted entries
+        """
+        self.flush()
+        limit = self.max_entries if max_entries is None else max_entries
+        excess = self.count() - limit
+        if excess <= 0:
+            return 0
+
+        self._conn.execute(
+            "DELETE FROM hashes WHERE rowid IN "
+            "(SELECT rowid FROM hashes ORDER BY last_used ASC LIMIT ?)",
+            (excess,),
+        )
+        self._conn.commit()
+        self.evictions += excess
+        return excess
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        self._touched.clear()
+        self._conn.execute("DELETE FROM hashes")
+        self._conn.commit()
+        self._pending = 0
+
+    def count(self) -> int:
+        """Get the number of cached entries."""
+        return self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with stored entry counts and this session's counters
+        """
+        self.flush()
+        by_kind: List[Tuple[str, int]] = self._conn.execute(
+            "SELECT kind, COUNT(*) FROM hashes GROUP BY kind ORDER BY kind"
+        ).fetchall()
+        lookups = self.hits + self.misses
+
+        return {
+            "db_path": self.db_path,
+            "db_size_bytes": (
+                os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+            ),
+            "entries": self.count(),
+            "max_entries": self.max_entries,
+            "by_kind": dict(by_kind),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+    def flush(self):
+        """Write pending changes and last-used timestamps to disk."""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE hashes SET last_used = ? "
+                "WHERE device = ? AND inode = ? AND kind = ?",
+                [(used, *key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+        self._conn.commit()
+        self._pending = 0
+
+    def close(self):
+        """Flush, enforce the size cap and close the database."""
+        self.prune()
+        self._conn.close()
+
+    def _mark_dirty(self):
+        """Commit once enough writes have accumulated."""
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,358 @@
+"""
+File hashing primitives and a parallel hashing executor.
+"""
+
+import os
+import mmap
+import hashlib
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .async_io import MountLimits
+
+try:
+    import xxhash
+except ImportError:  # pragma: no cover - optional dependency
+    xxhash = None
+
+try:
+    import blake3
+except ImportError:  # pragma: no cover - optional dependency
+    blake3 = None
+
+BACKENDS = ("thread", "process")
+
+HASH_METHODS = ("auto", "mmap", "readinto", "read")
+
+KIB = 1024
+MIB = 1024 * KIB
+
+# Files at least this large are memory-mapped by the "auto" hash method
+MMAP_THRESHOLD = 16 * MIB
+
+DEFAULT_ALGORITHM = "sha256"
+
+# Hash constructors by name; optional ones are only listed when installed
+ALGORITHMS: Dict[str, Callable[[], Any]] = {
+    "sha256": hashlib.sha256,
+    "blake2b": hashlib.blake2b,
+}
+if xxhash is not None:
+    ALGORITHMS["xxh3_128"] = xxhash.xxh3_128
+    ALGORITHMS["xxh64"] = xxhash.xxh64
+if blake3 is not None:
+    ALGORITHMS["blake3"] = blake3.blake3
+
+
+def available_algorithms() -> List[str]:
+    """Get the names of the hash algorithms usable in this environment."""
+    return list(ALGORITHMS)
+
+
+def new_hasher(algorithm: str = DEFAULT_ALGORITHM) -> Any:
+    """
+    Create a hash object for an algorithm.
+
+    Args:
+        algorithm: Algorithm name (see available_algorithms)
+
+    Returns:
+        Object with hashlib-style update() and hexdigest() methods
+    """
+    try:
+        return ALGORITHMS[algorithm]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown or unavailable hash algorithm: {algorithm} "
+            f"(available: {', '.join(ALGORITHMS)})"
+        ) from None
+
+
+def adaptive_block_size(file_size: int) -> int:
+    """
+    Pick a read block size for a file.
+
+    Small files are read in one block; larger files use bigger blocks so
+    the per-call overhead stays negligible.
+
+    Args:
+        file_size: File size in bytes
+
+    Returns:
+        Block size in bytes
+    """
+    if file_size <= 64 * KIB:
+        return max(4 * KIB, file_size)
+    if file_size <= 16 * MIB:
+        return 256 * KIB
+    return 1 * MIB
+
+
+def hash_file(
+    path: str,
+    algorithm: str = DEFAULT_ALGORITHM,
+    block_size: int = None,
+    method: str = "auto",
+) -> Tuple[str, int]:
+    """
+    Calculate the content hash of a file.
+
+    Args:
+        path: Path to the file
+        algorithm: Hash algorithm name
+        block_size: Size of blocks to hash at a time (default: adaptive)
+        method: How the file is read:
+                - "auto": mmap for large files, readinto otherwise
+                - "mmap": map the file and hash slices of the mapping
+                - "readinto": read into one reused buffer
+                - "read": allocate a new block per read call
+
+    Returns:
+        Tuple of (hexadecimal hash string, number of bytes read)
+    """
+    if method not in HASH_METHODS:
+        raise ValueError(f"Unknown hash method: {method}")
+
+    hasher = new_hasher(algorithm)
+
+    with open(path, "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if block_size is None:
+            block_size = adaptive_block_size(file_size)
+
+        if method == "mmap" or (method == "auto" and file_size >= MMAP_THRESHOLD):
+            bytes_read = _hash_mmap(f, hasher, block_size)
+            if bytes_read is None:
+                # Not mappable (empty file, pipe, some network filesystems)
+                bytes_read = _hash_readinto(f, hasher, block_size)
+        elif method == "read":
+            bytes_read = _hash_read(f, hasher, block_size)
+        else:
+            bytes_read = _hash_readinto(f, hasher, block_size)
+
+    return hasher.hexdigest(), bytes_read
+
+
+def _hash_read(f: BinaryIO, hasher: Any, block_size: int) -> int:
+    """Hash a file with a new bytes object per read."""
+    bytes_read = 0
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        hasher.update(block)
+        bytes_read += len(block)
+    return bytes_read
+
+
+def _hash_readinto(f: BinaryIO, hasher: Any, block_size: int) -> int:
+    """Hash a file by reading into one reused buffer."""
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    bytes_read = 0
+    while True:
+        count = f.readinto(buffer)
+        if not count:
+            break
+        hasher.update(view[:count])
+        bytes_read += count
+    return bytes_read
+
+
+def _hash_mmap(f: BinaryIO, hasher: Any, block_size: int) -> Optional[int]:
+    """Hash a memory-mapped file, or return None if it cannot be mapped."""
+    try:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    with mapping:
+        size = len(mapping)
+        # The view must be released before the mapping is closed
+        with memoryview(mapping) as view:
+            for offset in range(0, size, block_size):
+                hasher.update(view[offset : offset + block_size])
+    return size
+
+
+def hash_file_edges(
+    path: str, edge_size: int, algorithm: str = DEFAULT_ALGORITHM
+) -> Tuple[str, int]:
+    """
+    Calculate the hash of the first and last bytes of a file.
+
+    Args:
+        path: Path to the file
+        edge_size: Number of bytes to read from each end
+        algorithm: Hash algorithm name
+
+    Returns:
+        Tuple of (hexadecimal hash string, number of bytes read)
+    """
+    hasher = new_hasher(algorithm)
+
+    with open(path, "rb") as f:
+        head = f.read(edge_size)
+        f.seek(-edge_size, os.SEEK_END)
+        tail = f.read(edge_size)
+
+    hasher.update(head)
+    hasher.update(tail)
+    return hasher.hexdigest(), len(head) + len(tail)
+
+
+_rotational_cache: Dict[int, bool] = {}
+
+
+def is_rotational(device: int) -> bool:
+    """
+    Check whether a device is a spinning disk.
+
+    Only Linux exposes this (through sysfs); elsewhere, and for devices
+    without a block device entry such as network mounts, False is returned.
+
+    Args:
+        device: Device number (st_dev)
+
+    Returns:
+        True if the device reports itself as rotational
+    """
+    if device in _rotational_cache:
+        return _rotational_cache[device]
+
+    rotational = False
+    if not hasattr(os, "major"):
+        _rotational_cache[device] = rotational
+        return rotational
+
+    block_dir = f"/sys/dev/block/{os.major(device)}:{os.minor(device)}"
+    # Partitions keep the queue settings on their parent disk
+    for candidate in ("queue/rotational", "../queue/rotational"):
+        try:
+            with open(os.path.join(block_dir, candidate), "r") as f:
+                rotational = f.read().strip() == "1"
+            break
+        except OSError:
+            continue
+
+    _rotational_cache[device] = rotational
+    return rotational
+
+
+class HashExecutor:
+    """Runs hashing jobs concurrently, bounding the jobs in flight per device."""
+
+    def __init__(
+        self,
+        workers: int = 1,
+        backend: str = "thread",
+        rotational_workers: int = 1,
+        mount_limits: MountLimits = None,
+    ):
+        """
+        Initialize hashing executor.
+
+        Args:
+            workers: Maximum number of concurrent jobs
+            backend: 'thread' or 'process'
+            rotational_workers: Maximum concurrent jobs on one spinning disk
+            mount_limits: Maximum concurrent jobs per mount
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        if workers < 1:
+            raise ValueError(f"Worker count must be at least 1: {workers}")
+
+        self.workers = workers
+        self.backend = backend
+        self.rotational_workers = max(1, rotational_workers)
+        self.mount_limits = mount_limits
+
+    def device_limit(self, device: Optional[int]) -> int:
+        """Get the maximum number of concurrent jobs for a device."""
+        limit = self.workers
+        if self.mount_limits is not None:
+            limit = min(limit, self.mount_limits.device_limit(device))
+        if device is not None and is_rotational(device):
+            limit = min(limit, self.rotational_workers)
+        return limit
+
+    def map(
+        self,
+        func: Callable,
+        jobs: Sequence[Tuple[Any, ...]],
+        devices: Sequence[Optional[int]] = None,
+    ) -> List[Any]:
+        """
+        Run func over every job and collect the results in job order.
+
+        Args:
+            func: Module-level callable (must be picklable for 'process')
+            jobs: Argument tuples, one per call
+            devices: Device number of each job's file, used for throttling
+
+        Returns:
+            List aligned with jobs holding each return value, or the
+            exception raised by that call
+        """
+        if self.workers == 1 or len(jobs) < 2:
+            return [self._call(func, args) for args in jobs]
+
+        if devices is None:
+            devices = [None] * len(jobs)
+
+        queues: Dict[Optional[int], deque] = OrderedDict()
+        for index, device in enumerate(devices):
+            queues.setdefault(device, deque()).append(index)
+
+        results: List[Any] = [None] * len(jobs)
+        running: Dict[Optional[int], int] = defaultdict(int)
+        in_flight = {}
+
+        if self.backend == "thread":
+            pool_class = ThreadPoolExecutor
+        else:
+            pool_class = ProcessPoolExecutor
+
+        with pool_class(max_workers=self.workers) as pool:
+            while queues or in_flight:
+                # Hand out jobs round-robin across devices below their limit
+                for device in list(queues):
+                    queue = queues[device]
+                    limit = self.device_limit(device)
+                    while (
+                        queue
+                        and running[device] < limit
+                        and len(in_flight) < self.workers
+                    ):
+                        index = queue.popleft()
+                        future = pool.submit(func, *jobs[index])
+                        in_flight[future] = (index, device)
+                        running[device] += 1
+                    if not queue:
+                        del queues[device]
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, device = in_flight.pop(future)
+                    running[device] -= 1
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        results[index] = e
+
+        return results
+
+    @staticmethod
+    def _call(func: Callable, args: Tuple[Any, ...]) -> Any:
+        """Run one job inline, returning its exception instead of raising."""
+        try:
+            return func(*args)
+        except Exception as e:
+            return e
@@ -0,0 +1,745 @@
+"""
+Append-only JSON Lines operation journal.
+
+Each line is one record. A session is written as a ``session_start``
+header, one ``operation`` record per file operation, and one or more
+``session_end`` records carrying the session summary (the last one wins).
+
+Older parts of the journal can be rotated into compressed segments (see
+log_segments); the readers below span the segments and the active file.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from .log_segments import (
+    RetentionPolicy,
+    discover_segments,
+    load_manifest,
+    read_segment,
+    save_manifest,
+    segment_path,
+    write_segment,
+)
+
+RECORD_SESSION_START = "session_start"
+RECORD_OPERATION = "operation"
+RECORD_SESSION_END = "session_end"
+
+JOURNAL_VERSION = 2
+
+# Records are serialized with "record" as their first key, so the record
+# type can be recognized from the start of a line without parsing it
+_OPERATION_PREFIX = '{"record": "operation"'
+
+_READ_CHUNK = 64 * 1024
+
+
+def encode_record(record_type: str, **fields) -> str:
+    """
+    Serialize a journal record as one line.
+
+    Args:
+        record_type: One of the RECORD_* constants
+        **fields: Record contents
+
+    Returns:
+        JSON text terminated by a newline
+    """
+    record = {"record": record_type}
+    record.update(fields)
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def append_lines(path: str, lines: List[str]):
+    """
+    Append encoded records to a journal file.
+
+    A last line torn by a crash is terminated first, so that the new
+    records start on a line of their own instead of extending it.
+
+    Args:
+        path: Path to the journal file
+        lines: Records as returned by encode_record()
+    """
+    with open(path, "a+b") as f:
+        data = "".join(lines).encode("utf-8")
+        if f.seek(0, os.SEEK_END):
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+        f.flush()
+
+
+def is_legacy_log(path: str) -> bool:
+    """
+    Check whether a log file uses the old single-JSON-document format.
+
+    Args:
+        path: Path to the log file
+
+    Returns:
+        True for a JSON array (or object) spanning the whole file
+    """
+    if not os.path.exists(path):
+        return False
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("["):
+                return True
+            # A journal line is a complete object; an indented document
+            # starts with a bare brace
+            return line == "{"
+    return False
+
+
+def migrate_legacy_log(path: str, backup: bool = True) -> int:
+    """
+    Convert an old JSON log file to the journal format in place.
+
+    Args:
+        path: Path to the log file
+        backup: If True, keep the original as '<path>.bak'
+
+    Returns:
+        Number of migrated sessions
+    """
+    sessions = _load_legacy(path)
+
+    temp_path = path + ".migrating"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for number, session in enumerate(sessions, 1):
+            session_id = f"legacy-{number}"
+            f.writelines(_session_lines(session_id, session))
+
+    if backup:
+        shutil.copy2(path, path + ".bak")
+    os.replace(temp_path, path)
+    return len(sessions)
+
+
+def iter_sessions(
+    path: str,
+    include_operations: bool = True,
+    since: Union[datetime, str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Read sessions from oldest to newest.
+
+    Args:
+        path: Path to the log file (journal or legacy format)
+        include_operations: If False, operation lists are left empty
+        since: Only yield sessions started at or after this time; archived
+               segments holding only older sessions are not opened
+
+    Yields:
+        Session dictionaries shaped like OrganizerLogger.get_summary()
+    """
+    since = _as_timestamp(since)
+
+    if is_legacy_log(path):
+        for session in _load_legacy(path):
+            session = _legacy_session(session, include_operations)
+            if _started_since(session, since):
+                yield session
+        return
+
+    for segment in list_segments(path):
+        if since and segment["last_start"] and segment["last_start"] < since:
+            continue
+        lines = read_segment(_segment_file(path, segment))
+        for session in _sessions_forward(lines, include_operations):
+            if _started_since(session, since):
+                yield session
+
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for session in _sessions_forward(f, include_operations):
+                if _started_since(session, since):
+                    yield session
+
+
+def iter_sessions_reversed(
+    path: str,
+    include_operations: bool = True,
+    since: Union[datetime, str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Read sessions from newest to oldest, starting at the end of the file.
+
+    Only the tail of the journal holding the requested sessions is read,
+    so fetching the last session does not parse the whole history, and
+    archived segments are only opened once the active file is exhausted.
+
+    Args:
+        path: Path to the log file (journal or legacy format)
+        include_operations: If False, operation lists are left empty
+        since: Stop at the first session started before this time
+
+    Yields:
+        Session dictionaries shaped like OrganizerLogger.get_summary()
+    """
+    since = _as_timestamp(since)
+
+    if is_legacy_log(path):
+        for session in reversed(_load_legacy(path)):
+            session = _legacy_session(session, include_operations)
+            if not _started_since(session, since):
+                return
+            yield session
+        return
+
+    sources = []
+    if os.path.exists(path):
+        sources.append(lambda: _iter_lines_reversed(path))
+    for segment in reversed(list_segments(path)):
+        if since and segment["last_start"] and segment["last_start"] < since:
+            break
+        segment_file = _segment_file(path, segment)
+        sources.append(lambda f=segment_file: reversed(read_segment(f)))
+
+    for source in sources:
+        for session in _sessions_backward(source(), include_operations):
+            if not _started_since(session, since):
+                return
+            yield session
+
+
+def read_last_session(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the most recent session of a log file.
+
+    Args:
+        path: Path to the log file
+
+    Returns:
+        The last session with its operations, or None if there is none
+    """
+    return next(iter_sessions_reversed(path), None)
+
+
+def list_segments(path: str) -> List[Dict[str, Any]]:
+    """
+    Get the descriptions of a log's archived segments, oldest first.
+
+    The manifest is rebuilt from the segment files if it is missing.
+
+    Args:
+        path: Path to the active log file
+
+    Returns:
+        List of segment descriptions (file, number, compression, sessions,
+        operations, compacted, first_start, last_start, last_end, bytes)
+    """
+    segments = load_manifest(path)
+    if segments is not None:
+        return segments
+
+    segments = []
+    for number, segment_file in enumerate(discover_segments(path), 1):
+        compression = "zstd" if segment_file.endswith(".zst") else "gzip"
+        lines = read_segment(segment_file)
+        segments.append(_describe_segment(segment_file, number, compression, lines))
+    if segments:
+        save_manifest(path, segments)
+    return segments
+
+
+def needs_rotation(path: str, policy: RetentionPolicy) -> bool:
+    """
+    Check whether the active log has outgrown a retention policy.
+
+    Args:
+        path: Path to the active log file
+        policy: Retention policy
+
+    Returns:
+        True if the log is too large or its oldest session too old
+    """
+    if not os.path.exists(path):
+        return False
+    size = os.path.getsize(path)
+    if size == 0:
+        return False
+    if policy.max_bytes is not None and size >= policy.max_bytes:
+        return True
+
+    if policy.max_age_days is not None:
+        with open(path, "r", encoding="utf-8") as f:
+            first_line = f.readline()
+        header = _parse_record(first_line)
+        if header is not None and header["record"] == RECORD_SESSION_START:
+            started = header.get("session_start")
+            cutoff = datetime.now() - timedelta(days=policy.max_age_days)
+            return bool(started) and started < cutoff.isoformat()
+    return False
+
+
+def rotate(
+    path: str, policy: RetentionPolicy = None, force: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Move the active log into a new compressed segment.
+
+    Should only be called between sessions, so that no session spans a
+    segment boundary. Afterwards the policy's retention rules are applied.
+
+    Args:
+        path: Path to the active log file
+        policy: Retention policy (default: RetentionPolicy())
+        force: Rotate even if the policy does not require it
+
+    Returns:
+        Description of the new segment, or None if nothing was rotated
+    """
+    policy = policy or RetentionPolicy()
+    if not force and not needs_rotation(path, policy):
+        return None
+    if not os.path.exists(path):
+        return None
+    if is_legacy_log(path):
+        migrate_legacy_log(path)
+
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        return None
+
+    segments = list_segments(path)
+    number = segments[-1]["number"] + 1 if segments else 1
+    segment_file = segment_path(path, number, policy.compression)
+    write_segment(segment_file, lines, policy.compression)
+
+    segment = _describe_segment(segment_file, number, policy.compression, lines)
+    segments.append(segment)
+    save_manifest(path, segments)
+
+    # The lines are safely archived; start a fresh active file
+    open(path, "w", encoding="utf-8").close()
+
+    apply_retention(path, policy)
+    return segment
+
+
+def apply_retention(path: str, policy: RetentionPolicy) -> Dict[str, int]:
+    """
+    Delete surplus segments and compact old ones according to a policy.
+
+    Args:
+        path: Path to the active log file
+        policy: Retention policy
+
+    Returns:
+        Dictionary with the number of deleted segments and compaction stats
+    """
+    segments = list_segments(path)
+    deleted = 0
+
+    if policy.keep_segments is not None and len(segments) > policy.keep_segments:
+        excess = len(segments) - policy.keep_segments
+        for segment in segments[:excess]:
+            segment_file = _segment_file(path, segment)
+            if os.path.exists(segment_file):
+                os.remove(segment_file)
+            deleted += 1
+        save_manifest(path, segments[excess:])
+
+    stats = {"deleted_segments": deleted}
+    if policy.compact_after_days is not None:
+        cutoff = datetime.now() - timedelta(days=policy.compact_after_days)
+        stats.update(compact(path, cutoff))
+    return stats
+
+
+def compact(path: str, before: Union[datetime, str]) -> Dict[str, int]:
+    """
+    Collapse archived sessions to their summaries.
+
+    Sessions started before the cutoff keep only their header and their
+    by_type/by_status summary; their operation records are dropped, so
+    they can no longer be undone. The active log is left untouched.
+
+    Args:
+        path: Path to the active log file
+        before: Compact sessions started before this time
+
+    Returns:
+        Dictionary with segments, sessions and operations compacted and the
+        archive size before and after
+    """
+    before = _as_timestamp(before)
+    stats = {
+        "segments": 0,
+        "sessions": 0,
+        "operations_removed": 0,
+        "bytes_before": 0,
+        "bytes_after": 0,
+    }
+    segments = list_segments(path)
+    changed = False
+
+    for index, segment in enumerate(segments):
+        stats["bytes_before"] += segment["bytes"]
+        if (
+            segment["compacted"] == segment["sessions"]
+            or not segment["first_start"]
+            or segment["first_start"] >= before
+        ):
+            stats["bytes_after"] += segment["bytes"]
+            continue
+
+        segment_file = _segment_file(path, segment)
+        lines = []
+        compacted_sessions = 0
+        for session_lines in _group_sessions(read_segment(segment_file)):
+            session = next(_sessions_forward(session_lines, False))
+            started = session["session_start"]
+            if session["compacted"] or not started or started >= before:
+                lines.extend(session_lines)
+                continue
+            lines.extend(_session_lines(session["session_id"], session, True))
+            compacted_sessions += 1
+            stats["operations_removed"] += session["total_operations"]
+
+        if compacted_sessions:
+            write_segment(segment_file, lines, segment["compression"])
+            segment = _describe_segment(
+                segment_file, segment["number"], segment["compression"], lines
+            )
+            segments[index] = segment
+            stats["segments"] += 1
+            stats["sessions"] += compacted_sessions
+            changed = True
+        stats["bytes_after"] += segment["bytes"]
+
+    if changed:
+        save_manifest(path, segments)
+    return stats
+
+
+class _Session:
+    """A session being assembled from journal records."""
+
+    def __init__(self, session_id: str, include_operations: bool, backwards: bool):
+        self.session_id = session_id
+        self.include_operations = include_operations
+        self.backwards = backwards
+        self.started = False
+        self.session_start = None
+        self.footer: Optional[Dict[str, Any]] = None
+        self.counts = {"total_operations": 0, "by_type": {}, "by_status": {}}
+        self.operations: List[Dict[str, Any]] = []
+        # Without operations, their lines are kept unparsed until it is
+        # known whether a footer makes counting them unnecessary
+        self.raw_operations: List[str] = []
+
+    def add_footer(self, record: Dict[str, Any]):
+        """Keep the newest footer; read backwards, that is the first one."""
+        if self.footer is None or not self.backwards:
+            self.footer = record
+
+    def add_operation(self, record: Dict[str, Any]):
+        """Count an operation and keep it if operations were requested."""
+        record.pop("record", None)
+        record.pop("session_id", None)
+
+        counts = self.counts
+        op_type, status = record["type"], record["status"]
+        counts["total_operations"] += 1
+        counts["by_type"][op_type] = counts["by_type"].get(op_type, 0) + 1
+        counts["by_status"][status] = counts["by_status"].get(status, 0) + 1
+
+        if self.include_operations:
+            self.operations.append(record)
+
+    def finish(self) -> Dict[str, Any]:
+        """Build the public session dictionary."""
+        if self.backwards:
+            self.operations.reverse()
+
+        compacted = bool(self.footer and self.footer.get("compacted"))
+        if (self.include_operations and not compacted) or self.footer is None:
+            for line in self.raw_operations:
+                record = _parse_record(line)
+                if record is not None:
+                    self.add_operation(record)
+            counts = self.counts
+        else:
+            counts = self.footer
+
+        footer = self.footer or {}
+        return {
+            "session_id": self.session_id,
+            "session_start": self.session_start or footer.get("session_start"),
+            "session_end": footer.get("session_end"),
+            "total_operations": counts.get("total_operations", 0),
+            "by_type": counts.get("by_type", {}),
+            "by_status": counts.get("by_status", {}),
+            "operations": self.operations,
+            "compacted": compacted,
+        }
+
+
+def _sessions_forward(
+    lines: Iterable[str], include_operations: bool
+) -> Iterator[Dict[str, Any]]:
+    """Assemble sessions from journal lines in file order."""
+    open_sessions: Dict[str, _Session] = {}
+    for line in lines:
+        session = _read_line(line, open_sessions, include_operations, False)
+        if session is not None and session.started and len(open_sessions) > 1:
+            # Sessions are contiguous, so every earlier one is complete
+            for session_id in list(open_sessions):
+                if session_id != session.session_id:
+                    yield open_sessions.pop(session_id).finish()
+
+    for session in open_sessions.values():
+        yield session.finish()
+
+
+def _sessions_backward(
+    lines: Iterable[str], include_operations: bool
+) -> Iterator[Dict[str, Any]]:
+    """Assemble sessions from journal lines in reverse file order."""
+    open_sessions: Dict[str, _Session] = {}
+    for line in lines:
+        session = _read_line(line, open_sessions, include_operations, True)
+        if session is not None and session.started:
+            yield open_sessions.pop(session.session_id).finish()
+
+    # Sessions whose header was lost (e.g. a truncated file)
+    for session in open_sessions.values():
+        yield session.finish()
+
+
+def _group_sessions(lines: Iterable[str]) -> Iterator[List[str]]:
+    """Split journal lines into the contiguous lines of each session."""
+    current_id = None
+    group: List[str] = []
+    for line in lines:
+        if not line.strip():
+            continue
+        if line.startswith(_OPERATION_PREFIX):
+            session_id = _operation_session_id(line)
+        else:
+            record = _parse_record(line)
+            session_id = None if record is None else record["session_id"]
+        if session_id is None:
+            # A line torn by a crash
+            continue
+        if group and session_id != current_id:
+            yield group
+            group = []
+        current_id = session_id
+        group.append(line)
+    if group:
+        yield group
+
+
+def _describe_segment(
+    segment_file: str, number: int, compression: str, lines: List[str]
+) -> Dict[str, Any]:
+    """Build the manifest description of a segment."""
+    sessions = list(_sessions_forward(lines, False))
+    starts = [s["session_start"] for s in sessions if s["session_start"]]
+    ends = [s["session_end"] for s in sessions if s["session_end"]]
+    return {
+        "file": os.path.basename(segment_file),
+        "number": number,
+        "compression": compression,
+        "sessions": len(sessions),
+        "operations": sum(s["total_operations"] for s in sessions),
+        "compacted": sum(1 for s in sessions if s["compacted"]),
+        "first_start": min(starts) if starts else None,
+        "last_start": max(starts) if starts else None,
+        "last_end": max(ends) if ends else None,
+        "bytes": os.path.getsize(segment_file),
+    }
+
+
+def _segment_file(path: str, segment: Dict[str, Any]) -> str:
+    """Get the full path of a segment listed in the manifest."""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), segment["file"])
+
+
+def _as_timestamp(value: Union[datetime, str, None]) -> Optional[str]:
+    """Convert a time to the ISO format used in session records."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _started_since(session: Dict[str, Any], since: Optional[str]) -> bool:
+    """Check a session's start time against a lower bound."""
+    return (
+        not since or not session["session_start"] or (session["session_start"] >= since)
+    )
+
+
+def _read_line(
+    line: str,
+    open_sessions: Dict[str, _Session],
+    include_operations: bool,
+    backwards: bool,
+) -> Optional[_Session]:
+    """Fold one journal line into the session it belongs to."""
+    if not line.strip():
+        return None
+
+    if not include_operations and line.startswith(_OPERATION_PREFIX):
+        session_id = _operation_session_id(line)
+        if session_id is None:
+            return None
+        session = _get_session(open_sessions, session_id, False, backwards)
+        if session.footer is None or not backwards:
+            session.raw_operations.append(line)
+        return session
+
+    record = _parse_record(line)
+    if record is None:
+        return None
+    session = _get_session(
+        open_sessions, record["session_id"], include_operations, backwards
+    )
+    record_type = record["record"]
+
+    if record_type == RECORD_SESSION_START:
+        session.started = True
+        session.session_start = record.get("session_start")
+    elif record_type == RECORD_SESSION_END:
+        session.add_footer(record)
+    elif record_type == RECORD_OPERATION:
+        session.add_operation(record)
+    return session
+
+
+def _get_session(
+    open_sessions: Dict[str, _Session],
+    session_id: str,
+    include_operations: bool,
+    backwards: bool,
+) -> _Session:
+    """Get or create the session being assembled for an id."""
+    session = open_sessions.get(session_id)
+    if session is None:
+        session = _Session(session_id, include_operations, backwards)
+        open_sessions[session_id] = session
+    return session
+
+
+def _parse_record(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a journal line into a record.
+
+    Returns:
+        The record, or None for a line torn by a crash
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "record" not in record:
+        return None
+    record["session_id"] = record.get("session_id")
+    return record
+
+
+def _operation_session_id(line: str) -> Optional[str]:
+    """
+    Extract the session id from an operation line without parsing it.
+
+    Returns:
+        The session id, or None for a line torn by a crash
+    """
+    marker = ', "session_id": "'
+    start = len(_OPERATION_PREFIX)
+    if line.rstrip().endswith("}") and line.startswith(marker, start):
+        start += len(marker)
+        end = line.find('"', start)
+        if end != -1:
+            return line[start:end]
+    record = _parse_record(line)
+    return None if record is None else record["session_id"]
+
+
+def _session_lines(
+    session_id: str, session: Dict[str, Any], compacted: bool = False
+) -> List[str]:
+    """Encode a session dictionary as journal records."""
+    lines = [
+        encode_record(
+            RECORD_SESSION_START,
+            session_id=session_id,
+            session_start=session.get("session_start"),
+            version=JOURNAL_VERSION,
+        )
+    ]
+    for operation in session.get("operations", []):
+        lines.append(
+            encode_record(RECORD_OPERATION, session_id=session_id, **operation)
+        )
+    lines.append(
+        encode_record(
+            RECORD_SESSION_END,
+            session_id=session_id,
+            session_start=session.get("session_start"),
+            session_end=session.get("session_end"),
+            total_operations=session.get("total_operations", 0),
+            by_type=session.get("by_type", {}),
+            by_status=session.get("by_status", {}),
+            **({"compacted": True} if compacted else {}),
+        )
+    )
+    return lines
+
+
+def _load_legacy(path: str) -> List[Dict[str, Any]]:
+    """Load all sessions of an old-format log file."""
+    with open(path, "r", encoding="utf-8") as f:
+        logs = json.load(f)
+    return logs if isinstance(logs, list) else [logs]
+
+
+def _legacy_session(
+    session: Dict[str, Any], include_operations: bool
+) -> Dict[str, Any]:
+    """Normalize an old-format session dictionary."""
+    return {
+        "session_id": None,
+        "session_start": session.get("session_start"),
+        "session_end": session.get("session_end"),
+        "total_operations": session.get("total_operations", 0),
+        "by_type": session.get("by_type", {}),
+        "by_status": session.get("by_status", {}),
+        "operations": session.get("operations", []) if include_operations else [],
+        "compacted": False,
+    }
+
+
+def _iter_lines_reversed(path: str) -> Iterator[str]:
+    """Yield the lines of a text file from last to first."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+
+        while position > 0:
+            read_size = min(_READ_CHUNK, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b"\n")
+            # The first piece may be the tail of a line that starts earlier
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode("utf-8")
+
+        if remainder:
+            yield remainder.decode("utf-8")
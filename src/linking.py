@@ -0,0 +1,111 @@
+"""
+Replacing duplicate files with links to the copy that is kept.
+
+A hardlink makes the duplicate path another name of the kept file; a
+reflink (FICLONE, on btrfs, XFS and other copy-on-write filesystems) makes
+it a separate file sharing the kept file's data blocks until either is
+written. Either way the space is reclaimed and every path stays valid.
+
+The link is created under a temporary name next to the duplicate and then
+renamed over it, so the duplicate path always holds the complete content.
+"""
+
+import errno
+import os
+import shutil
+import uuid
+
+from . import profiling
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEDUP_MODES = ("delete", "hardlink", "reflink")
+
+# ioctl request cloning a whole file, from linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# Marks the temporary names, so leftovers of a crash are recognizable
+TEMP_PREFIX = ".dedup-"
+
+
+def _temp_path(path: str) -> str:
+    """Get an unused temporary name in the directory of a file."""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f"{TEMP_PREFIX}{uuid.uuid4().hex[:12]}-{name}")
+
+
+def reflink(source: str, destination: str):
+    """
+    Create destination as a copy-on-write clone of source.
+
+    Raises:
+        OSError: If the platform or filesystem does not support reflinks
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are not supported here")
+    with open(source, "rb") as src, open(destination, "xb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(destination)
+            raise
+
+
+def replace_with_link(keep: str, duplicate: str, mode: str):
+    """
+    Atomically replace a duplicate with a link to the kept file.
+
+    Args:
+        keep: File that is kept
+        duplicate: File with the same content, replaced by the link
+        mode: 'hardlink' or 'reflink'
+
+    Raises:
+        ValueError: If the mode is not a link mode
+        OSError: If the link cannot be created (e.g. the files are on
+                 different filesystems); the duplicate is left untouched
+    """
+    if mode not in ("hardlink", "reflink"):
+        raise ValueError(f"Not a link mode: {mode}")
+    keep, duplicate = os.fspath(keep), os.fspath(duplicate)
+    temp = _temp_path(duplicate)
+    with profiling.span("link"):
+        if mode == "hardlink":
+            profiling.count("calls.link")
+            os.link(keep, temp)
+        else:
+            profiling.count("calls.clone")
+            reflink(keep, temp)
+        try:
+            if mode == "reflink":
+                # A clone is a file of its own: give it the duplicate's metadata
+                shutil.copystat(duplicate, temp)
+            profiling.count("calls.rename")
+            os.replace(temp, duplicate)
+        except OSError:
+            os.remove(temp)
+            raise
+
+
+def break_link(path: str):
+    """
+    Atomically turn a linked file back into an independent copy.
+
+    Args:
+        path: File created by replace_with_link()
+    """
+    path = os.fspath(path)
+    temp = _temp_path(path)
+    with profiling.span("copy"):
+        profiling.count("calls.copy")
+        shutil.copy2(path, temp)
+        try:
+            profiling.count("calls.rename")
+            os.replace(temp, path)
+        except OSError:
+            os.remove(temp)
+            raise
@@ -0,0 +1,187 @@
+"""
+Compressed archive segments of the operation journal.
+
+When the active log is rotated its lines are moved into a numbered,
+compressed segment next to it ('organizer_log.json.000001.gz'). A small
+JSON manifest ('organizer_log.json.segments.json') describes every segment
+so readers can pick the segments a query needs without opening the rest.
+"""
+
+import gzip
+import json
+import os
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIONS = ("gzip", "zstd")
+
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+MANIFEST_SUFFIX = ".segments.json"
+MANIFEST_VERSION = 1
+
+
+class RetentionPolicy(NamedTuple):
+    """When the active log is rotated and how long archives are kept."""
+
+    # Rotate once the active log reaches this size (None = never)
+    max_bytes: Optional[int] = 10 * 1024 * 1024
+    # Rotate once the oldest session in the active log is this old
+    max_age_days: Optional[float] = 30
+    # Compression of archived segments, one of COMPRESSIONS
+    compression: str = "gzip"
+    # Delete the oldest segments beyond this count (None = keep all)
+    keep_segments: Optional[int] = None
+    # Collapse archived sessions older than this to their summaries
+    compact_after_days: Optional[float] = 90
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any] = None) -> "RetentionPolicy":
+        """
+        Build a policy from the 'log_retention' configuration setting.
+
+        Args:
+            settings: Setting dictionary; missing keys keep their defaults
+
+        Returns:
+            RetentionPolicy instance
+        """
+        settings = dict(settings or {})
+        unknown = set(settings) - set(cls._fields)
+        if unknown:
+            raise ValueError(
+                f"Unknown log_retention settings: {', '.join(sorted(unknown))}"
+            )
+
+        policy = cls(**settings)
+        if policy.compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown log compression: {policy.compression}")
+        if policy.compression == "zstd" and zstandard is None:
+            raise ValueError("zstd log compression requires the zstandard package")
+        return policy
+
+
+def available_compressions() -> List[str]:
+    """Get the segment compressions usable in this environment."""
+    return [c for c in COMPRESSIONS if c != "zstd" or zstandard is not None]
+
+
+def manifest_path(log_path: str) -> str:
+    """Get the manifest location for a log file."""
+    return log_path + MANIFEST_SUFFIX
+
+
+def segment_path(log_path: str, number: int, compression: str) -> str:
+    """Get the file name of a numbered segment."""
+    return f"{log_path}.{number:06d}{_SUFFIXES[compression]}"
+
+
+def discover_segments(log_path: str) -> List[str]:
+    """
+    Find the segment files of a log on disk, oldest first.
+
+    Args:
+        log_path: Path to the active log file
+
+    Returns:
+        Segment paths sorted by segment number
+    """
+    directory = os.path.dirname(os.path.abspath(log_path))
+    base = os.path.basename(log_path)
+    pattern = re.compile(re.escape(base) + r"\.(\d{6})(\.gz|\.zst)$")
+
+    found = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, name)))
+    return [path for _, path in sorted(found)]
+
+
+def read_segment(path: str) -> List[str]:
+    """
+    Read the lines of a compressed segment.
+
+    Args:
+        path: Segment file path
+
+    Returns:
+        Lines without their line terminators
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if path.endswith(_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise ValueError(f"Reading {path} requires the zstandard package")
+        data = zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    else:
+        data = gzip.decompress(data)
+    return data.decode("utf-8").splitlines()
+
+
+def write_segment(path: str, lines: List[str], compression: str):
+    """
+    Write lines to a compressed segment, replacing it atomically.
+
+    Args:
+        path: Segment file path
+        lines: Lines to store, with or without line terminators
+        compression: One of COMPRESSIONS
+    """
+    data = "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+    data = data.encode("utf-8")
+
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd log compression requires the zstandard package")
+        data = zstandard.ZstdCompressor().compress(data)
+    else:
+        data = gzip.compress(data)
+
+    _write_atomic(path, data)
+
+
+def load_manifest(log_path: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Load the segment descriptions of a log.
+
+    Args:
+        log_path: Path to the active log file
+
+    Returns:
+        Segment descriptions oldest first, or None if there is no manifest
+    """
+    path = manifest_path(log_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["segments"]
+
+
+def save_manifest(log_path: str, segments: List[Dict[str, Any]]):
+    """
+    Write the segment descriptions of a log atomically.
+
+    Args:
+        log_path: Path to the active log file
+        segments: Segment descriptions oldest first
+    """
+    document = {"version": MANIFEST_VERSION, "segments": segments}
+    data = json.dumps(document, indent=2, ensure_ascii=False).encode("utf-8")
+    _write_atomic(manifest_path(log_path), data)
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write a file through a temporary file and a rename."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
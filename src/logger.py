@@ -2,26 +2,64 @@
 Logger module for tracking file operations.
 """
 
-import json
-import os
+import uuid
 from datetime import datetime
 from typing import Dict, List, Any
-from pathlib import Path
+
+from . import journal, metrics, profiling
+from .log_segments import RetentionPolicy
+from .reporter import Reporter, default as default_reporter
 
 
 class OrganizerLogger:
-    """Logs all file operations to a JSON file."""
+    """
+    Logs all file operations to an append-only JSON Lines journal.
+
+    Operations are kept in memory only until they are appended to the
+    journal: 'operations' holds the ones not yet flushed, and the session's
+    counts are kept as running totals. read_operations() reads the whole
+    session back from the journal.
+    """
+
+    # Buffered operation records are appended to the journal in batches
+    FLUSH_EVERY = 100
 
-    def __init__(self, log_file: str = "organizer_log.json"):
+    def __init__(
+        self,
+        log_file: str = "organizer_log.json",
+        retention: RetentionPolicy = None,
+        reporter: Reporter = None,
+    ):
         """
         Initialize logger.
 
         Args:
             log_file: Path to the log file
+            retention: When to rotate and compact the log (default policy
+                       if None)
+            reporter: Console output of the components using this logger
+                      (default: reporter.default())
+
+        Attributes 'operations' (the operations not yet flushed, cleared on
+        every flush), 'total_operations', 'by_type' and 'by_status' (running
+        counts of the session) are public.
         """
         self.log_file = log_file
-        self.operations = []
+        self.retention = retention or RetentionPolicy()
+        self.reporter = reporter or default_reporter()
+        # Operations not yet appended to the journal; the journal keeps the rest
+        self.operations: List[Dict[str, Any]] = []
+        self._pending: List[str] = []
+        self._start_session()
+
+    def _start_session(self):
+        """Start a new, empty session."""
+        self.total_operations = 0
+        self.by_type: Dict[str, int] = {}
+        self.by_status: Dict[str, int] = {}
         self.session_start = datetime.now().isoformat()
+        self.session_id = uuid.uuid4().hex
+        self._header_written = False
 
     def log_operation(
         self,
@@ -30,6 +68,7 @@ class OrganizerLogger:
         destination: str = None,
         status: str = "success",
         details: str = None,
+        extra: Dict[str, Any] = None,
     ):
         """
         Log a file operation.
@@ -40,6 +79,7 @@ class OrganizerLogger:
             destination: Destination path (if applicable)
             status: Operation status (success, error, skipped)
             details: Additional details or error message
+            extra: Additional fields stored with the operation
         """
         operation = {
             "timestamp": datetime.now().isoformat(),
@@ -49,73 +89,139 @@ class OrganizerLogger:
             "status": status,
             "details": details,
         }
+        if extra:
+            operation.update(extra)
         self.operations.append(operation)
+        self.total_operations += 1
+        self.by_type[operation_type] = self.by_type.get(operation_type, 0) + 1
+        self.by_status[status] = self.by_status.get(status, 0) + 1
+        metrics.record_operation(operation_type, status)
+
+        self._pending.append(
+            journal.encode_record(
+                journal.RECORD_OPERATION, session_id=self.session_id, **operation
+            )
+        )
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self.flush()
 
     def get_summary(self) -> Dict[str, Any]:
         """
-        Get summary of all operations.
+        Get summary of all operations of the session.
+
+        The operations themselves are not included; they are in the journal
+        once flushed (see read_operations()).
 
         Returns:
-            Dictionary with operation statistics
+            Dictionary with the session start and end and the operation
+            counts in total, by type and by status
         """
-        summary = {
+        return {
             "session_start": self.session_start,
             "session_end": datetime.now().isoformat(),
-            "total_operations": len(self.operations),
-            "by_type": {},
-            "by_status": {},
-            "operations": self.operations,
+            "total_operations": self.total_operations,
+            "by_type": dict(self.by_type),
+            "by_status": dict(self.by_status),
         }
 
-        for op in self.operations:
-            op_type = op["type"]
-            status = op["status"]
+    def read_operations(self) -> List[Dict[str, Any]]:
+        """
+        Get every operation of the session, reading it back from the journal.
 
-            summary["by_type"][op_type] = summary["by_type"].get(op_type, 0) + 1
-            summary["by_status"][status] = summary["by_status"].get(status, 0) + 1
+        Buffered operations are flushed first.
 
-        return summary
+        Returns:
+            Operation dictionaries in the order they were logged
+        """
+        self.flush()
+        if not self._header_written:
+            return []
+        for session in journal.iter_sessions_reversed(self.log_file):
+            if session["session_id"] == self.session_id:
+                return session["operations"]
+        return []
+
+    def flush(self):
+        """Append buffered operation records to the journal."""
+        if not self._pending:
+            return
+
+        with profiling.span("log_flush"):
+            self._flush()
+
+    def _flush(self, summarize: bool = False):
+        """
+        Write the buffered records, starting the session if needed.
 
-    def save(self):
-        """Save log to file."""
-        summary = self.get_summary()
+        Args:
+            summarize: Also record the session summary
+        """
+        if not self._header_written:
+            if journal.is_legacy_log(self.log_file):
+                journal.migrate_legacy_log(self.log_file)
+            # Rotate between sessions so a session never spans segments
+            journal.rotate(self.log_file, self.retention)
+            self._pending.insert(
+                0,
+                journal.encode_record(
+                    journal.RECORD_SESSION_START,
+                    session_id=self.session_id,
+                    session_start=self.session_start,
+                    version=journal.JOURNAL_VERSION,
+                ),
+            )
+            self._header_written = True
+
+        if summarize:
+            self._pending.append(
+                journal.encode_record(
+                    journal.RECORD_SESSION_END,
+                    session_id=self.session_id,
+                    **self.get_summary(),
+                )
+            )
+        journal.append_lines(self.log_file, self._pending)
+        self._pending = []
+        self.operations = []
 
-        # Load existing logs if file exists
-        existing_logs = []
-        if os.path.exists(self.log_file):
-            try:
-                with open(self.log_file, "r", encoding="utf-8") as f:
-                    existing_logs = json.load(f)
-                    if not isinstance(existing_logs, list):
-                        existing_logs = [existing_logs]
-            except json.JSONDecodeError:
-                existing_logs = []
+    def save(self, rotate: bool = False):
+        """
+        Flush the session to the journal and record its summary.
 
-        # Append new session
-        existing_logs.append(summary)
+        Saving more than once appends a newer summary for the same session.
 
-        # Save to file
-        with open(self.log_file, "w", encoding="utf-8") as f:
-            json.dump(existing_logs, f, indent=2, ensure_ascii=False)
+        Args:
+            rotate: If the log outgrew the retention policy, end the session,
+                    rotate the log and continue in a new session. Only for
+                    long-running callers between units of work (the watcher
+                    between micro-batches); a run's session is never split.
+        """
+        with profiling.span("log_save"):
+            self._flush(summarize=True)
+            if rotate and journal.needs_rotation(self.log_file, self.retention):
+                journal.rotate(self.log_file, self.retention)
+                self._start_session()
 
     def print_summary(self):
         """Print a human-readable summary to console."""
         summary = self.get_summary()
 
-        print("\n" + "=" * 50)
-        print("ORGANIZATION SUMMARY")
-        print("=" * 50)
-        print(f"Session: {summary['session_start']} - {summary['session_end']}")
-        print(f"Total operations: {summary['total_operations']}")
+        info = self.reporter.info
+
+        info("\n" + "=" * 50)
+        info("ORGANIZATION SUMMARY")
+        info("=" * 50)
+        info(f"Session: {summary['session_start']} - {summary['session_end']}")
+        info(f"Total operations: {summary['total_operations']}")
 
         if summary["by_type"]:
-            print("\nOperations by type:")
+            info("\nOperations by type:")
             for op_type, count in summary["by_type"].items():
-                print(f"  {op_type}: {count}")
+                info(f"  {op_type}: {count}")
 
         if summary["by_status"]:
-            print("\nOperations by status:")
+            info("\nOperations by status:")
             for status, count in summary["by_status"].items():
-                print(f"  {status}: {count}")
+                info(f"  {status}: {count}")
 
-        print("=" * 50 + "\n")
+        info("=" * 50 + "\n")
@@ -0,0 +1,533 @@
+"""
+Prometheus metrics for long-running organizer processes.
+
+A MetricsRegistry keeps counters, gauges and histograms in memory and
+renders them in the Prometheus text exposition format. Once enabled, the
+organizer metrics are fed by OrganizerLogger.log_operation (operations by
+type and status), by the profiling spans (latency histograms) and counters
+(files scanned and hashed, bytes read, file system calls, hash cache hits),
+and by the watcher (queue depth). Recording a sample is a dictionary update
+under a lock, cheap enough to leave on permanently.
+
+The registry is exposed by MetricsServer on a local HTTP /metrics endpoint,
+or written by write_textfile() for the node_exporter textfile collector.
+"""
+
+import bisect
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import profiling
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PREFIX = "organizer_"
+
+# Upper bounds in seconds, from a cached stat to a copy across devices
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    60.0,
+)
+
+_active: Optional["OrganizerMetrics"] = None
+_textfile: Optional[str] = None
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value for the text format."""
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Format a label set, e.g. '{type="move",status="success"}'."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric(ABC):
+    """Base class of the metric types."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize metric.
+
+        Args:
+            name: Metric name, e.g. 'organizer_operations_total'
+            documentation: Help text
+            labelnames: Names of the labels told apart by this metric
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _check(self, labels: Tuple[str, ...]):
+        """Reject label values that do not match the label names."""
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {labels}"
+            )
+
+    def render(self) -> List[str]:
+        """Get the HELP and TYPE lines followed by the samples."""
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples(),
+        ]
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Get the sample lines of the metric, one per label set or bucket."""
+
+
+class Counter(_Metric):
+    """Value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, labels: Tuple[str, ...] = ()):
+        """
+        Add to the counter.
+
+        Args:
+            amount: Non-negative value to add
+            labels: Label values, in the order of the label names
+        """
+        if amount < 0:
+            raise ValueError(f"Counters cannot decrease: {amount}")
+        with self._lock:
+            value = self._values.get(labels)
+            if value is None:
+                self._check(labels)
+                value = 0
+            self._values[labels] = value + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        """Get the current value for a label set."""
+        return self._values.get(labels, 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, labels: Tuple[str, ...] = ()):
+        """Add to the gauge; amount may be negative."""
+        with self._lock:
+            self._check(labels)
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, labels: Tuple[str, ...] = ()):
+        """Set the gauge."""
+        with self._lock:
+            self._check(labels)
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        Initialize histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels told apart by this metric
+            buckets: Increasing upper bounds; +Inf is added automatically
+        """
+        super().__init__(name, documentation, labelnames)
+        bounds = [float(bound) for bound in buckets if bound != math.inf]
+        if not bounds or bounds != sorted(set(bounds)):
+            raise ValueError(f"Buckets must be increasing: {buckets}")
+        self.buckets = tuple(bounds)
+        # labels -> [count per bucket (not cumulative) and +Inf, sum]
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        """
+        Add an observation.
+
+        Args:
+            value: Observed value, e.g. a duration in seconds
+            labels: Label values, in the order of the label names
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                self._check(labels)
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        """Get the number of observations for a label set."""
+        state = self._values.get(labels)
+        return sum(state[0]) if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(
+                (labels, (list(counts), total))
+                for labels, (counts, total) in self._values.items()
+            )
+
+        lines = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} "
+                    f"{cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Get a registered metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text, ending with a newline
+        """
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def _register(self, cls, name: str, documentation: str, labelnames, *args):
+        """Create a metric, or return the existing one of the same type."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(
+                    name, documentation, labelnames, *args
+                )
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered differently")
+            return metric
+
+
+class OrganizerMetrics:
+    """The metrics of the organizer, fed by the logger, profiling and watcher."""
+
+    def __init__(self, registry: MetricsRegistry = None):
+        """
+        Initialize organizer metrics.
+
+        Args:
+            registry: Registry to add the metrics to (default: a new one)
+        """
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.operations = r.counter(
+            PREFIX + "operations_total",
+            "Logged file operations by type and status.",
+            ("type", "status"),
+        )
+        self.span_seconds = r.histogram(
+            PREFIX + "span_duration_seconds",
+            "Duration of instrumented phases and per-file calls.",
+            ("span",),
+        )
+        self.files_scanned = r.counter(
+            PREFIX + "files_scanned_total", "Files listed by directory scans."
+        )
+        self.files_hashed = r.counter(
+            PREFIX + "files_hashed_total", "Files read for hashing."
+        )
+        self.bytes_read = r.counter(
+            PREFIX + "bytes_read_total", "Bytes read for hashing."
+        )
+        self.fs_calls = r.counter(
+            PREFIX + "fs_calls_total", "File system calls by kind.", ("call",)
+        )
+        self.cache_lookups = r.counter(
+            PREFIX + "hash_cache_lookups_total",
+            "Hash cache lookups by result.",
+            ("result",),
+        )
+        self.queue_depth = r.gauge(
+            PREFIX + "watch_pending_files",
+            "Files seen by the watcher and waiting to settle.",
+        )
+        self.last_operation = r.gauge(
+            PREFIX + "last_operation_timestamp_seconds",
+            "Unix time of the most recently logged operation.",
+        )
+        r.gauge(
+            PREFIX + "start_time_seconds", "Unix time the metrics were enabled."
+        ).set(round(time.time(), 3))
+
+        # profiling counter name -> (counter, label values)
+        self._counters: Dict[str, Tuple[Counter, Tuple[str, ...]]] = {
+            "files_scanned": (self.files_scanned, ()),
+            "files_hashed": (self.files_hashed, ()),
+            "bytes_read": (self.bytes_read, ()),
+            "hash_cache.hits": (self.cache_lookups, ("hit",)),
+            "hash_cache.misses": (self.cache_lookups, ("miss",)),
+        }
+
+    def record_operation(self, operation_type: str, status: str):
+        """Count one logged operation."""
+        self.operations.inc(1, (operation_type, status))
+        self.last_operation.set(round(time.time(), 3))
+
+    def observe_span(self, name: str, duration_ns: int):
+        """Add a finished profiling span to the latency histogram."""
+        self.span_seconds.observe(duration_ns / 1e9, (name,))
+
+    def observe_count(self, name: str, amount: int):
+        """Add a profiling counter increment to its metric."""
+        target = self._counters.get(name)
+        if target is None:
+            if not name.startswith(profiling.CALL_PREFIX):
+                return
+            target = (self.fs_calls, (name[len(profiling.CALL_PREFIX) :],))
+            self._counters[name] = target
+        counter, labels = target
+        counter.inc(amount, labels)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves the registry of the server at /metrics."""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the console
+        pass
+
+
+class MetricsServer:
+    """HTTP /metrics endpoint served from a background thread."""
+
+    def __init__(
+        self, registry: MetricsRegistry, port: int = 9464, host: str = "127.0.0.1"
+    ):
+        """
+        Initialize metrics server.
+
+        Args:
+            registry: Registry to serve
+            port: TCP port; 0 picks a free one
+            host: Address to listen on (default: local connections only)
+        """
+        self.registry = registry
+        self.host = host
+        self.requested_port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """Port the server listens on."""
+        if self._server is None:
+            return self.requested_port
+        return self._server.server_address[1]
+
+    def start(self) -> "MetricsServer":
+        """Start listening; requests are handled on daemon threads."""
+        if self._server is None:
+            self._server = ThreadingHTTPServer(
+                (self.host, self.requested_port), _Handler
+            )
+            self._server.daemon_threads = True
+            self._server.registry = self.registry
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="metrics", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def write_textfile(registry: MetricsRegistry, path: str):
+    """
+    Write the registry for the node_exporter textfile collector.
+
+    The file is replaced atomically, so the collector never reads a
+    partly written file.
+
+    Args:
+        registry: Registry to write
+        path: Output file, normally '<collector directory>/<name>.prom'
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(temp_path, path)
+
+
+def enable(registry: MetricsRegistry = None, textfile: str = None) -> OrganizerMetrics:
+    """
+    Start collecting the organizer metrics.
+
+    Args:
+        registry: Registry to add the metrics to (default: a new one)
+        textfile: File that publish() writes the metrics to, if any
+
+    Returns:
+        The new active OrganizerMetrics
+    """
+    global _active, _textfile
+    disable()
+    _active = OrganizerMetrics(registry)
+    _textfile = textfile
+    profiling.add_observer(_active)
+    return _active
+
+
+def disable() -> Optional[OrganizerMetrics]:
+    """
+    Stop collecting.
+
+    Returns:
+        The metrics that were active, or None
+    """
+    global _active, _textfile
+    metrics, _active = _active, None
+    _textfile = None
+    if metrics is not None:
+        profiling.remove_observer(metrics)
+    return metrics
+
+
+def active() -> Optional[OrganizerMetrics]:
+    """Get the active organizer metrics, if any."""
+    return _active
+
+
+def record_operation(operation_type: str, status: str):
+    """Count a logged operation, if metrics are enabled."""
+    metrics = _active
+    if metrics is not None:
+        metrics.record_operation(operation_type, status)
+
+
+def set_queue_depth(pending: int):
+    """Report the number of files waiting in the watcher, if metrics are enabled."""
+    metrics = _active
+    if metrics is not None:
+        metrics.queue_depth.set(pending)
+
+
+def publish():
+    """Write the active metrics to their textfile, if one was configured."""
+    metrics, path = _active, _textfile
+    if metrics is not None and path:
+        write_textfile(metrics.registry, path)
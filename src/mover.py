@@ -0,0 +1,645 @@
+"""
+Planned, crash-safe execution of file moves.
+
+A MovePlan is built before any file is touched. MoveExecutor then writes
+every planned move to a write-ahead intent log, creates each destination
+directory once and applies the moves: renames on the same filesystem,
+batched copy-then-delete across filesystems. If the process dies midway,
+the intent log is left behind and the run can be resumed or rolled back.
+"""
+
+import asyncio
+import errno
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from . import journal, profiling
+from .async_io import AsyncFileSystem
+from .logger import OrganizerLogger
+from .verification import FileComparer
+
+INTENT_SUFFIX = ".intent"
+
+# Suffix of a cross-device copy that has not been renamed into place yet
+PARTIAL_SUFFIX = ".partial"
+
+RECORD_PLAN = "plan"
+RECORD_INTENT = "intent"
+RECORD_DONE = "done"
+RECORD_ERROR = "error"
+
+
+def intent_path_for_log(log_file: str) -> str:
+    """Get the intent log location for an operation log."""
+    return log_file + INTENT_SUFFIX
+
+
+def has_pending(intent_path: str) -> bool:
+    """Check whether an interrupted run left an intent log behind."""
+    return os.path.exists(intent_path)
+
+
+class PlannedMove(NamedTuple):
+    """One file move decided during planning."""
+
+    source: str
+    destination: str
+    category: str
+    # Device of the source file, if known from the scan
+    device: Optional[int] = None
+    # Size of the source file in bytes, for progress reporting
+    size: int = 0
+
+
+class MovePlan:
+    """Ordered list of moves and the directories they need."""
+
+    def __init__(self):
+        """Initialize an empty plan."""
+        self.moves: List[PlannedMove] = []
+        self.directories: Dict[str, None] = {}
+        self.claimed = set()
+
+    def add(
+        self,
+        source: str,
+        destination: str,
+        category: str,
+        device: Optional[int] = None,
+        size: int = 0,
+    ):
+        """
+        Add a move to the plan.
+
+        Args:
+            source: Current path of the file
+            destination: Target path; must not be claimed by another move
+            category: Category the file is organized into
+            device: Device of the source file, if known
+            size: Size of the source file, if known
+        """
+        destination = os.fspath(destination)
+        if destination in self.claimed:
+            raise ValueError(f"Destination planned twice: {destination}")
+        self.claimed.add(destination)
+        self.directories[os.path.dirname(destination)] = None
+        self.moves.append(
+            PlannedMove(os.fspath(source), destination, category, device, size)
+        )
+
+    def is_claimed(self, destination: str) -> bool:
+        """Check whether a destination is already taken by a planned move."""
+        return os.fspath(destination) in self.claimed
+
+    def by_category(self) -> Dict[str, int]:
+        """Count the planned moves per category."""
+        counts: Dict[str, int] = {}
+        for move in self.moves:
+            counts[move.category] = counts.get(move.category, 0) + 1
+        return counts
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+
+class DestinationNames:
+    """
+    Assigns free file names in destination directories.
+
+    Each directory is listed once; afterwards conflicts are resolved from
+    the in-memory listing, so no existence check is needed per candidate
+    name. The last '<stem>_<n>' counter handed out per stem is kept, so
+    later conflicts on the same stem continue from it. Names on disk are
+    never parsed for counters: 'IMG_20240101' is a date, not a counter.
+    """
+
+    def __init__(self):
+        """Initialize with no directories loaded."""
+        self._names: Dict[str, set] = {}
+        self._counters: Dict[str, Dict[Tuple[str, str], int]] = {}
+
+    def allocate(self, directory: str, name: str) -> str:
+        """
+        Reserve a free name in a directory.
+
+        Args:
+            directory: Destination directory (need not exist yet)
+            name: Preferred file name
+
+        Returns:
+            Path of the reserved name: the preferred one if free, otherwise
+            '<stem>_<n><suffix>' with the lowest free n above the last one
+            handed out for the stem
+        """
+        directory = os.fspath(directory)
+        names = self._load(directory)
+        counters = self._counters[directory]
+
+        if os.path.normcase(name) not in names:
+            self._claim(directory, name)
+            return os.path.join(directory, name)
+
+        stem, suffix = os.path.splitext(name)
+        key = (os.path.normcase(stem), os.path.normcase(suffix))
+        counter = counters.get(key, 0) + 1
+        candidate = f"{stem}_{counter}{suffix}"
+        # Skip the names of earlier runs, once per stem
+        while os.path.normcase(candidate) in names:
+            counter += 1
+            candidate = f"{stem}_{counter}{suffix}"
+
+        counters[key] = counter
+        self._claim(directory, candidate)
+        return os.path.join(directory, candidate)
+
+    def preload(self, directory: str, listing: List[str]):
+        """
+        Supply the listing of a directory read elsewhere.
+
+        Args:
+            directory: Destination directory
+            listing: Names in the directory, as from list_directory()
+        """
+        directory = os.fspath(directory)
+        if directory not in self._names:
+            self._index(directory, listing)
+
+    @staticmethod
+    def list_directory(directory: str) -> List[str]:
+        """List the names in a directory; a missing directory is empty."""
+        try:
+            with os.scandir(directory) as iterator:
+                return [entry.name for entry in iterator]
+        except FileNotFoundError:
+            return []
+
+    def _load(self, directory: str) -> set:
+        """List a directory once and index its names."""
+        names = self._names.get(directory)
+        if names is not None:
+            return names
+        return self._index(directory, self.list_directory(directory))
+
+    def _index(self, directory: str, listing: List[str]) -> set:
+        """Index the names of a directory listing."""
+        names = set()
+        self._names[directory] = names
+        self._counters[directory] = {}
+        for name in listing:
+            self._claim(directory, name)
+        return names
+
+    def _claim(self, directory: str, name: str):
+        """Mark a name as taken."""
+        self._names[directory].add(os.path.normcase(name))
+
+
+class MoveExecutor:
+    """Applies a MovePlan with a write-ahead intent log."""
+
+    # Cross-device moves are copied in batches of this size before their
+    # sources are deleted
+    COPY_BATCH = 32
+
+    # Completion markers are appended to the intent log in batches
+    FLUSH_EVERY = 100
+
+    def __init__(self, intent_path: str, logger: OrganizerLogger = None):
+        """
+        Initialize move executor.
+
+        Args:
+            intent_path: Path of the write-ahead intent log
+            logger: Logger receiving one operation per move
+        """
+        self.intent_path = intent_path
+        self.logger = logger or OrganizerLogger()
+        self.stats = self.new_stats()
+        self._intent_file = None
+        self._done_lines: List[str] = []
+
+    def execute(self, plan: MovePlan) -> Dict[str, int]:
+        """
+        Apply a plan.
+
+        Args:
+            plan: Moves to apply
+
+        Returns:
+            Dictionary with renamed/copied/error counts and the number of
+            directories created
+        """
+        self.stats = self.new_stats()
+        if not plan.moves:
+            return self.stats
+
+        self._write_intents(plan)
+        self.logger.reporter.begin("Moving")
+        try:
+            self._apply(list(enumerate(plan.moves)), plan.directories)
+        finally:
+            self.logger.reporter.end()
+            self._close_intents()
+
+        # Every move has either succeeded or been logged as an error
+        os.remove(self.intent_path)
+        return self.stats
+
+    async def execute_async(
+        self, plan: MovePlan, fs: AsyncFileSystem
+    ) -> Dict[str, int]:
+        """
+        Apply a plan with the renames and copies running concurrently.
+
+        Logging and the intent log stay on the event loop's thread.
+
+        Args:
+            plan: Moves to apply
+            fs: Asynchronous file system access bounding calls per mount
+
+        Returns:
+            Dictionary with renamed/copied/error counts and the number of
+            directories created
+        """
+        self.stats = self.new_stats()
+        if not plan.moves:
+            return self.stats
+
+        self._write_intents(plan)
+        self.logger.reporter.begin("Moving")
+        try:
+            directories = list(plan.directories)
+            devices = await asyncio.gather(
+                *(fs.run(None, self._make_directory, d) for d in directories)
+            )
+            self.stats["directories"] += len(directories)
+            directory_devices = dict(zip(directories, devices))
+
+            await asyncio.gather(
+                *(
+                    self._apply_one(index, move, directory_devices, fs)
+                    for index, move in enumerate(plan.moves)
+                )
+            )
+        finally:
+            self.logger.reporter.end()
+            self._close_intents()
+
+        os.remove(self.intent_path)
+        return self.stats
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """
+        Inspect the moves of an interrupted run.
+
+        Returns:
+            One dictionary per planned move with its index, source,
+            destination, category and state: 'done', 'failed', 'copied'
+            (the copy is complete but the source still exists), 'pending',
+            'conflict' (another file took the destination) or 'missing'
+        """
+        if not has_pending(self.intent_path):
+            return []
+
+        intents, finished = self._read_intents()
+        states = []
+        for index, move in intents.items():
+            state = finished.get(index) or self._inspect(move)
+            states.append({"index": index, "state": state, **move._asdict()})
+        return states
+
+    def resume(self) -> Dict[str, int]:
+        """
+        Finish the moves of an interrupted run.
+
+        Returns:
+            Execution statistics for the remaining moves
+        """
+        plan = MovePlan()
+        for item in self.pending():
+            if item["state"] == "copied":
+                # The copy is complete, only the source is left to delete
+                os.remove(item["source"])
+                self._log_move(item["source"], item["destination"], item["category"])
+            elif item["state"] == "pending":
+                self._remove_partial(item["destination"])
+                plan.add(item["source"], item["destination"], item["category"])
+            elif item["state"] in ("conflict", "missing"):
+                self.logger.log_operation(
+                    "move",
+                    item["source"],
+                    item["destination"],
+                    status="error",
+                    details=f"Cannot resume move ({item['state']})",
+                )
+
+        if plan.moves:
+            # Replaces the old intent log with one for the remaining moves
+            return self.execute(plan)
+
+        os.remove(self.intent_path)
+        return self.new_stats()
+
+    def rollback(self) -> int:
+        """
+        Move the files of an interrupted run back where they came from.
+
+        Returns:
+            Number of restored files
+        """
+        restored = 0
+        for item in reversed(self.pending()):
+            source, destination = item["source"], item["destination"]
+            self._remove_partial(destination)
+            if item["state"] == "done" and os.path.exists(destination):
+                if os.path.lexists(source):
+                    # Another file took the old name since; keep both
+                    self.logger.log_operation(
+                        "rollback",
+                        destination,
+                        source,
+                        status="error",
+                        details="Cannot restore: source path is taken",
+                    )
+                    continue
+                shutil.move(destination, source)
+                self.logger.log_operation(
+                    "rollback",
+                    destination,
+                    source,
+                    details=f"Restored from {item['category']}",
+                )
+                restored += 1
+            elif item["state"] == "copied":
+                os.remove(destination)
+
+        os.remove(self.intent_path)
+        return restored
+
+    def _apply(self, moves: List[tuple], directories: Dict[str, None]):
+        """Create the directories, then rename or copy every move."""
+        directory_devices = {}
+        for directory in directories:
+            directory_devices[directory] = self._make_directory(directory)
+            self.stats["directories"] += 1
+
+        copies = []
+        for index, move in moves:
+            try:
+                device = move.device
+                if device is None:
+                    device = os.stat(move.source).st_dev
+                target_device = directory_devices[os.path.dirname(move.destination)]
+
+                if device == target_device and self._rename(move):
+                    self._finish(index, move)
+                    self.stats["renamed"] += 1
+                    continue
+            except OSError as e:
+                self._fail(index, move, e)
+                continue
+
+            copies.append((index, move))
+            if len(copies) >= self.COPY_BATCH:
+                self._copy_batch(copies)
+                copies = []
+
+        if copies:
+            self._copy_batch(copies)
+
+    async def _apply_one(
+        self,
+        index: int,
+        move: PlannedMove,
+        directory_devices: Dict[str, int],
+        fs: AsyncFileSystem,
+    ):
+        """Rename one file, or copy and delete it across filesystems."""
+        device = move.device
+        try:
+            if device is None:
+                device = (await fs.run(None, os.stat, move.source)).st_dev
+            target_device = directory_devices[os.path.dirname(move.destination)]
+
+            if device == target_device and await fs.run(device, self._rename, move):
+                self._finish(index, move)
+                self.stats["renamed"] += 1
+                return
+        except OSError as e:
+            self._fail(index, move, e)
+            return
+
+        try:
+            await fs.run(device, self._copy_file, move)
+        except OSError as e:
+            self._remove_partial(move.destination)
+            self._fail(index, move, e)
+            return
+
+        profiling.count("calls.unlink")
+        try:
+            await fs.run(device, os.remove, move.source)
+        except OSError as e:
+            self._fail(index, move, e)
+            return
+        self._finish(index, move)
+        self.stats["copied"] += 1
+
+    @staticmethod
+    def _make_directory(directory: str) -> int:
+        """Create a destination directory and get its device."""
+        with profiling.span("mkdir"):
+            profiling.count("calls.mkdir")
+            profiling.count("calls.stat")
+            os.makedirs(directory, exist_ok=True)
+            return os.stat(directory).st_dev
+
+    def _rename(self, move: PlannedMove) -> bool:
+        """Rename a file into place; False if it is on another filesystem."""
+        self._check_free(move.destination)
+        profiling.count("calls.rename")
+        try:
+            with profiling.span("move"):
+                os.rename(move.source, move.destination)
+        except OSError as e:
+            if e.errno == errno.EXDEV:
+                return False
+            raise
+        return True
+
+    def _copy_batch(self, copies: List[tuple]):
+        """Copy a batch of files across filesystems, then delete the sources."""
+        copied = []
+        for index, move in copies:
+            try:
+                self._copy_file(move)
+                copied.append((index, move))
+            except OSError as e:
+                self._remove_partial(move.destination)
+                self._fail(index, move, e)
+
+        for index, move in copied:
+            profiling.count("calls.unlink")
+            try:
+                os.remove(move.source)
+            except OSError as e:
+                self._fail(index, move, e)
+                continue
+            self._finish(index, move)
+            self.stats["copied"] += 1
+
+    @staticmethod
+    def _copy_file(move: PlannedMove):
+        """Copy a file through a partial name, keeping the source."""
+        partial = move.destination + PARTIAL_SUFFIX
+        with profiling.span("copy"):
+            profiling.count("calls.copy")
+            profiling.count("calls.rename")
+            shutil.copy2(move.source, partial)
+            MoveExecutor._check_free(move.destination)
+            os.replace(partial, move.destination)
+
+    @staticmethod
+    def _check_free(destination: str):
+        """Refuse to replace a file that took a destination since planning."""
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, "Destination exists", destination)
+
+    def _finish(self, index: int, move: PlannedMove):
+        """Record a completed move."""
+        self._log_move(move.source, move.destination, move.category)
+        self._mark(RECORD_DONE, index)
+        self.logger.reporter.advance(1, move.size)
+
+    def _fail(self, index: int, move: PlannedMove, error: Exception):
+        """Record a move that could not be applied."""
+        self.logger.log_operation(
+            "move", move.source, status="error", details=str(error)
+        )
+        self.logger.reporter.warning(
+            f"Error organizing {os.path.basename(move.source)}: {error}"
+        )
+        self.stats["errors"] += 1
+        self._mark(RECORD_ERROR, index)
+
+    def _log_move(self, source: str, destination: str, category: str):
+        """Log a successful move."""
+        self.logger.log_operation(
+            "move",
+            source,
+            destination,
+            status="success",
+            details=f"Organized to {category}",
+        )
+
+    def _write_intents(self, plan: MovePlan):
+        """Write the plan durably before the first file is moved."""
+        lines = [
+            journal.encode_record(
+                RECORD_PLAN,
+                plan_id=uuid.uuid4().hex,
+                created=datetime.now().isoformat(),
+                moves=len(plan.moves),
+            )
+        ]
+        for index, move in enumerate(plan.moves):
+            lines.append(
+                journal.encode_record(
+                    RECORD_INTENT,
+                    index=index,
+                    source=move.source,
+                    destination=move.destination,
+                    category=move.category,
+                )
+            )
+
+        temp_path = self.intent_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.intent_path)
+
+        self._intent_file = open(self.intent_path, "a", encoding="utf-8")
+        self._done_lines = []
+
+    def _mark(self, record_type: str, index: int):
+        """Queue a completion marker for the intent log."""
+        self._done_lines.append(journal.encode_record(record_type, index=index))
+        if len(self._done_lines) >= self.FLUSH_EVERY:
+            self._flush_marks()
+
+    def _flush_marks(self):
+        """Append queued completion markers to the intent log."""
+        if self._intent_file is not None and self._done_lines:
+            self._intent_file.writelines(self._done_lines)
+            self._intent_file.flush()
+        self._done_lines = []
+
+    def _close_intents(self):
+        """Flush and close the intent log."""
+        self._flush_marks()
+        if self._intent_file is not None:
+            self._intent_file.close()
+            self._intent_file = None
+
+    def _read_intents(self):
+        """Load planned moves and the indexes already finished."""
+        intents: Dict[int, PlannedMove] = {}
+        finished: Dict[int, str] = {}
+        for record in self._iter_records():
+            record_type = record.get("record")
+            if record_type == RECORD_INTENT:
+                intents[record["index"]] = PlannedMove(
+                    record["source"], record["destination"], record["category"]
+                )
+            elif record_type == RECORD_DONE:
+                finished[record["index"]] = "done"
+            elif record_type == RECORD_ERROR:
+                finished[record["index"]] = "failed"
+        return intents, finished
+
+    def _iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Read the intent log, skipping a line torn by a crash."""
+        with open(self.intent_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    @staticmethod
+    def _inspect(move: PlannedMove) -> str:
+        """Work out from the filesystem how far a move got."""
+        source_exists = os.path.exists(move.source)
+        destination_exists = os.path.exists(move.destination)
+
+        if destination_exists and not source_exists:
+            return "done"
+        if destination_exists:
+            # Only a byte-for-byte copy makes deleting the source safe
+            try:
+                if FileComparer().same_content(move.source, move.destination):
+                    return "copied"
+            except OSError:
+                pass
+            return "conflict"
+        if source_exists:
+            return "pending"
+        return "missing"
+
+    @staticmethod
+    def _remove_partial(destination: str):
+        """Delete an unfinished cross-device copy."""
+        partial = destination + PARTIAL_SUFFIX
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    @staticmethod
+    def new_stats() -> Dict[str, int]:
+        """Get zeroed execution statistics."""
+        return {"renamed": 0, "copied": 0, "errors": 0, "directories": 0}
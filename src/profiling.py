@@ -0,0 +1,369 @@
+"""
+Lightweight timing spans and counters for the hot paths.
+
+Instrumented code calls span() and count() unconditionally. Until a
+Profiler is enabled or an observer is added both return immediately, so the
+instrumentation costs two global lookups per call. An enabled Profiler
+aggregates the time spent per span name and, if asked to, keeps every span
+as a trace event that can be written as a Chrome trace or a speedscope
+profile. Observers (such as the metrics registry) receive every finished
+span and counter increment as well.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Counters named 'calls.<name>' count file system calls made by the tool
+CALL_PREFIX = "calls."
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_active: Optional["Profiler"] = None
+
+# Objects with observe_span(name, duration_ns) and observe_count(name, amount)
+_observers: List[Any] = []
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    """Context manager timing one span for the profiler and observers."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: Optional["Profiler"], name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter_ns()
+        if self.profiler is not None:
+            self.profiler.record(self.name, self.start, end)
+        for observer in _observers:
+            observer.observe_span(self.name, end - self.start)
+
+
+class Profiler:
+    """Collects span timings and counters."""
+
+    def __init__(self, record_events: bool = False, max_events: int = 1000000):
+        """
+        Initialize profiler.
+
+        Args:
+            record_events: Keep every span for trace output, not only the
+                           per-name totals
+            max_events: Spans kept at most; later ones are only aggregated
+        """
+        self.record_events = record_events
+        self.max_events = max_events
+        self.started = time.perf_counter_ns()
+        self.stopped: Optional[int] = None
+        # name -> [calls, total ns, longest ns]
+        self.spans: Dict[str, List[int]] = {}
+        self.counters: Dict[str, int] = {}
+        # (name, start ns, end ns, thread id)
+        self.events: List[Tuple[str, int, int, int]] = []
+        self.dropped_events = 0
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: int, end: int):
+        """
+        Add a finished span.
+
+        Args:
+            name: Span name
+            start: Start time from time.perf_counter_ns()
+            end: End time from time.perf_counter_ns()
+        """
+        duration = end - start
+        with self._lock:
+            totals = self.spans.get(name)
+            if totals is None:
+                self.spans[name] = [1, duration, duration]
+            else:
+                totals[0] += 1
+                totals[1] += duration
+                if duration > totals[2]:
+                    totals[2] = duration
+
+            if self.record_events:
+                if len(self.events) < self.max_events:
+                    self.events.append((name, start, end, threading.get_ident()))
+                else:
+                    self.dropped_events += 1
+
+    def count(self, name: str, amount: int = 1):
+        """Add to a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stop(self):
+        """Stop the wall clock of the profile."""
+        if self.stopped is None:
+            self.stopped = time.perf_counter_ns()
+
+    @property
+    def elapsed_ns(self) -> int:
+        """Wall time covered by the profile."""
+        end = self.stopped if self.stopped is not None else time.perf_counter_ns()
+        return end - self.started
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the aggregated profile.
+
+        Returns:
+            Dictionary with the wall time, per-span totals, counters, the
+            number of file system calls and throughput figures
+        """
+        elapsed = self.elapsed_ns / 1e9
+        spans = {
+            name: {
+                "calls": calls,
+                "total_seconds": total / 1e9,
+                "max_seconds": longest / 1e9,
+            }
+            for name, (calls, total, longest) in sorted(
+                self.spans.items(), key=lambda item: -item[1][1]
+            )
+        }
+        counters = dict(sorted(self.counters.items()))
+        files = counters.get("files_scanned", 0)
+        bytes_read = counters.get("bytes_read", 0)
+        return {
+            "elapsed_seconds": elapsed,
+            "spans": spans,
+            "counters": counters,
+            "syscalls": sum(
+                value
+                for name, value in counters.items()
+                if name.startswith(CALL_PREFIX)
+            ),
+            "files_per_second": files / elapsed if elapsed else None,
+            "bytes_read_per_second": bytes_read / elapsed if elapsed else None,
+        }
+
+    def report(self) -> str:
+        """
+        Format the aggregated profile as a table.
+
+        Returns:
+            Multi-line breakdown of spans and counters
+        """
+        summary = self.summary()
+        elapsed = summary["elapsed_seconds"]
+        lines = [
+            "=" * 50,
+            "PROFILE",
+            "=" * 50,
+            f"Wall time: {elapsed:.3f} s",
+            "",
+            f"{'span':<16}{'calls':>9}{'total ms':>11}{'%':>7}{'max ms':>10}",
+        ]
+        for name, span in summary["spans"].items():
+            share = 100 * span["total_seconds"] / elapsed if elapsed else 0
+            lines.append(
+                f"{name:<16}{span['calls']:>9}{span['total_seconds'] * 1000:>11.1f}"
+                f"{share:>7.1f}{span['max_seconds'] * 1000:>10.2f}"
+            )
+        # Spans nest and overlap across threads, so shares need not add up
+        lines.append("")
+
+        for name, value in summary["counters"].items():
+            lines.append(f"{name:<27}{value:>15,}")
+        lines.append(f"{'syscalls':<27}{summary['syscalls']:>15,}")
+        if summary["files_per_second"] is not None:
+            lines.append(f"{'files/s':<27}{summary['files_per_second']:>15,.0f}")
+            lines.append(
+                f"{'MB read/s':<27}"
+                f"{summary['bytes_read_per_second'] / (1024 * 1024):>15,.1f}"
+            )
+        if self.dropped_events:
+            lines.append(f"({self.dropped_events} spans not kept in the trace)")
+        lines.append("=" * 50)
+        return "\n".join(lines)
+
+    def write_trace(self, path: str):
+        """
+        Write the recorded spans for a trace viewer.
+
+        Paths ending in '.speedscope.json' get the speedscope format; any
+        other path gets the Chrome trace event format, which chrome://tracing,
+        Perfetto and speedscope all open.
+
+        Args:
+            path: Output file
+        """
+        if path.endswith(".speedscope.json"):
+            document = self._speedscope()
+        else:
+            document = self._chrome_trace()
+
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(document, f)
+        os.replace(temp_path, path)
+
+    def _chrome_trace(self) -> Dict[str, Any]:
+        """Build a Chrome trace event document."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.started) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": thread,
+            }
+            for name, start, end, thread in self.events
+        ]
+        for name, value in self.counters.items():
+            events.append(
+                {
+                    "name": name,
+                    "ph": "C",
+                    "ts": self.elapsed_ns / 1000,
+                    "pid": pid,
+                    "args": {"value": value},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def _speedscope(self) -> Dict[str, Any]:
+        """Build a speedscope document with one evented profile per thread."""
+        frames: Dict[str, int] = {}
+        by_thread: Dict[int, List[Tuple[str, int, int]]] = {}
+        for name, start, end, thread in self.events:
+            frames.setdefault(name, len(frames))
+            by_thread.setdefault(thread, []).append((name, start, end))
+
+        profiles = []
+        for thread, spans in by_thread.items():
+            events = []
+            stack: List[Tuple[int, int]] = []
+            # Outer spans first when two start together
+            for name, start, end in sorted(spans, key=lambda s: (s[1], -s[2])):
+                while stack and stack[-1][1] <= start:
+                    frame, closed = stack.pop()
+                    events.append({"type": "C", "frame": frame, "at": closed})
+                # Spans interleaved by async code cannot nest; clip them
+                if stack:
+                    end = min(end, stack[-1][1])
+                events.append({"type": "O", "frame": frames[name], "at": start})
+                stack.append((frames[name], end))
+            while stack:
+                frame, closed = stack.pop()
+                events.append({"type": "C", "frame": frame, "at": closed})
+
+            profiles.append(
+                {
+                    "type": "evented",
+                    "name": f"Thread {thread}",
+                    "unit": "nanoseconds",
+                    "startValue": self.started,
+                    "endValue": self.started + self.elapsed_ns,
+                    "events": events,
+                }
+            )
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "shared": {"frames": [{"name": name} for name in frames]},
+            "profiles": profiles,
+            "name": "auto-download-organizer",
+            "exporter": "auto-download-organizer",
+        }
+
+
+def enable(record_events: bool = False) -> Profiler:
+    """
+    Start collecting spans and counters.
+
+    Args:
+        record_events: Keep every span for write_trace()
+
+    Returns:
+        The new active Profiler
+    """
+    global _active
+    _active = Profiler(record_events)
+    return _active
+
+
+def disable() -> Optional[Profiler]:
+    """
+    Stop collecting.
+
+    Returns:
+        The profiler that was active, stopped, or None
+    """
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def active() -> Optional[Profiler]:
+    """Get the active profiler, if any."""
+    return _active
+
+
+def add_observer(observer: Any):
+    """
+    Receive every finished span and counter increment.
+
+    Args:
+        observer: Object with observe_span(name, duration_ns) and
+                  observe_count(name, amount) methods; both may be called
+                  from any thread
+    """
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_observer(observer: Any):
+    """Stop sending spans and counters to an observer."""
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def span(name: str):
+    """
+    Time a block of code under a span name.
+
+    Args:
+        name: Span name, e.g. 'scan' or 'hash'
+
+    Returns:
+        Context manager; a shared no-op one while nothing collects spans
+    """
+    profiler = _active
+    if profiler is None and not _observers:
+        return _NULL_SPAN
+    return _Span(profiler, name)
+
+
+def count(name: str, amount: int = 1):
+    """
+    Add to a counter of the active profiler and the observers.
+
+    Args:
+        name: Counter name; 'calls.<name>' counters are file system calls
+        amount: Value to add
+    """
+    profiler = _active
+    if profiler is not None:
+        profiler.count(name, amount)
+    for observer in _observers:
+        observer.observe_count(name, amount)
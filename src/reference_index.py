@@ -0,0 +1,292 @@
+"""
+Persistent index of reference files and their content hashes.
+
+Reference roots (an archive, a NAS mirror) are compared against but never
+cleaned, and they change rarely. Hashing them once into an index lets a
+duplicate scan look the archive up instead of walking and hashing it: the
+sizes of the scanned files are looked up, and only the scanned files whose
+size the archive has are hashed.
+
+Updating an indexed root walks it again and hashes only the files whose
+size, modification time or inode changed; files that disappeared are
+dropped from the index.
+"""
+
+import os
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from . import profiling
+from .hashing import DEFAULT_ALGORITHM, HashExecutor, hash_file, new_hasher
+from .walker import FileEntry, walk
+
+# Sizes looked up per query, below SQLite's limit of bound parameters
+LOOKUP_CHUNK = 500
+
+
+class ReferenceIndex:
+    """Stores the paths, stat data and digests of reference files in SQLite."""
+
+    DEFAULT_FILENAME = "organizer_reference_index.db"
+
+    # New and changed files are hashed and written in batches of this size
+    BATCH_SIZE = 500
+
+    def __init__(self, db_path: str = DEFAULT_FILENAME, algorithm: str = None):
+        """
+        Initialize reference index.
+
+        Args:
+            db_path: Path to the SQLite database file
+            algorithm: Content hash algorithm of the digests; defaults to the
+                       one the index was built with, or sha256 for a new one
+
+        Raises:
+            ValueError: If the index holds digests of another algorithm
+        """
+        self.db_path = db_path
+
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                device INTEGER NOT NULL,
+                digest BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_size ON files (size);
+            CREATE INDEX IF NOT EXISTS files_digest ON files (digest);
+            CREATE INDEX IF NOT EXISTS files_root ON files (root);
+            """)
+
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'algorithm'"
+        ).fetchone()
+        stored = row[0] if row else None
+        if algorithm is None:
+            algorithm = stored or DEFAULT_ALGORITHM
+        elif stored is not None and stored != algorithm and self.count():
+            self._conn.close()
+            raise ValueError(
+                f"Reference index {db_path} holds {stored} digests, not {algorithm}"
+            )
+        # Fail early on algorithms that are unknown or not installed
+        new_hasher(algorithm)
+        self.algorithm = algorithm
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('algorithm', ?)",
+            (algorithm,),
+        )
+        self._conn.commit()
+
+    def update(
+        self,
+        root: str,
+        workers: int = 1,
+        exclude: List[str] = None,
+        symlinks: str = "files",
+        on_error: Callable[[str, OSError], None] = None,
+    ) -> Dict[str, int]:
+        """
+        Add a reference root to the index, or bring it up to date.
+
+        Args:
+            root: Directory to index
+            workers: Number of files hashed concurrently
+            exclude: Glob patterns of files and directories to skip
+            symlinks: Symlink policy ('ignore', 'files' or 'follow')
+            on_error: Called with (path, error) for files that cannot be read
+
+        Returns:
+            Dictionary with the counts of files found, hashed, unchanged and
+            removed, and the bytes hashed
+        """
+        root = os.path.abspath(os.fspath(root))
+        executor = HashExecutor(workers)
+        counters = {
+            "files": 0,
+            "hashed": 0,
+            "unchanged": 0,
+            "removed": 0,
+            "bytes_hashed": 0,
+        }
+        # Paths found by this walk; whatever else is stored under root is gone
+        self._conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)"
+        )
+        self._conn.execute("DELETE FROM seen")
+
+        pending: List[FileEntry] = []
+        for entry in walk(root, exclude=exclude, symlinks=symlinks, on_error=on_error):
+            counters["files"] += 1
+            self._conn.execute("INSERT OR IGNORE INTO seen VALUES (?)", (entry.path,))
+            stored = self._conn.execute(
+                "SELECT size, mtime_ns, inode, device FROM files WHERE path = ?",
+                (entry.path,),
+            ).fetchone()
+            if stored == (entry.size, entry.mtime_ns, entry.inode, entry.device):
+                counters["unchanged"] += 1
+                continue
+            pending.append(entry)
+            if len(pending) >= self.BATCH_SIZE:
+                self._hash_batch(root, pending, executor, counters, on_error)
+                pending = []
+        self._hash_batch(root, pending, executor, counters, on_error)
+
+        counters["removed"] = self._conn.execute(
+            "DELETE FROM files WHERE root = ? AND path NOT IN (SELECT path FROM seen)",
+            (root,),
+        ).rowcount
+        self._conn.execute("DELETE FROM seen")
+        self._conn.commit()
+        return counters
+
+    def _hash_batch(
+        self,
+        root: str,
+        entries: List[FileEntry],
+        executor: HashExecutor,
+        counters: Dict[str, int],
+        on_error: Optional[Callable[[str, OSError], None]],
+    ):
+        """Hash new or changed files and store them."""
+        with profiling.span("hash"):
+            outcomes = executor.map(
+                hash_file,
+                [(entry.path, self.algorithm) for entry in entries],
+                [entry.device for entry in entries],
+            )
+        profiling.count("files_hashed", len(entries))
+
+        for entry, outcome in zip(entries, outcomes):
+            if isinstance(outcome, Exception):
+                if on_error is not None:
+                    on_error(entry.path, outcome)
+                # A stale digest must not outlive the file's change
+                self._conn.execute("DELETE FROM files WHERE path = ?", (entry.path,))
+                continue
+            digest, read = outcome
+            counters["hashed"] += 1
+            counters["bytes_hashed"] += read
+            profiling.count("bytes_read", read)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files "
+                "(path, root, size, mtime_ns, inode, device, digest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.path,
+                    root,
+                    entry.size,
+                    entry.mtime_ns,
+                    entry.inode,
+                    entry.device,
+                    bytes.fromhex(digest),
+                ),
+            )
+        self._conn.commit()
+
+    def sizes_present(self, sizes: Iterable[int]) -> Set[int]:
+        """
+        Find which of the given file sizes some reference file has.
+
+        Args:
+            sizes: File sizes to look up
+
+        Returns:
+            The sizes that occur in the index
+        """
+        sizes = list(sizes)
+        found = set()
+        for start in range(0, len(sizes), LOOKUP_CHUNK):
+            chunk = sizes[start : start + LOOKUP_CHUNK]
+            placeholders = ", ".join("?" * len(chunk))
+            found.update(
+                size
+                for (size,) in self._conn.execute(
+                    f"SELECT DISTINCT size FROM files WHERE size IN ({placeholders})",
+                    chunk,
+                )
+            )
+        return found
+
+    def files_with_digest(self, digest: bytes) -> List[FileEntry]:
+        """
+        Get the reference files with a content digest.
+
+        Args:
+            digest: Raw digest, in the index's algorithm
+
+        Returns:
+            FileEntry per file, with the stat data it was indexed with
+        """
+        return [
+            FileEntry(*row)
+            for row in self._conn.execute(
+                "SELECT path, size, mtime_ns, inode, device FROM files "
+                "WHERE digest = ?",
+                (digest,),
+            )
+        ]
+
+    def remove_root(self, root: str) -> int:
+        """
+        Forget every file of an indexed root.
+
+        Args:
+            root: Indexed directory
+
+        Returns:
+            Number of files removed from the index
+        """
+        removed = self._conn.execute(
+            "DELETE FROM files WHERE root = ?", (os.path.abspath(os.fspath(root)),)
+        ).rowcount
+        self._conn.commit()
+        return removed
+
+    def count(self) -> int:
+        """Get the number of indexed files."""
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get index statistics.
+
+        Returns:
+            Dictionary with the algorithm, the file and byte counts, and the
+            file count of every indexed root
+        """
+        files, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files"
+        ).fetchone()
+        by_root = self._conn.execute(
+            "SELECT root, COUNT(*) FROM files GROUP BY root ORDER BY root"
+        ).fetchall()
+        return {
+            "db_path": self.db_path,
+            "db_size_bytes": (
+                os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+            ),
+            "algorithm": self.algorithm,
+            "files": files,
+            "bytes": total_bytes,
+            "roots": dict(by_root),
+        }
+
+    def close(self):
+        """Commit and close the database."""
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
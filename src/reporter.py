@@ -0,0 +1,163 @@
+"""
+Console output of the organizer and the duplicate cleaner.
+
+On runs over hundreds of thousands of files, writing one line per file to a
+terminal or to journald takes a measurable share of the wall time. A
+Reporter decides what reaches the console:
+
+- verbose:  every message, including one line per file (the default)
+- progress: summaries and warnings, plus a single updating line with the
+            files/s and bytes/s of the running phase
+- quiet:    warnings only
+
+Per-file detail is recorded in the operation log in every mode.
+"""
+
+import sys
+import threading
+import time
+from typing import Optional, TextIO
+
+REPORTER_MODES = ("verbose", "progress", "quiet")
+
+_default: Optional["Reporter"] = None
+
+
+class Reporter:
+    """Routes console messages according to an output mode."""
+
+    def __init__(self, mode: str = "verbose", interval: float = 0.5, stream=None):
+        """
+        Initialize reporter.
+
+        Args:
+            mode: One of REPORTER_MODES
+            interval: Minimum seconds between redraws of the progress line
+            stream: Output stream (default: sys.stdout at the time of writing)
+        """
+        if mode not in REPORTER_MODES:
+            raise ValueError(
+                f"Unknown output mode: {mode} (expected one of "
+                f"{', '.join(REPORTER_MODES)})"
+            )
+        self.mode = mode
+        self.interval = interval
+        self.stream: Optional[TextIO] = stream
+        # Callers check this before formatting per-file messages
+        self.verbose = mode == "verbose"
+        self.show_progress = mode == "progress"
+
+        self._label: Optional[str] = None
+        self._files = 0
+        self._bytes = 0
+        self._started = 0.0
+        self._drawn = 0.0
+        self._line_width = 0
+        self._lock = threading.Lock()
+
+    def info(self, message: str):
+        """Show a summary message, unless quiet."""
+        if self.mode != "quiet":
+            self._write(message)
+
+    def detail(self, message: str):
+        """Show a per-file message, only in verbose mode."""
+        if self.verbose:
+            self._write(message)
+
+    def warning(self, message: str):
+        """Show a message in every mode."""
+        self._write(message)
+
+    def begin(self, label: str):
+        """
+        Start a phase counted by advance().
+
+        Args:
+            label: Name shown on the progress line, e.g. 'Moving'
+        """
+        if not self.show_progress:
+            return
+        self.end()
+        with self._lock:
+            self._label = label
+            self._files = 0
+            self._bytes = 0
+            self._started = self._drawn = time.monotonic()
+
+    def advance(self, files: int = 1, nbytes: int = 0):
+        """
+        Count processed files and bytes of the running phase.
+
+        Args:
+            files: Files processed since the last call
+            nbytes: Bytes processed since the last call
+        """
+        if not self.show_progress:
+            return
+        with self._lock:
+            self._files += files
+            self._bytes += nbytes
+            now = time.monotonic()
+            if self._label is not None and now - self._drawn >= self.interval:
+                self._draw(now)
+
+    def end(self):
+        """Finish the running phase, leaving its final progress line."""
+        if not self.show_progress:
+            return
+        with self._lock:
+            if self._label is None:
+                return
+            self._draw(time.monotonic())
+            self._out().write("\n")
+            self._out().flush()
+            self._label = None
+            self._line_width = 0
+
+    def _draw(self, now: float):
+        """Redraw the progress line (called with the lock held)."""
+        elapsed = now - self._started
+        files_per_second = self._files / elapsed if elapsed > 0 else 0.0
+        mb_per_second = self._bytes / elapsed / (1024 * 1024) if elapsed > 0 else 0.0
+        line = (
+            f"{self._label}: {self._files:,} files, {files_per_second:,.0f} files/s, "
+            f"{mb_per_second:,.1f} MB/s"
+        )
+        stream = self._out()
+        stream.write("\r" + line.ljust(self._line_width))
+        stream.flush()
+        self._line_width = len(line)
+        self._drawn = now
+
+    def _write(self, message: str):
+        """Print a message, clearing the progress line first."""
+        with self._lock:
+            stream = self._out()
+            if self._line_width:
+                stream.write("\r" + " " * self._line_width + "\r")
+                self._line_width = 0
+            print(message, file=stream)
+
+    def _out(self) -> TextIO:
+        """Get the output stream."""
+        return self.stream or sys.stdout
+
+
+def default() -> Reporter:
+    """Get the reporter used by loggers created without one."""
+    global _default
+    if _default is None:
+        _default = Reporter()
+    return _default
+
+
+def set_default(reporter: Optional[Reporter]):
+    """
+    Set the reporter used by loggers created without one.
+
+    Args:
+        reporter: New default, or None to go back to a verbose reporter
+    """
+    global _default
+    _default = reporter
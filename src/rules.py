@@ -0,0 +1,676 @@
+"""
+Category rules beyond extension lists.
+
+A rule assigns a category to the files matching all of its conditions:
+extensions, a glob or regular expression on the name, a size range, an age
+range, the URL a download came from and the MIME type. When several rules
+match, the highest priority wins, then the rule listed first.
+
+A RuleSet compiles the rules once into lookup structures, so a file is
+classified by a few lookups instead of testing every rule:
+
+- extension rules are found through a hash map from extension to rules
+- globs with a literal prefix or suffix ('invoice_*', '*.tar.gz') through
+  hash maps keyed by that prefix or suffix
+- other globs and regular expressions containing a literal run ('*draft*',
+  'scan[0-9]+') through a hash map keyed by that run, looked up with every
+  substring of the name of a length in use
+- the remaining name patterns through one combined regular expression whose
+  first match is the highest-ranked pattern rule matching the name
+- rules on size alone through buckets between the sorted size boundaries
+  (bisect the size, get the rules covering that bucket)
+
+Only the candidates found this way are checked against their remaining
+conditions, in rank order. Source URLs and MIME types are only read for
+candidates that test them.
+"""
+
+import bisect
+import fnmatch
+import mimetypes
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .walker import FileEntry
+
+RULE_KEYS = (
+    "category",
+    "priority",
+    "extensions",
+    "name",
+    "regex",
+    "min_size",
+    "max_size",
+    "min_age_days",
+    "max_age_days",
+    "source_url",
+    "mime",
+)
+
+SIZE_UNITS = {
+    "b": 1,
+    "kb": 1024,
+    "mb": 1024**2,
+    "gb": 1024**3,
+    "tb": 1024**4,
+}
+
+# Extended attribute browsers on Linux store the download URL in
+SOURCE_URL_XATTR = "user.xdg.origin.url"
+
+# Alternate data stream with a 'HostUrl=' line on Windows (NTFS)
+ZONE_IDENTIFIER_STREAM = ":Zone.Identifier"
+
+_GLOB_SPECIAL = re.compile(r"[*?\[]")
+
+# Regex characters that end a literal run
+_REGEX_SPECIAL = frozenset(".^$*+?{}[]()|\\")
+
+# Numbered or named back references break when patterns are combined
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def _combinable(regex: str) -> bool:
+    """Check whether a rule's regex can be part of the combined pattern."""
+    if _BACKREFERENCE.search(regex):
+        return False
+    try:
+        # Fails for global flags such as '(?i)', which must start a pattern
+        re.compile("x|(?:" + regex + ")")
+    except re.error:
+        return False
+    return True
+
+
+def parse_size(value: Any) -> int:
+    """
+    Parse a size given in bytes or with a unit, such as '1.5 MB'.
+
+    Args:
+        value: Number of bytes, or string with a B/KB/MB/GB/TB suffix
+               (powers of 1024)
+
+    Returns:
+        Size in bytes
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        size = value
+    else:
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", str(value))
+        unit = (match.group(2).lower() or "b") if match else None
+        if unit not in SIZE_UNITS:
+            raise ValueError(f"Invalid size: {value!r}")
+        size = float(match.group(1)) * SIZE_UNITS[unit]
+    if size < 0:
+        raise ValueError(f"Size must not be negative: {value!r}")
+    return int(size)
+
+
+def read_source_url(path: str) -> Optional[str]:
+    """
+    Get the URL a file was downloaded from, as recorded by the browser.
+
+    Reads the 'user.xdg.origin.url' extended attribute on Linux and the
+    Zone.Identifier stream on Windows.
+
+    Args:
+        path: File path
+
+    Returns:
+        The URL, or None if it was not recorded
+    """
+    if hasattr(os, "getxattr"):
+        try:
+            return os.getxattr(path, SOURCE_URL_XATTR).decode("utf-8", "replace")
+        except OSError:
+            return None
+    if os.name == "nt":
+        try:
+            with open(path + ZONE_IDENTIFIER_STREAM, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("HostUrl="):
+                        return line[len("HostUrl=") :].strip()
+        except OSError:
+            return None
+    return None
+
+
+class FileFacts:
+    """What rules can test about one file; costly facts are read on demand."""
+
+    __slots__ = (
+        "path",
+        "name",
+        "lower_name",
+        "extension",
+        "size",
+        "mtime",
+        "content_types",
+        "entry",
+        "_mime_type",
+        "_source_url",
+    )
+
+    _UNSET = object()
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        mtime: float,
+        entry: FileEntry = None,
+        content_types=None,
+    ):
+        """
+        Initialize file facts.
+
+        Args:
+            path: File path
+            size: Size in bytes
+            mtime: Modification time (seconds since the epoch)
+            entry: Scan entry of the file, needed for content detection
+            content_types: ContentTypeDetector used for the MIME type of
+                           files without a known extension (optional)
+        """
+        self.path = os.fspath(path)
+        self.name = os.path.basename(self.path)
+        self.lower_name = self.name.lower()
+        self.extension = Path(self.name).suffix.lower()
+        self.size = size
+        self.mtime = mtime
+        self.entry = entry
+        self.content_types = content_types
+        self._mime_type = self._UNSET
+        self._source_url = self._UNSET
+
+    @classmethod
+    def from_entry(cls, entry: FileEntry, content_types=None) -> "FileFacts":
+        """Build the facts of a scanned file."""
+        return cls(entry.path, entry.size, entry.mtime_ns / 1e9, entry, content_types)
+
+    @property
+    def mime_type(self) -> Optional[str]:
+        """MIME type guessed from the extension, or else from the content."""
+        if self._mime_type is self._UNSET:
+            mime_type = None
+            if self.extension:
+                mime_type = mimetypes.guess_type("file" + self.extension)[0]
+            if (
+                mime_type is None
+                and self.content_types is not None
+                and self.entry is not None
+            ):
+                detected = self.content_types.detect(self.entry)
+                if detected is not None:
+                    mime_type = mimetypes.guess_type("file" + detected)[0]
+            self._mime_type = mime_type
+        return self._mime_type
+
+    @property
+    def source_url(self) -> Optional[str]:
+        """URL the file was downloaded from, if the browser recorded it."""
+        if self._source_url is self._UNSET:
+            self._source_url = read_source_url(self.path)
+        return self._source_url
+
+
+class Rule:
+    """One category rule; every given condition must hold."""
+
+    __slots__ = (
+        "category",
+        "priority",
+        "order",
+        "extensions",
+        "name",
+        "regex",
+        "min_size",
+        "max_size",
+        "min_age_days",
+        "max_age_days",
+        "source_url",
+        "mime",
+        "_name_regex",
+        "_regex",
+        "_source_url_regex",
+        "_mime_regex",
+    )
+
+    def __init__(
+        self,
+        category: str,
+        priority: int = 0,
+        extensions: List[str] = None,
+        name: str = None,
+        regex: str = None,
+        min_size: Any = None,
+        max_size: Any = None,
+        min_age_days: float = None,
+        max_age_days: float = None,
+        source_url: str = None,
+        mime: Any = None,
+        order: int = 0,
+    ):
+        """
+        Initialize rule.
+
+        Args:
+            category: Category of the matching files
+            priority: Higher priorities win over lower ones
+            extensions: File extensions, e.g. ['.pdf']
+            name: Glob matched against the whole file name (case-insensitive)
+            regex: Regular expression searched in the file name
+            min_size: Minimum size in bytes, or with a unit ('10 MB')
+            max_size: Maximum size, inclusive
+            min_age_days: Minimum days since the last modification
+            max_age_days: Maximum days since the last modification
+            source_url: Glob matched against the download URL
+                        (case-insensitive)
+            mime: MIME type glob, or list of them (e.g. 'image/*')
+            order: Position in the configuration, breaking priority ties
+
+        Raises:
+            ValueError: If the rule has no condition or an invalid one
+        """
+        if not category or not isinstance(category, str):
+            raise ValueError(f"Rule needs a category: {category!r}")
+        self.category = category
+        self.priority = int(priority)
+        self.order = order
+
+        self.extensions = None
+        if extensions is not None:
+            if isinstance(extensions, str):
+                extensions = [extensions]
+            self.extensions = frozenset(
+                ext.lower() if ext.startswith(".") or not ext else "." + ext.lower()
+                for ext in extensions
+            )
+
+        self.name = name
+        self._name_regex = None
+        if name is not None:
+            self._name_regex = re.compile(fnmatch.translate(name.lower()), re.DOTALL)
+
+        self.regex = regex
+        self._regex = None
+        if regex is not None:
+            try:
+                self._regex = re.compile(regex)
+            except re.error as e:
+                raise ValueError(f"Invalid regex {regex!r}: {e}") from None
+
+        self.min_size = parse_size(min_size) if min_size is not None else None
+        self.max_size = parse_size(max_size) if max_size is not None else None
+        if (
+            self.min_size is not None
+            and self.max_size is not None
+            and self.min_size > self.max_size
+        ):
+            raise ValueError(f"min_size is above max_size: {min_size}, {max_size}")
+
+        self.min_age_days = float(min_age_days) if min_age_days is not None else None
+        self.max_age_days = float(max_age_days) if max_age_days is not None else None
+
+        self.source_url = source_url
+        self._source_url_regex = None
+        if source_url is not None:
+            self._source_url_regex = re.compile(
+                fnmatch.translate(source_url.lower()), re.DOTALL
+            )
+
+        self.mime = None
+        self._mime_regex = None
+        if mime is not None:
+            self.mime = [mime] if isinstance(mime, str) else list(mime)
+            self._mime_regex = re.compile(
+                "|".join(fnmatch.translate(m.lower()) for m in self.mime)
+            )
+
+        if not any(
+            value is not None
+            for value in (
+                self.extensions,
+                name,
+                regex,
+                self.min_size,
+                self.max_size,
+                self.min_age_days,
+                self.max_age_days,
+                source_url,
+                self.mime,
+            )
+        ):
+            raise ValueError(f"Rule for {category} has no condition")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], order: int = 0) -> "Rule":
+        """
+        Build a rule from its configuration entry.
+
+        Args:
+            data: Mapping with the keys in RULE_KEYS
+            order: Position in the configuration
+
+        Returns:
+            Rule instance
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"Rule {order + 1} is not a mapping: {data!r}")
+        unknown = set(data) - set(RULE_KEYS)
+        if unknown:
+            raise ValueError(
+                f"Unknown keys in rule {order + 1}: {', '.join(sorted(unknown))}"
+            )
+        try:
+            return cls(order=order, **data)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid rule {order + 1}: {e}") from None
+
+    def matches(self, facts: FileFacts, now: float) -> bool:
+        """
+        Check every condition of the rule, the cheap ones first.
+
+        Args:
+            facts: The file
+            now: Current time for the age conditions
+
+        Returns:
+            True if the file matches
+        """
+        if self.extensions is not None and facts.extension not in self.extensions:
+            return False
+        if self.min_size is not None and facts.size < self.min_size:
+            return False
+        if self.max_size is not None and facts.size > self.max_size:
+            return False
+        if self.min_age_days is not None or self.max_age_days is not None:
+            age = (now - facts.mtime) / 86400
+            if self.min_age_days is not None and age < self.min_age_days:
+                return False
+            if self.max_age_days is not None and age > self.max_age_days:
+                return False
+        if self._name_regex is not None and not self._name_regex.match(
+            facts.lower_name
+        ):
+            return False
+        if self._regex is not None and not self._regex.search(facts.name):
+            return False
+        if self._mime_regex is not None:
+            mime_type = facts.mime_type
+            if mime_type is None or not self._mime_regex.match(mime_type.lower()):
+                return False
+        if self._source_url_regex is not None:
+            url = facts.source_url
+            if url is None or not self._source_url_regex.match(url.lower()):
+                return False
+        return True
+
+
+def _glob_literal(glob: str) -> str:
+    """Get the longest literal run of a lowercased glob."""
+    runs = re.split(r"[*?]|\[[^\]]*\]?", glob)
+    return max(runs, key=len)
+
+
+def _regex_literal(regex: str) -> str:
+    """
+    Get a literal run every match of a regex contains, lowercased.
+
+    Only runs outside groups and character classes are considered, and a
+    character followed by a quantifier that allows zero repeats is left out.
+    Returns '' when no such run is found or the regex has alternatives.
+    """
+    if "|" in regex or regex.startswith("(?"):
+        return ""
+    runs = [""]
+    depth = 0
+    index = 0
+    while index < len(regex):
+        char = regex[index]
+        if char == "\\":
+            escaped = regex[index + 1 : index + 2]
+            index += 2
+            if escaped and not escaped.isalnum() and depth == 0:
+                runs[-1] += escaped
+            else:
+                runs.append("")
+            continue
+        index += 1
+        if char in "?*{":
+            runs[-1] = runs[-1][:-1]
+            runs.append("")
+            if char == "{":
+                index = regex.find("}", index) + 1 or len(regex)
+        elif char == "[":
+            closing = regex.find("]", index + 1)
+            index = len(regex) if closing < 0 else closing + 1
+            runs.append("")
+        elif char in _REGEX_SPECIAL:
+            depth += {"(": 1, ")": -1}.get(char, 0)
+            runs.append("")
+        elif depth == 0:
+            runs[-1] += char
+    return max(runs, key=len).lower()
+
+
+def _literal_ends(glob: str):
+    """Split a lowercased glob into its literal prefix and suffix."""
+    first = _GLOB_SPECIAL.search(glob)
+    if first is None:
+        return glob, glob
+    prefix = glob[: first.start()]
+    last = max(glob.rfind("*"), glob.rfind("?"), glob.rfind("]"))
+    suffix = glob[last + 1 :]
+    if "[" in suffix or "]" in suffix:
+        suffix = ""
+    return prefix, suffix
+
+
+class RuleSet:
+    """Rules compiled for classifying a file with a few lookups."""
+
+    def __init__(self, rules: List[Rule]):
+        """
+        Compile rules.
+
+        Args:
+            rules: Rules in configuration order
+        """
+        # Rank order: higher priority first, then configuration order
+        self.rules = sorted(rules, key=lambda rule: (-rule.priority, rule.order))
+
+        self._by_extension: Dict[str, List[int]] = {}
+        self._by_prefix: Dict[str, List[int]] = {}
+        self._by_suffix: Dict[str, List[int]] = {}
+        self._by_substring: Dict[str, List[int]] = {}
+        self._unindexed: List[int] = []
+        pattern_ranks: List[int] = []
+        size_ranks: List[int] = []
+
+        for rank, rule in enumerate(self.rules):
+            if rule.extensions is not None:
+                for extension in rule.extensions:
+                    self._by_extension.setdefault(extension, []).append(rank)
+            elif rule.name is not None:
+                prefix, suffix = _literal_ends(rule.name.lower())
+                if prefix:
+                    self._by_prefix.setdefault(prefix, []).append(rank)
+                elif suffix:
+                    self._by_suffix.setdefault(suffix, []).append(rank)
+                elif _glob_literal(rule.name.lower()):
+                    literal = _glob_literal(rule.name.lower())
+                    self._by_substring.setdefault(literal, []).append(rank)
+                else:
+                    pattern_ranks.append(rank)
+            elif rule.regex is not None and _regex_literal(rule.regex):
+                literal = _regex_literal(rule.regex)
+                self._by_substring.setdefault(literal, []).append(rank)
+            elif rule.regex is not None and _combinable(rule.regex):
+                pattern_ranks.append(rank)
+            elif rule.min_size is not None or rule.max_size is not None:
+                size_ranks.append(rank)
+            else:
+                self._unindexed.append(rank)
+
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._by_prefix})
+        self._suffix_lengths = sorted({len(suffix) for suffix in self._by_suffix})
+        self._substring_lengths = sorted({len(part) for part in self._by_substring})
+        self._pattern_ranks = pattern_ranks
+        self._pattern = self._compile_patterns(pattern_ranks)
+        self._size_bounds, self._size_buckets = self._compile_sizes(size_ranks)
+
+    @classmethod
+    def from_config(cls, entries: List[Dict[str, Any]]) -> "RuleSet":
+        """
+        Build a rule set from the 'rules' configuration list.
+
+        Args:
+            entries: Rule mappings (see Rule for the keys)
+
+        Returns:
+            Compiled RuleSet
+        """
+        if entries is None:
+            entries = []
+        if not isinstance(entries, list):
+            raise ValueError("'rules' must be a list")
+        return cls([Rule.from_dict(data, order) for order, data in enumerate(entries)])
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, facts: FileFacts, now: float = None) -> Optional[Rule]:
+        """
+        Find the winning rule for a file.
+
+        Args:
+            facts: The file
+            now: Current time for age conditions (default: time.time())
+
+        Returns:
+            The highest-ranked matching rule, or None
+        """
+        now = time.time() if now is None else now
+        rules = self.rules
+
+        candidates = list(self._unindexed)
+        candidates.extend(self._by_extension.get(facts.extension, ()))
+        name = facts.lower_name
+        for length in self._prefix_lengths:
+            if length > len(name):
+                break
+            candidates.extend(self._by_prefix.get(name[:length], ()))
+        for length in self._suffix_lengths:
+            if length > len(name):
+                break
+            candidates.extend(self._by_suffix.get(name[-length:], ()))
+        for length in self._substring_lengths:
+            if length > len(name):
+                break
+            for start in range(len(name) - length + 1):
+                found = self._by_substring.get(name[start : start + length])
+                if found:
+                    candidates.extend(found)
+        if self._size_buckets:
+            bucket = bisect.bisect_right(self._size_bounds, facts.size)
+            candidates.extend(self._size_buckets[bucket])
+
+        best = len(rules)
+        for rank in sorted(set(candidates)):
+            if rules[rank].matches(facts, now):
+                best = rank
+                break
+
+        if self._pattern is not None:
+            found = self._pattern.match(facts.name)
+            if found is not None:
+                first = int(found.lastgroup[1:])
+                best = min(best, self._match_patterns(first, best, facts, now))
+
+        return rules[best] if best < len(rules) else None
+
+    def match_linear(self, facts: FileFacts, now: float = None) -> Optional[Rule]:
+        """
+        Find the winning rule by testing every rule in rank order.
+
+        Gives the same result as match(); kept as its reference.
+        """
+        now = time.time() if now is None else now
+        for rule in self.rules:
+            if rule.matches(facts, now):
+                return rule
+        return None
+
+    def _match_patterns(
+        self, first: int, limit: int, facts: FileFacts, now: float
+    ) -> int:
+        """
+        Find the best pattern rule ranked above limit.
+
+        Args:
+            first: Rank of the first pattern rule whose pattern matched
+            limit: Rank of the best rule found so far
+            facts: The file
+            now: Current time
+
+        Returns:
+            Rank of the best matching pattern rule, or limit
+        """
+        if first >= limit:
+            return limit
+        if self.rules[first].matches(facts, now):
+            return first
+        # The best name match failed another condition: test the pattern
+        # rules ranked after it one by one
+        start = bisect.bisect_right(self._pattern_ranks, first)
+        for rank in self._pattern_ranks[start:]:
+            if rank >= limit:
+                break
+            if self.rules[rank].matches(facts, now):
+                return rank
+        return limit
+
+    def _compile_patterns(self, ranks: List[int]):
+        """Combine the name patterns into one regex, one group per rule."""
+        if not ranks:
+            return None
+        alternatives = []
+        for rank in ranks:
+            rule = self.rules[rank]
+            if rule.name is not None:
+                pattern = "(?i:" + fnmatch.translate(rule.name.lower()) + ")"
+            else:
+                # Searched anywhere in the name, as Rule.matches() does
+                pattern = ".*?(?:" + rule.regex + ")"
+            alternatives.append(f"(?P<r{rank}>{pattern})")
+        return re.compile("|".join(alternatives), re.DOTALL)
+
+    def _compile_sizes(self, ranks: List[int]):
+        """Build the size boundaries and the rules covering each bucket."""
+        if not ranks:
+            return [], []
+        bounds = set()
+        for rank in ranks:
+            rule = self.rules[rank]
+            bounds.add(rule.min_size or 0)
+            if rule.max_size is not None:
+                bounds.add(rule.max_size + 1)
+        bounds = sorted(bounds)
+
+        # Bucket i holds the sizes in [bounds[i - 1], bounds[i])
+        buckets: List[List[int]] = [[] for _ in range(len(bounds) + 1)]
+        for rank in ranks:
+            rule = self.rules[rank]
+            start = bisect.bisect_right(bounds, rule.min_size or 0)
+            end = (
+                bisect.bisect_right(bounds, rule.max_size)
+                if rule.max_size is not None
+                else len(bounds)
+            )
+            for bucket in range(start, end + 1):
+                buckets[bucket].append(rank)
+        return bounds, buckets
@@ -0,0 +1,454 @@
+"""
+Persistent scan state for incremental runs.
+
+The state remembers, per scanned root, every directory's modification time
+and the stat identity of every file found in it. A directory whose mtime is
+unchanged has the same entries as last time, so its listing and the stat
+data of its files are taken from the state instead of the filesystem; only
+its subdirectories are stat'ed to check them in turn.
+
+Files modified in place do not change their directory's mtime. Callers that
+act on file contents (the duplicate cleaner) must re-stat the files they
+are about to read.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import profiling
+from .walker import SYMLINK_POLICIES, FileEntry, _is_excluded, _stat_entry
+
+# Directories modified this recently are listed again on the next run, since
+# a change within the same mtime tick would go unnoticed
+RACY_WINDOW_NS = 2_000_000_000
+
+
+class ScanState:
+    """Stores directory mtimes and file identities in SQLite."""
+
+    DEFAULT_FILENAME = "organizer_scan_state.db"
+
+    def __init__(self, db_path: str = DEFAULT_FILENAME, read_only: bool = False):
+        """
+        Initialize scan state.
+
+        Args:
+            db_path: Path to the SQLite database file
+            read_only: If True, walks use the stored state without updating
+                       it (for dry runs, whose files must stay fresh)
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self.last_scan = self._new_counters()
+
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS roots (
+                scope INTEGER PRIMARY KEY,
+                root TEXT NOT NULL,
+                options TEXT NOT NULL,
+                scanned REAL NOT NULL,
+                UNIQUE (root, options)
+            );
+            CREATE TABLE IF NOT EXISTS dirs (
+                scope INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                parent TEXT,
+                mtime_ns INTEGER,
+                PRIMARY KEY (scope, path)
+            );
+            CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (scope, parent);
+            CREATE TABLE IF NOT EXISTS files (
+                scope INTEGER NOT NULL,
+                dir TEXT NOT NULL,
+                name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                device INTEGER NOT NULL,
+                PRIMARY KEY (scope, dir, name)
+            );
+            """)
+        self._conn.commit()
+
+    @staticmethod
+    def path_for_log(log_file: str) -> str:
+        """
+        Get the default state location, next to the given log file.
+
+        Args:
+            log_file: Path to the operation log
+
+        Returns:
+            Path to the state database
+        """
+        log_dir = os.path.dirname(os.path.abspath(log_file))
+        return os.path.join(log_dir, ScanState.DEFAULT_FILENAME)
+
+    def walk(
+        self,
+        root: str,
+        max_depth: Optional[int] = None,
+        exclude: List[str] = None,
+        symlinks: str = "files",
+        on_error: Callable[[str, OSError], None] = None,
+    ) -> Iterator[Tuple[FileEntry, bool]]:
+        """
+        Walk a directory like walker.walk(), reusing unchanged listings.
+
+        The state of the root is updated as directories are listed, unless
+        the state is read-only.
+
+        Args:
+            root: Directory to walk
+            max_depth: How many directory levels to descend below root
+            exclude: Glob patterns of files and directories to skip
+            symlinks: Symlink policy, one of SYMLINK_POLICIES
+            on_error: Called with (path, error) for entries that cannot be read
+
+        Yields:
+            Tuples of (FileEntry, fresh) where fresh is True for files that
+            are new or whose size, mtime or inode changed since the last run
+        """
+        if symlinks not in SYMLINK_POLICIES:
+            raise ValueError(f"Unknown symlink policy: {symlinks}")
+
+        root = os.path.abspath(os.fspath(root))
+        patterns = list(exclude or [])
+        scope = self._scope(root, max_depth, patterns, symlinks)
+        self.last_scan = self._new_counters()
+
+        follow_dirs = symlinks == "follow"
+        root_stat = os.stat(root)
+        visited = {(root_stat.st_dev, root_stat.st_ino)}
+        stack = [(root, "", 0, root_stat.st_mtime_ns)]
+        now_ns = time.time_ns()
+
+        try:
+            while stack:
+                dir_path, rel_dir, depth, mtime_ns = stack.pop()
+                if self._dir_unchanged(scope, rel_dir, mtime_ns):
+                    self.last_scan["dirs_reused"] += 1
+                    children = self._stored_listing(scope, root, dir_path, rel_dir)
+                else:
+                    self.last_scan["dirs_listed"] += 1
+                    children = self._list_dir(
+                        scope,
+                        dir_path,
+                        rel_dir,
+                        (mtime_ns, now_ns),
+                        depth,
+                        max_depth,
+                        patterns,
+                        symlinks,
+                        on_error,
+                    )
+                    if children is None:
+                        continue
+
+                files, subdirs = children
+                profiling.count("files_scanned", len(files))
+                profiling.count("calls.stat", len(subdirs))
+                for entry, fresh in files:
+                    counter = "files_fresh" if fresh else "files_unchanged"
+                    self.last_scan[counter] += 1
+                    yield entry, fresh
+
+                for sub_path, sub_rel in subdirs:
+                    try:
+                        sub_stat = os.stat(sub_path)
+                    except OSError as e:
+                        if on_error is not None:
+                            on_error(sub_path, e)
+                        continue
+                    if follow_dirs:
+                        # Guard against symlink cycles
+                        key = (sub_stat.st_dev, sub_stat.st_ino)
+                        if key in visited:
+                            continue
+                        visited.add(key)
+                    stack.append((sub_path, sub_rel, depth + 1, sub_stat.st_mtime_ns))
+        finally:
+            if self.read_only:
+                self._conn.rollback()
+            else:
+                self._conn.commit()
+
+    def clear(self, root: str = None):
+        """
+        Forget the state of one root, or of every root.
+
+        Args:
+            root: Scanned root directory (default: all roots)
+        """
+        if root is None:
+            for table in ("roots", "dirs", "files"):
+                self._conn.execute(f"DELETE FROM {table}")
+        else:
+            root = os.path.abspath(os.fspath(root))
+            scopes = self._conn.execute(
+                "SELECT scope FROM roots WHERE root = ?", (root,)
+            ).fetchall()
+            for (scope,) in scopes:
+                for table in ("roots", "dirs", "files"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE scope = ?", (scope,))
+        self._conn.commit()
+
+    def forget(self, paths: Iterable[str]):
+        """
+        Forget files so that the next walk yields them as fresh again.
+
+        For files a run did not finish with (a failed move, a duplicate
+        left in place) and files moved away that may come back unchanged,
+        e.g. by an undo. Does nothing if the state is read-only.
+
+        Args:
+            paths: Paths of files found by earlier walks
+        """
+        if self.read_only:
+            return
+        roots = self._conn.execute("SELECT scope, root FROM roots").fetchall()
+        for path in paths:
+            path = os.path.abspath(os.fspath(path))
+            for scope, root in roots:
+                prefix = os.path.join(root, "")
+                if not path.startswith(prefix):
+                    continue
+                rel_dir, name = os.path.split(path[len(prefix) :])
+                rel_dir = rel_dir.replace(os.sep, "/")
+                self._conn.execute(
+                    "DELETE FROM files WHERE scope = ? AND dir = ? AND name = ?",
+                    (scope, rel_dir, name),
+                )
+                # The directory must be listed again for the file to be found
+                self._conn.execute(
+                    "UPDATE dirs SET mtime_ns = NULL WHERE scope = ? AND path = ?",
+                    (scope, rel_dir),
+                )
+        self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get state statistics.
+
+        Returns:
+            Dictionary with stored root, directory and file counts and the
+            counters of the last walk
+        """
+        return {
+            "db_path": self.db_path,
+            "roots": self._count("roots"),
+            "directories": self._count("dirs"),
+            "files": self._count("files"),
+            "last_scan": dict(self.last_scan),
+        }
+
+    def flush(self):
+        """Write pending changes to disk."""
+        self._conn.commit()
+
+    def close(self):
+        """Flush and close the database."""
+        self._conn.commit()
+        self._conn.close()
+
+    def _count(self, table: str) -> int:
+        """Count the rows of a table."""
+        return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _scope(
+        self,
+        root: str,
+        max_depth: Optional[int],
+        patterns: List[str],
+        symlinks: str,
+    ) -> int:
+        """
+        Get the id under which a root scanned with these options is stored.
+
+        A root walked with different options (e.g. the organizer's top-level
+        scan and the duplicate cleaner's recursive one) gets its own state.
+        """
+        options = json.dumps(
+            {"max_depth": max_depth, "exclude": patterns, "symlinks": symlinks}
+        )
+        row = self._conn.execute(
+            "SELECT scope FROM roots WHERE root = ? AND options = ?", (root, options)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute(
+                "UPDATE roots SET scanned = ? WHERE scope = ?", (time.time(), row[0])
+            )
+            return row[0]
+
+        cursor = self._conn.execute(
+            "INSERT INTO roots (root, options, scanned) VALUES (?, ?, ?)",
+            (root, options, time.time()),
+        )
+        return cursor.lastrowid
+
+    def _dir_unchanged(self, scope: int, rel_dir: str, mtime_ns: int) -> bool:
+        """Check a directory's mtime against the stored one."""
+        row = self._conn.execute(
+            "SELECT mtime_ns FROM dirs WHERE scope = ? AND path = ?", (scope, rel_dir)
+        ).fetchone()
+        return row is not None and row[0] == mtime_ns
+
+    def _stored_listing(self, scope: int, root: str, dir_path: str, rel_dir: str):
+        """Rebuild a directory's files and subdirectories from the state."""
+        rows = self._conn.execute(
+            "SELECT name, size, mtime_ns, inode, device FROM files "
+            "WHERE scope = ? AND dir = ?",
+            (scope, rel_dir),
+        )
+        files = [
+            (FileEntry(os.path.join(dir_path, name), *stat_data), False)
+            for name, *stat_data in rows
+        ]
+        subdirs = [
+            (os.path.join(root, *path.split("/")), path)
+            for (path,) in self._conn.execute(
+                "SELECT path FROM dirs WHERE scope = ? AND parent = ?", (scope, rel_dir)
+            )
+        ]
+        return files, subdirs
+
+    def _list_dir(
+        self,
+        scope: int,
+        dir_path: str,
+        rel_dir: str,
+        times: Tuple[int, int],
+        depth: int,
+        max_depth: Optional[int],
+        patterns: List[str],
+        symlinks: str,
+        on_error: Optional[Callable[[str, OSError], None]],
+    ):
+        """
+        List a changed directory and replace its stored listing.
+
+        Returns:
+            Tuple of (files, subdirectories), or None if it cannot be read
+        """
+        profiling.count("calls.scandir")
+        try:
+            iterator = os.scandir(dir_path)
+        except OSError as e:
+            if on_error is not None:
+                on_error(dir_path, e)
+            return None
+
+        stored = {
+            name: (size, mtime, inode)
+            for name, size, mtime, inode in self._conn.execute(
+                "SELECT name, size, mtime_ns, inode FROM files "
+                "WHERE scope = ? AND dir = ?",
+                (scope, rel_dir),
+            )
+        }
+
+        files, subdirs = [], []
+        follow_dirs = symlinks == "follow"
+        with iterator:
+            for entry in iterator:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if patterns and _is_excluded(entry.name, rel_path, patterns):
+                    continue
+                try:
+                    if symlinks == "ignore" and entry.is_symlink():
+                        continue
+                    if entry.is_dir(follow_symlinks=follow_dirs):
+                        if max_depth is None or depth < max_depth:
+                            subdirs.append((entry.path, rel_path))
+                        continue
+                    if not entry.is_file():
+                        continue
+                    file_entry = _stat_entry(entry)
+                except OSError as e:
+                    if on_error is not None:
+                        on_error(entry.path, e)
+                    continue
+
+                known = stored.get(entry.name)
+                current = (file_entry.size, file_entry.mtime_ns, file_entry.inode)
+                files.append((file_entry, known != current))
+
+        profiling.count("calls.stat", len(files))
+        self._store_listing(scope, rel_dir, times, files, subdirs)
+        return files, subdirs
+
+    def _store_listing(
+        self,
+        scope: int,
+        rel_dir: str,
+        times: Tuple[int, int],
+        files: List[Tuple[FileEntry, bool]],
+        subdirs: List[Tuple[str, str]],
+    ):
+        """Replace the stored files and subdirectories of one directory."""
+        conn = self._conn
+        conn.execute("DELETE FROM files WHERE scope = ? AND dir = ?", (scope, rel_dir))
+        conn.executemany(
+            "INSERT INTO files (scope, dir, name, size, mtime_ns, inode, device) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(scope, rel_dir, entry.name, *entry[1:]) for entry, _ in files],
+        )
+
+        # Forget subtrees that disappeared (or are now excluded)
+        current = {rel_path for _, rel_path in subdirs}
+        for (path,) in conn.execute(
+            "SELECT path FROM dirs WHERE scope = ? AND parent = ?", (scope, rel_dir)
+        ).fetchall():
+            if path not in current:
+                self._forget_subtree(scope, path)
+
+        # Register new subdirectories without an mtime so they get listed
+        conn.executemany(
+            "INSERT OR IGNORE INTO dirs (scope, path, parent, mtime_ns) "
+            "VALUES (?, ?, ?, NULL)",
+            [(scope, rel_path, rel_dir) for rel_path in current],
+        )
+
+        mtime_ns, now_ns = times
+        racy = now_ns - mtime_ns < RACY_WINDOW_NS
+        conn.execute(
+            "INSERT OR REPLACE INTO dirs (scope, path, parent, mtime_ns) "
+            "VALUES (?, ?, ?, ?)",
+            (scope, rel_dir, self._parent(rel_dir), None if racy else mtime_ns),
+        )
+
+    def _forget_subtree(self, scope: int, rel_path: str):
+        """Delete a directory and everything below it from the state."""
+        prefix = rel_path + "/"
+        for table, column in (("dirs", "path"), ("files", "dir")):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE scope = ? AND "
+                f"({column} = ? OR substr({column}, 1, ?) = ?)",
+                (scope, rel_path, len(prefix), prefix),
+            )
+
+    @staticmethod
+    def _parent(rel_dir: str) -> Optional[str]:
+        """Get the relative path of a directory's parent (None for root)."""
+        if not rel_dir:
+            return None
+        return rel_dir.rpartition("/")[0]
+
+    @staticmethod
+    def _new_counters() -> Dict[str, int]:
+        return {
+            "dirs_listed": 0,
+            "dirs_reused": 0,
+            "files_fresh": 0,
+            "files_unchanged": 0,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
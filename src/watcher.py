@@ -0,0 +1,268 @@
+"""
+Watch mode: organize files as they arrive in the source directory.
+"""
+
+import os
+import queue
+import threading
+import time
+from fnmatch import fnmatch
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+from .file_organizer import FileOrganizer
+from .mover import has_pending
+from .walker import FileEntry, stat_file, walk
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - optional dependency
+    FileSystemEventHandler = object
+    Observer = None
+
+WATCH_BACKENDS = ("auto", "watchdog", "polling")
+
+# Files still being written by browsers and download managers
+TEMPORARY_SUFFIXES = (
+    ".crdownload",
+    ".part",
+    ".partial",
+    ".download",
+    ".opdownload",
+    ".tmp",
+)
+
+
+def is_temporary(name: str) -> bool:
+    """Check whether a file name belongs to an unfinished download."""
+    return name.lower().endswith(TEMPORARY_SUFFIXES)
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Forwards watchdog events for files to the watcher's queue."""
+
+    def __init__(self, events: "queue.Queue[Optional[str]]"):
+        super().__init__()
+        self.events = events
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.events.put(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.events.put(event.src_path)
+
+    def on_moved(self, event):
+        # Downloads are usually renamed from a temporary name when complete
+        if not event.is_directory:
+            self.events.put(event.dest_path)
+
+
+class DirectoryWatcher:
+    """Organizes new files in micro-batches once they stop changing."""
+
+    def __init__(
+        self,
+        organizer: FileOrganizer,
+        create_date_folders: bool = False,
+        settle_seconds: float = 2.0,
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        backend: str = "auto",
+    ):
+        """
+        Initialize directory watcher.
+
+        Args:
+            organizer: Organizer for the watched directory
+            create_date_folders: Whether to create date-based subdirectories
+            settle_seconds: How long a file's size and mtime must stay
+                            unchanged before it is organized
+            batch_size: Maximum number of files organized at once
+            poll_interval: Seconds between directory scans (polling backend)
+            backend: 'watchdog' (inotify and friends), 'polling', or 'auto'
+                     to use watchdog when it is installed
+        """
+        if backend not in WATCH_BACKENDS:
+            raise ValueError(f"Unknown watch backend: {backend}")
+        if backend == "watchdog" and Observer is None:
+            raise ValueError("The watchdog backend requires the watchdog package")
+        if backend == "auto":
+            backend = "watchdog" if Observer is not None else "polling"
+
+        self.organizer = organizer
+        self.directory = os.fspath(organizer.source_dir)
+        self.create_date_folders = create_date_folders
+        self.settle_seconds = settle_seconds
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.backend = backend
+        self.exclude = organizer.config.get_setting("exclude", [])
+        self.batches = 0
+        self.files_organized = 0
+
+        self._events: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stop = threading.Event()
+        # path -> ((size, mtime_ns), time the identity was last seen changing)
+        self._pending: Dict[str, Tuple[Tuple[int, int], float]] = {}
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+
+    def notify(self, path: str):
+        """Report a created or changed file (safe to call from any thread)."""
+        self._events.put(os.fspath(path))
+
+    def stop(self):
+        """Ask a running watcher to return."""
+        self._stop.set()
+        self._events.put(None)
+
+    def run(self):
+        """
+        Watch the directory until stop() is called or Ctrl+C is pressed.
+
+        Files already in the directory are organized first.
+        """
+        if has_pending(self.organizer.intent_log):
+            raise ValueError(
+                f"An interrupted run left unfinished moves in "
+                f"{self.organizer.intent_log}; run 'recover' first"
+            )
+
+        observer = None
+        if self.backend == "watchdog":
+            observer = Observer()
+            observer.schedule(_EventHandler(self._events), self.directory)
+            observer.start()
+
+        self._scan()
+        try:
+            while not self._stop.is_set():
+                self._wait()
+                self.process_once()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self.organizer.logger.save()
+
+    def process_once(self, now: float = None) -> int:
+        """
+        Take in queued events and organize every file that has settled.
+
+        Args:
+            now: Current monotonic time (default: time.monotonic())
+
+        Returns:
+            Number of files organized
+        """
+        now = time.monotonic() if now is None else now
+        if self.backend == "polling":
+            self._scan()
+        self._drain(now)
+
+        ready = self._settled(now)
+        metrics.set_queue_depth(len(self._pending) + len(ready))
+        organized = 0
+        for start in range(0, len(ready), self.batch_size):
+            organized += self._organize(ready[start : start + self.batch_size])
+        metrics.set_queue_depth(len(self._pending))
+        if ready:
+            metrics.publish()
+        return organized
+
+    def _wait(self):
+        """Sleep until there may be work, without spinning while idle."""
+        if self.backend == "polling":
+            self._stop.wait(self.poll_interval)
+            return
+
+        # Block until an event arrives; with files settling, wake up in time
+        # to check them
+        timeout = self.settle_seconds / 2 if self._pending else None
+        try:
+            path = self._events.get(timeout=timeout)
+        except queue.Empty:
+            return
+        if path is not None:
+            self._track(path, time.monotonic())
+
+    def _drain(self, now: float):
+        """Move queued event paths into the pending set."""
+        while True:
+            try:
+                path = self._events.get_nowait()
+            except queue.Empty:
+                return
+            if path is not None:
+                self._track(path, now)
+
+    def _scan(self):
+        """List the directory and queue new or changed files."""
+        current = {}
+        for entry in walk(
+            self.directory,
+            max_depth=0,
+            exclude=self.exclude,
+            symlinks=self.organizer.config.get_setting("symlinks", "files"),
+        ):
+            identity = (entry.size, entry.mtime_ns)
+            current[entry.path] = identity
+            if self._snapshot.get(entry.path) != identity:
+                self.notify(entry.path)
+        self._snapshot = current
+
+    def _track(self, path: str, now: float):
+        """Start or restart the settle timer of a file."""
+        if os.path.dirname(path) != self.directory:
+            # Files moved into category folders, or nested directories
+            return
+        name = os.path.basename(path)
+        if is_temporary(name) or any(fnmatch(name, p) for p in self.exclude):
+            return
+
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            self._pending.pop(path, None)
+            return
+
+        identity = (stat_result.st_size, stat_result.st_mtime_ns)
+        previous = self._pending.get(path)
+        if previous is None or previous[0] != identity:
+            self._pending[path] = (identity, now)
+
+    def _settled(self, now: float) -> List[FileEntry]:
+        """Collect the pending files whose size and mtime stopped changing."""
+        ready = []
+        for path, (identity, since) in list(self._pending.items()):
+            try:
+                entry = stat_file(path)
+            except OSError:
+                # Deleted or renamed before it settled
+                del self._pending[path]
+                continue
+
+            if (entry.size, entry.mtime_ns) != identity:
+                self._pending[path] = ((entry.size, entry.mtime_ns), now)
+            elif now - since >= self.settle_seconds:
+                del self._pending[path]
+                ready.append(entry)
+        return ready
+
+    def _organize(self, entries: List[FileEntry]) -> int:
+        """Organize one micro-batch of settled files."""
+        stats = self.organizer.organize_files(entries, self.create_date_folders)
+        organized = stats["renamed"] + stats["copied"]
+        if self.organizer.dry_run:
+            organized = len(entries)
+
+        self.batches += 1
+        self.files_organized += organized
+        # Keep the session summary in the log current between batches, and
+        # start a new session once the log is due for rotation
+        self.organizer.logger.save(rotate=True)
+        return organized
@@ -0,0 +1,174 @@
+"""
+Unit tests for the asyncio execution mode.
+"""
+
+import asyncio
+import errno
+import os
+import threading
+import time
+import pytest
+
+from src import mover
+from src.async_io import AsyncFileSystem, MountLimits
+from src.duplicate_cleaner import DuplicateCleaner
+from src.file_organizer import FileOrganizer
+from src.hashing import HashExecutor
+from src.logger import OrganizerLogger
+from src.mover import MoveExecutor, MovePlan
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """Create a directory with files for several categories and duplicates."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.jpg", "d.zip", "e.unknownext"):
+        (directory / name).write_text(f"content of {name}")
+    (directory / "copy.pdf").write_text("content of a.pdf")
+    return directory
+
+
+@pytest.fixture
+def logger(tmp_path):
+    """Logger writing next to the test directory."""
+    return OrganizerLogger(str(tmp_path / "log.json"))
+
+
+def test_mount_limits(tmp_path):
+    """Test per-mount limits, keyed by the device of the configured path."""
+    limits = MountLimits(default=4, mounts={str(tmp_path): 32})
+    assert limits.device_limit(os.stat(tmp_path).st_dev) == 32
+    assert limits.device_limit(None) == 4
+    assert limits.max_workers == 36
+
+    # Unmounted shares are ignored
+    missing = MountLimits(mounts={str(tmp_path / "missing"): 2})
+    assert missing.device_limit(os.stat(tmp_path).st_dev) == 16
+
+
+def test_mount_limits_from_settings():
+    """Test building limits from the io_concurrency setting."""
+    limits = MountLimits.from_settings({"default": 3, "mounts": None})
+    assert limits.default == 3
+    assert limits.mounts == {}
+    assert MountLimits.from_settings(None).default == 16
+
+    with pytest.raises(ValueError):
+        MountLimits.from_settings({"per_mount": 3})
+    with pytest.raises(ValueError):
+        MountLimits(default=0)
+
+
+def test_calls_are_bounded_per_device():
+    """Test that no more calls than the device's limit run at once."""
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def slow_call():
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.01)
+        with lock:
+            running["now"] -= 1
+
+    async def run_all(fs):
+        await asyncio.gather(*(fs.run(None, slow_call) for _ in range(20)))
+
+    with AsyncFileSystem(MountLimits(default=3)) as fs:
+        asyncio.run(run_all(fs))
+        # Semaphores are recreated for a new event loop
+        asyncio.run(run_all(fs))
+
+    assert running["peak"] == 3
+
+
+def test_stat_files_returns_errors_in_place(source_dir):
+    """Test that files which cannot be stat'ed yield their error."""
+    paths = [str(source_dir / "a.pdf"), str(source_dir / "gone.pdf")]
+    with AsyncFileSystem() as fs:
+        results = asyncio.run(fs.stat_files(paths))
+
+    assert results[0].size == len("content of a.pdf")
+    assert isinstance(results[1], FileNotFoundError)
+
+
+def test_organize_async(source_dir, logger):
+    """Test that the async mode organizes like the serial one."""
+    (source_dir / "Documents").mkdir()
+    (source_dir / "Documents" / "a.pdf").write_text("already there")
+
+    organizer = FileOrganizer(source_dir, logger=logger)
+    stats = asyncio.run(organizer.organize_async(limits=MountLimits(default=2)))
+
+    assert stats["renamed"] == 6
+    assert stats["errors"] == 0
+    assert (source_dir / "Documents" / "a_1.pdf").read_text() == "content of a.pdf"
+    assert (source_dir / "Images" / "c.jpg").exists()
+    assert (source_dir / "Others" / "e.unknownext").exists()
+    assert not (source_dir / "b.pdf").exists()
+    assert not os.path.exists(organizer.intent_log)
+    assert logger.get_summary()["by_status"] == {"success": 6}
+
+
+def test_organize_async_dry_run(source_dir, logger):
+    """Test that a dry run in async mode moves nothing."""
+    organizer = FileOrganizer(source_dir, logger=logger, dry_run=True)
+    asyncio.run(organizer.organize_async())
+
+    assert (source_dir / "a.pdf").exists()
+    assert not (source_dir / "Documents").exists()
+    assert logger.get_summary()["by_status"] == {"dry_run": 6}
+
+
+def test_execute_async_copies_across_devices(source_dir, logger, monkeypatch):
+    """Test the copy-then-delete path of the async executor."""
+
+    def cross_device_rename(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(mover.os, "rename", cross_device_rename)
+    plan = MovePlan()
+    for name in ("a.pdf", "b.pdf"):
+        plan.add(source_dir / name, source_dir / "pdf" / name, "pdf")
+
+    async def run():
+        with AsyncFileSystem() as fs:
+            executor = MoveExecutor(logger.log_file + ".intent", logger)
+            return await executor.execute_async(plan, fs)
+
+    stats = asyncio.run(run())
+    assert stats == {"renamed": 0, "copied": 2, "errors": 0, "directories": 1}
+    assert (source_dir / "pdf" / "b.pdf").read_text() == "content of b.pdf"
+    assert not (source_dir / "b.pdf").exists()
+    assert not list(source_dir.rglob("*.partial"))
+
+
+def test_find_duplicates_async(source_dir, logger):
+    """Test that the async mode finds the same duplicates."""
+    cleaner = DuplicateCleaner(source_dir, logger, mount_limits=MountLimits(default=2))
+    expected = cleaner.find_duplicates()
+    duplicates = asyncio.run(cleaner.find_duplicates_async())
+
+    assert duplicates.keys() == expected.keys()
+    assert sorted(next(iter(duplicates.values()))) == sorted(
+        [source_dir / "a.pdf", source_dir / "copy.pdf"]
+    )
+    # The wider hashing executor is only used during the async run
+    assert cleaner.executor.workers == 1
+
+    removed = asyncio.run(cleaner.clean_duplicates_async(keep_strategy="shortest"))
+    assert removed == 1
+    assert (source_dir / "a.pdf").exists()
+    assert not (source_dir / "copy.pdf").exists()
+
+
+def test_hash_executor_respects_mount_limits(tmp_path):
+    """Test that hashing concurrency is capped by the mount's limit."""
+    device = os.stat(tmp_path).st_dev
+    limits = MountLimits(default=8, mounts={str(tmp_path): 2})
+    executor = HashExecutor(workers=4, rotational_workers=4, mount_limits=limits)
+
+    assert executor.device_limit(device) == 2
+    assert executor.device_limit(None) == 4
@@ -0,0 +1,93 @@
+"""
+Unit tests for the benchmark tree generator and result comparison.
+"""
+
+import hashlib
+import os
+import pytest
+
+from benchmarks.bench_suite import compare_results
+from benchmarks.synthetic_tree import TreeSpec, generate_tree, plan_tree
+
+
+def tree_digest(root):
+    """Hash the names and contents of every file below a directory."""
+    digest = hashlib.sha256()
+    for directory, _, names in sorted(os.walk(root)):
+        for name in sorted(names):
+            path = os.path.join(directory, name)
+            digest.update(os.path.relpath(path, root).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def test_generated_tree_is_deterministic(tmp_path):
+    """Test that one spec always produces byte-identical trees."""
+    spec = TreeSpec(files=200, depth=2, fanout=3, seed=7)
+    first = generate_tree(tmp_path / "first", spec)
+    second = generate_tree(tmp_path / "second", spec)
+
+    assert first == second
+    assert tree_digest(tmp_path / "first") == tree_digest(tmp_path / "second")
+
+    generate_tree(tmp_path / "other", spec._replace(seed=8))
+    assert tree_digest(tmp_path / "other") != tree_digest(tmp_path / "first")
+
+
+def test_tree_shape_follows_spec(tmp_path):
+    """Test file count, duplicates, depth, size cap and extension mix."""
+    spec = TreeSpec(
+        files=300,
+        duplicate_ratio=0.3,
+        depth=1,
+        fanout=2,
+        max_size=10000,
+        extensions={".pdf": 1, ".jpg": 1},
+    )
+    summary = generate_tree(tmp_path, spec)
+    files = plan_tree(spec)
+
+    assert summary["files"] == 300
+    assert 60 <= summary["duplicates"] <= 120
+    assert summary["duplicates"] == 300 - len({content for _, _, content in files})
+    assert {os.path.dirname(path) for path, _, _ in files} <= {
+        "",
+        "dir_0_0",
+        "dir_0_1",
+    }
+    assert {os.path.splitext(path)[1] for path, _, _ in files} == {".pdf", ".jpg"}
+    assert max(size for _, size, _ in files) <= 10000
+
+    # Copies share their original's size and contents
+    by_content = {}
+    for path, size, content in files:
+        data = (tmp_path / path).read_bytes()
+        assert len(data) == size
+        assert by_content.setdefault(content, data) == data
+
+
+def test_invalid_spec():
+    """Test that impossible specs are rejected."""
+    with pytest.raises(ValueError):
+        plan_tree(TreeSpec(duplicate_ratio=1.0))
+    with pytest.raises(ValueError):
+        plan_tree(TreeSpec(files=-1))
+
+
+def test_compare_results_flags_regressions():
+    """Test that slowdowns beyond the threshold are reported."""
+    baseline = {"benchmarks": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    current = {
+        "benchmarks": {
+            "a": {"median": 1.05},
+            "b": {"median": 1.5},
+            "new": {"median": 2.0},
+        }
+    }
+    comparison = {item["name"]: item for item in compare_results(baseline, current)}
+
+    assert set(comparison) == {"a", "b"}
+    assert not comparison["a"]["regressed"]
+    assert comparison["b"]["regressed"]
+    assert comparison["b"]["ratio"] == pytest.approx(1.5)
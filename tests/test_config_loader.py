@@ -99,3 +99,61 @@ def test_create_default_config(tmp_path):
 
     assert "categories" in config_data
     assert "settings" in config_data
+
+
+def test_conflicting_extensions_rejected(tmp_path):
+    """Test that an extension in two categories fails at load time."""
+    config_file = tmp_path / "conflict.yaml"
+    config_data = {
+        "categories": {"Docs": [".txt", ".md"], "Notes": [".TXT"]},
+        "settings": {},
+    }
+    with open(config_file, "w", encoding="utf-8") as f:
+        yaml.dump(config_data, f)
+
+    with pytest.raises(ValueError, match=".txt"):
+        ConfigLoader(str(config_file))
+
+
+def test_set_category_rebuilds_index():
+    """Test that category changes are visible to lookups."""
+    config = ConfigLoader()
+    config.set_category("Fonts", [".ttf", ".OTF"])
+
+    assert config.get_category_for_extension(".otf") == "Fonts"
+
+    with pytest.raises(ValueError):
+        config.set_category("Broken", [".pdf"])
+    assert "Broken" not in config.get_all_categories()
+    assert config.get_category_for_extension(".pdf") == "Documents"
+
+
+def test_reload_picks_up_file_changes(temp_config_file):
+    """Test that reload re-reads the file and rebuilds the index."""
+    config = ConfigLoader(temp_config_file)
+    assert config.get_category_for_extension(".new") == "Others"
+
+    with open(temp_config_file, "w", encoding="utf-8") as f:
+        yaml.dump({"categories": {"Fresh": [".new"]}, "settings": {}}, f)
+    config.reload()
+
+    assert config.get_category_for_extension(".new") == "Fresh"
+
+
+def test_failed_reload_keeps_current_config(temp_config_file):
+    """Test that a conflicting file leaves config and lookups unchanged."""
+    config = ConfigLoader(temp_config_file)
+
+    with open(temp_config_file, "w", encoding="utf-8") as f:
+        yaml.dump({"categories": {"A": [".new"], "B": [".new"]}, "settings": {}}, f)
+    with pytest.raises(ValueError):
+        config.reload()
+
+    assert config.get_all_categories() == ["TestDocs", "TestImages"]
+    assert config.get_category_for_extension(".test") == "TestDocs"
+
+
+def test_default_config_not_shared():
+    """Test that changing one loader does not leak into the defaults."""
+    ConfigLoader().set_category("Documents", [".only"])
+    assert ConfigLoader().get_category_for_extension(".pdf") == "Documents"
@@ -0,0 +1,117 @@
+"""
+Unit tests for magic-byte content type detection.
+"""
+
+import io
+import zipfile
+import pytest
+
+from src.content_type import (
+    CACHE_KIND,
+    ContentTypeDetector,
+    detect_extension,
+)
+from src.file_organizer import FileOrganizer
+from src.hash_cache import HashCache
+from src.logger import OrganizerLogger
+from src.walker import stat_file
+
+
+def zip_bytes(first_member):
+    """Build a small ZIP archive whose first member has the given name."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr(first_member, "application/epub+zip")
+        archive.writestr("other.txt", "x")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    "header,extension",
+    [
+        (b"%PDF-1.7\n", ".pdf"),
+        (b"\x89PNG\r\n\x1a\n" + b"\0" * 16, ".png"),
+        (b"\xff\xd8\xff\xe0\0\x10JFIF", ".jpg"),
+        (b"\0\0\0\x18ftypmp42\0\0\0\0", ".mp4"),
+        (b"\0\0\0\x14ftypqt  \0\0\0\0", ".mov"),
+        (b"\x7fELF\x02\x01\x01", ".appimage"),
+        (b"MZ\x90\0", ".exe"),
+        (b"\x1f\x8b\x08\0", ".gz"),
+        (b"\0" * 257 + b"ustar\x0000", ".tar"),
+        (b"ID3\x04\0", ".mp3"),
+        (b"plain text", None),
+        (b"", None),
+    ],
+)
+def test_signatures(header, extension):
+    """Test recognition of common formats from their first bytes."""
+    assert detect_extension(header) == extension
+
+
+def test_zip_based_formats():
+    """Test that EPUB is told apart from a plain ZIP archive."""
+    assert detect_extension(zip_bytes("mimetype")) == ".epub"
+    assert detect_extension(zip_bytes("readme.txt")) == ".zip"
+    assert detect_extension(zip_bytes("word/document.xml")) == ".docx"
+
+
+def test_detections_are_cached(tmp_path):
+    """Test that a rerun takes detections from the cache, not the file."""
+    path = tmp_path / "download"
+    path.write_bytes(b"%PDF-1.4\n")
+    unknown = tmp_path / "notes"
+    unknown.write_bytes(b"just text")
+
+    cache = HashCache(str(tmp_path / "cache.db"))
+    first = ContentTypeDetector(cache)
+    assert first.detect(stat_file(str(path))) == ".pdf"
+    assert first.detect(stat_file(str(unknown))) is None
+    assert first.headers_read == 2
+    first.flush()
+
+    second = ContentTypeDetector(cache)
+    assert second.detect(stat_file(str(path))) == ".pdf"
+    assert second.detect(stat_file(str(unknown))) is None
+    assert second.headers_read == 0
+    assert cache.stats()["by_kind"] == {CACHE_KIND: 2}
+
+    # A rewritten file is inspected again
+    path.write_bytes(b"\x89PNG\r\n\x1a\n-changed")
+    assert second.detect(stat_file(str(path))) == ".png"
+    assert second.headers_read == 1
+    cache.close()
+
+
+def test_organizer_uses_detection_for_unknown_extensions(tmp_path):
+    """Test that only files without a known extension are sniffed."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    (directory / "invoice").write_bytes(b"%PDF-1.4\n")
+    (directory / "photo.download").write_bytes(b"\xff\xd8\xff\xe0")
+    # Known extensions win over the content
+    (directory / "song.mp3").write_bytes(b"%PDF-1.4\n")
+    (directory / "mystery").write_bytes(b"nothing recognizable")
+
+    detector = ContentTypeDetector()
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    FileOrganizer(str(directory), logger=logger, content_types=detector).organize()
+
+    assert (directory / "Documents" / "invoice").exists()
+    assert (directory / "Images" / "photo.download").exists()
+    assert (directory / "Audio" / "song.mp3").exists()
+    assert (directory / "Others" / "mystery").exists()
+    assert detector.headers_read == 3
+
+
+def test_detection_is_off_by_default(tmp_path):
+    """Test that extensionless files stay in Others without the setting."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    (directory / "invoice").write_bytes(b"%PDF-1.4\n")
+
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    organizer = FileOrganizer(str(directory), logger=logger)
+    assert organizer.content_types is None
+    organizer.organize()
+
+    assert (directory / "Others" / "invoice").exists()
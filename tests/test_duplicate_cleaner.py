@@ -5,7 +5,10 @@ Unit tests for DuplicateCleaner class.
 import pytest
 import shutil
 from pathlib import Path
-from src.duplicate_cleaner import DuplicateCleaner
+from src import linking
+from src.duplicate_cleaner import DuplicateCleaner, DuplicateFile, choose_keep
+from src.file_organizer import FileOrganizer
+from src.logger import OrganizerLogger
 
 
 @pytest.fixture
@@ -117,3 +120,195 @@ def test_invalid_directory():
     """Test initialization with non-existent directory."""
     with pytest.raises(ValueError):
         DuplicateCleaner("/nonexistent/directory")
+
+
+def test_staged_scan_skips_unique_sizes(temp_test_dir):
+    """Test that files with a unique size are never read."""
+    (temp_test_dir / "big_a.bin").write_bytes(b"a" * 20000)
+    (temp_test_dir / "big_b.bin").write_bytes(b"a" * 19999 + b"b")
+    (temp_test_dir / "lonely.bin").write_bytes(b"x" * 12345)
+
+    cleaner = DuplicateCleaner(str(temp_test_dir))
+    duplicates = cleaner.find_duplicates(recursive=False)
+
+    assert len(duplicates) == 1
+    stages = cleaner.scan_stats
+    assert stages["size"]["files_in"] == 7
+    assert stages["size"]["bytes_avoided"] >= 12345
+    # Same size, different tail: separated by the edge stage
+    assert stages["edge"]["bytes_avoided"] > 0
+    assert stages["full"]["files_in"] == 0
+
+
+def test_staged_scan_full_hash_for_matching_edges(tmp_path):
+    """Test that files matching on both edges are fully hashed."""
+    middle_a = b"a" * 10000
+    middle_b = b"b" * 10000
+    edge = b"e" * DuplicateCleaner.EDGE_SIZE
+    (tmp_path / "one.bin").write_bytes(edge + middle_a + edge)
+    (tmp_path / "two.bin").write_bytes(edge + middle_b + edge)
+    (tmp_path / "three.bin").write_bytes(edge + middle_a + edge)
+
+    cleaner = DuplicateCleaner(str(tmp_path))
+    duplicates = cleaner.find_duplicates(recursive=False)
+
+    assert len(duplicates) == 1
+    assert len(list(duplicates.values())[0]) == 2
+    assert cleaner.scan_stats["full"]["files_in"] == 3
+    assert cleaner.scan_stats["full"]["files_out"] == 2
+
+
+def test_find_duplicates_exclude(temp_test_dir):
+    """Test that excluded files are not considered."""
+    cleaner = DuplicateCleaner(str(temp_test_dir), exclude=["file3.txt"])
+    duplicates = cleaner.find_duplicates(recursive=False)
+
+    assert len(list(duplicates.values())[0]) == 2
+
+
+def test_find_duplicates_max_depth(temp_test_dir):
+    """Test that max_depth limits the recursive scan."""
+    nested = temp_test_dir / "a" / "b"
+    nested.mkdir(parents=True)
+    (nested / "deep_copy.txt").write_text("This is unique content")
+
+    shallow = DuplicateCleaner(str(temp_test_dir), max_depth=1)
+    deep = DuplicateCleaner(str(temp_test_dir))
+
+    assert len(shallow.find_duplicates()) == 1
+    assert len(deep.find_duplicates()) == 2
+
+
+def test_hardlink_mode_keeps_every_path(temp_test_dir, tmp_path):
+    """Test that duplicates become hardlinks of the kept file."""
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    cleaner = DuplicateCleaner(str(temp_test_dir), logger, mode="hardlink")
+    assert cleaner.clean_duplicates(recursive=False) == 2
+
+    names = sorted(p.name for p in temp_test_dir.iterdir())
+    assert names == ["file1.txt", "file2.txt", "file3.txt", "unique.txt"]
+    inodes = {(temp_test_dir / f"file{i}.txt").stat().st_ino for i in (1, 2, 3)}
+    assert len(inodes) == 1
+    operations = logger.read_operations()
+    assert [op["type"] for op in operations] == ["link_duplicate"] * 2
+    assert operations[0]["mode"] == "hardlink"
+
+    # Already linked: nothing is left to replace
+    assert cleaner.clean_duplicates(recursive=False) == 0
+
+
+def test_undo_turns_links_back_into_copies(temp_test_dir, tmp_path):
+    """Test that undoing a hardlink run gives every path its own file."""
+    log_file = str(tmp_path / "log.json")
+    DuplicateCleaner(
+        str(temp_test_dir), OrganizerLogger(log_file), mode="hardlink"
+    ).clean_duplicates(recursive=False)
+
+    organizer = FileOrganizer(str(temp_test_dir), logger=OrganizerLogger(log_file))
+    organizer.undo_last_session()
+
+    paths = [temp_test_dir / f"file{i}.txt" for i in (1, 2, 3)]
+    assert len({path.stat().st_ino for path in paths}) == 3
+    assert {path.read_text() for path in paths} == {"This is duplicate content"}
+
+
+def test_failed_link_leaves_duplicate(temp_test_dir, tmp_path, monkeypatch):
+    """Test that a duplicate stays in place when it cannot be linked."""
+    monkeypatch.setattr(linking, "fcntl", None)
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    cleaner = DuplicateCleaner(str(temp_test_dir), logger, mode="reflink")
+
+    assert cleaner.clean_duplicates(recursive=False) == 0
+    assert len(list(temp_test_dir.iterdir())) == 4
+    operations = logger.read_operations()
+    assert {op["status"] for op in operations} == {"error"}
+
+
+def test_failed_copystat_removes_clone(temp_test_dir, monkeypatch):
+    """Test that no temporary clone is left when its metadata cannot be set."""
+    monkeypatch.setattr(linking, "reflink", shutil.copyfile)
+
+    def fail(*args):
+        raise FileNotFoundError("duplicate removed meanwhile")
+
+    monkeypatch.setattr(linking.shutil, "copystat", fail)
+    duplicate = temp_test_dir / "file2.txt"
+    with pytest.raises(OSError):
+        linking.replace_with_link(temp_test_dir / "file1.txt", duplicate, "reflink")
+
+    assert duplicate.exists()
+    assert not list(temp_test_dir.glob(f"{linking.TEMP_PREFIX}*"))
+
+
+def test_invalid_mode(temp_test_dir):
+    """Test that unknown duplicate modes are rejected."""
+    with pytest.raises(ValueError):
+        DuplicateCleaner(str(temp_test_dir), mode="symlink")
+
+
+def test_keep_strategies_use_scanned_records():
+    """Test every keep strategy on records of files that do not exist."""
+    files = [
+        DuplicateFile("/data/inbox/report.pdf", 10, 300, 1, 1, "h"),
+        DuplicateFile("/data/archive/2023/q1/report_copy.pdf", 10, 100, 2, 1, "h"),
+        DuplicateFile("/data/keep/r.pdf", 10, 200, 3, 1, "h"),
+    ]
+    assert choose_keep(files, "newest") is files[0]
+    assert choose_keep(files, "oldest") is files[1]
+    assert choose_keep(files, "shortest") is files[2]
+    assert choose_keep(files, "largest-path-depth") is files[1]
+
+    preferred = ["/data/keep", "/data/archive"]
+    assert choose_keep(files, "preferred-directory", preferred) is files[2]
+    assert choose_keep(files, "preferred-directory", ["/data/archive"]) is files[1]
+    assert choose_keep(files, "preferred-directory", ["/nowhere"]) is files[0]
+    with pytest.raises(ValueError):
+        choose_keep(files, "random")
+
+
+def test_clean_and_report_do_not_stat_again(temp_test_dir, tmp_path, monkeypatch):
+    """Test that sets found by the scan need no further stat calls."""
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    cleaner = DuplicateCleaner(str(temp_test_dir), logger)
+    duplicates = cleaner.find_duplicate_files(recursive=False)
+
+    def no_stat(*args, **kwargs):
+        raise AssertionError("stat called")
+
+    monkeypatch.setattr(Path, "stat", no_stat)
+    report = cleaner._build_report(duplicates)
+    assert report["wasted_space_bytes"] == 2 * len("This is duplicate content")
+    assert cleaner._remove_duplicates(duplicates, "oldest") == 2
+
+
+def test_preferred_directory_strategy(temp_test_dir):
+    """Test that the copy in a preferred directory survives."""
+    keep_dir = temp_test_dir / "keep"
+    keep_dir.mkdir()
+    (keep_dir / "file4.txt").write_text("This is duplicate content")
+
+    with pytest.raises(ValueError):
+        DuplicateCleaner(str(temp_test_dir)).clean_duplicates(
+            keep_strategy="preferred-directory"
+        )
+
+    cleaner = DuplicateCleaner(
+        str(temp_test_dir), preferred_directories=[str(keep_dir)]
+    )
+    assert cleaner.clean_duplicates(keep_strategy="preferred-directory") == 3
+    assert (keep_dir / "file4.txt").exists()
+    assert not (temp_test_dir / "file1.txt").exists()
+
+
+def test_multiple_target_directories(temp_test_dir, tmp_path):
+    """Test that duplicates are found and cleaned across target roots."""
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "copy.txt").write_text("This is unique content")
+
+    cleaner = DuplicateCleaner(str(temp_test_dir), target_directories=[str(other)])
+    duplicates = cleaner.find_duplicates()
+    assert sorted(len(paths) for paths in duplicates.values()) == [2, 3]
+
+    assert cleaner.clean_duplicates(keep_strategy="shortest") == 3
+    assert (other / "copy.txt").exists() != (temp_test_dir / "unique.txt").exists()
@@ -0,0 +1,118 @@
+"""
+Unit tests for the columnar file index.
+"""
+
+import hashlib
+import os
+import random
+from collections import defaultdict
+
+import pytest
+
+from src.duplicate_cleaner import DuplicateCleaner
+from src.file_index import FileIndex
+from src.walker import FileEntry
+
+
+def synthetic_entries(count, seed=1):
+    """Build entries spread over a few directories, like a scan result."""
+    rng = random.Random(seed)
+    directories = [f"/downloads/dir_{index}/" for index in range(20)]
+    return [
+        FileEntry(
+            f"{rng.choice(directories)}file_{index:07d}.pdf",
+            rng.randint(0, 10**7),
+            rng.randint(0, 2**62),
+            rng.randint(1, 2**40),
+            rng.choice([2049, 2050]),
+        )
+        for index in range(count)
+    ]
+
+
+def test_entries_round_trip():
+    """Test that every field of every entry comes back unchanged."""
+    entries = [
+        FileEntry("/downloads/report.pdf", 10, 20, 30, 1),
+        FileEntry("relative.txt", 0, 0, 0, 0),
+        FileEntry("/downloads/sub/päper.pdf", 2**40, -5, 2**64 - 2, 7),
+        FileEntry(os.path.join("a", "b", os.fsdecode(b"\xffname")), 1, 1, 1, 1),
+        FileEntry("/downloads/unstatted.bin"),
+    ]
+    index = FileIndex.from_entries(entries)
+
+    assert len(index) == len(entries)
+    assert list(index) == entries
+    assert index[2] == entries[2]
+    assert index.path(3) == entries[3].path
+
+
+def test_directories_are_interned():
+    """Test that a directory on one device is stored once."""
+    index = FileIndex.from_entries(
+        FileEntry(f"/downloads/file_{i}", i, 0, i, 1) for i in range(100)
+    )
+    index.add(FileEntry("/downloads/file_x", 1, 0, 1, 2))
+
+    assert len(set(index.directory_ids)) == 2
+    assert index[100].device == 2
+
+
+def test_rows_by_shared_size():
+    """Test that grouping agrees with an exact grouping by size."""
+    rng = random.Random(3)
+    choices = [0, 4096, 2**20, 2**33]
+    sizes = [rng.choice(choices + [rng.randint(0, 10**6)]) for _ in range(3000)]
+    index = FileIndex.from_entries(
+        FileEntry(f"/d/{row}", size, 0, row, 1) for row, size in enumerate(sizes)
+    )
+
+    expected = defaultdict(list)
+    for row, size in enumerate(sizes):
+        expected[size].append(row)
+    expected = {size: rows for size, rows in expected.items() if len(rows) > 1}
+    assert index.rows_by_shared_size() == expected
+    assert FileIndex().rows_by_shared_size() == {}
+
+
+def test_binary_digests():
+    """Test storing digests, including rows added afterwards."""
+    index = FileIndex.from_entries(synthetic_entries(3))
+    digest = hashlib.sha256(b"content").digest()
+    assert index.digest(0) is None
+
+    index.set_digest(1, digest)
+    index.add(FileEntry("/downloads/late.pdf", 1, 1, 1, 1))
+    index.set_digest(3, digest)
+
+    assert [index.digest(row) for row in range(4)] == [None, digest, None, digest]
+    with pytest.raises(ValueError):
+        index.set_digest(0, b"short")
+
+
+def test_under_100_bytes_per_file():
+    """Test the footprint of the columns, digests included."""
+    entries = synthetic_entries(20000)
+    index = FileIndex.from_entries(entries)
+    for row in range(len(index)):
+        index.set_digest(row, hashlib.sha256(str(row).encode()).digest())
+
+    assert index.nbytes() / len(index) < 100
+
+
+def test_cleaner_keeps_binary_digests(tmp_path):
+    """Test that the scanned files and their digests end up in the index."""
+    (tmp_path / "a.txt").write_text("same")
+    (tmp_path / "b.txt").write_text("same")
+    (tmp_path / "c.txt").write_text("unique content")
+
+    cleaner = DuplicateCleaner(str(tmp_path))
+    duplicates = cleaner.find_duplicates(recursive=False)
+    (file_hash,) = duplicates
+
+    index = cleaner.index
+    assert len(index) == 3
+    digests = {entry.path: index.digest(row) for row, entry in enumerate(index)}
+    digests = {os.path.basename(path): digest for path, digest in digests.items()}
+    assert digests["a.txt"] == digests["b.txt"] == bytes.fromhex(file_hash)
+    assert digests["c.txt"] is None
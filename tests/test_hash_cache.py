@@ -0,0 +1,101 @@
+"""
+Unit tests for HashCache class.
+"""
+
+import os
+import pytest
+from src.hash_cache import HashCache, stat_identity
+from src.duplicate_cleaner import DuplicateCleaner
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a hash cache in a temporary directory."""
+    hash_cache = HashCache(str(tmp_path / "cache.db"))
+    yield hash_cache
+    hash_cache.close()
+
+
+def test_put_and_get(cache, tmp_path):
+    """Test storing and retrieving a hash."""
+    file_path = tmp_path / "file.txt"
+    file_path.write_text("content")
+    stat_result = stat_identity(os.stat(file_path))
+
+    assert cache.get(stat_result, "sha256") is None
+    cache.put(stat_result, "sha256", "abc123")
+
+    assert cache.get(stat_result, "sha256") == "abc123"
+    assert cache.get(stat_result, "other") is None
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+
+def test_entry_invalidated_when_file_changes(cache, tmp_path):
+    """Test that a changed size or mtime discards the entry."""
+    file_path = tmp_path / "file.txt"
+    file_path.write_text("content")
+    cache.put(stat_identity(os.stat(file_path)), "sha256", "abc123")
+
+    file_path.write_text("changed content")
+    os.utime(file_path, ns=(1, 1))
+
+    assert cache.get(stat_identity(os.stat(file_path)), "sha256") is None
+    assert cache.count() == 0
+
+
+def test_prune_evicts_least_recently_used(cache, tmp_path):
+    """Test LRU eviction above the size cap."""
+    stats = []
+    for i in range(3):
+        file_path = tmp_path / f"file{i}.txt"
+        file_path.write_text(str(i))
+        stats.append(stat_identity(os.stat(file_path)))
+        cache.put(stats[-1], "sha256", str(i))
+
+    # Use the first entry so it becomes the most recently used
+    cache.flush()
+    cache.get(stats[0], "sha256")
+
+    assert cache.prune(max_entries=1) == 2
+    assert cache.get(stats[0], "sha256") == "0"
+    assert cache.get(stats[1], "sha256") is None
+
+
+def test_path_for_log(tmp_path):
+    """Test that the default cache lives next to the log."""
+    log_file = tmp_path / "logs" / "organizer_log.json"
+    expected = tmp_path / "logs" / HashCache.DEFAULT_FILENAME
+    assert HashCache.path_for_log(str(log_file)) == str(expected)
+
+
+def test_cleaner_rescan_reads_nothing(cache, tmp_path):
+    """Test that a rescan of unchanged files is served from the cache."""
+    data = b"x" * 50000
+    (tmp_path / "a.bin").write_bytes(data)
+    (tmp_path / "b.bin").write_bytes(data)
+
+    first = DuplicateCleaner(str(tmp_path), hash_cache=cache)
+    assert len(first.find_duplicates(recursive=False)) == 1
+    assert first.bytes_hashed > 0
+
+    second = DuplicateCleaner(str(tmp_path), hash_cache=cache)
+    assert len(second.find_duplicates(recursive=False)) == 1
+    assert second.bytes_hashed == 0
+    assert second.scan_stats["full"]["bytes_avoided"] == 2 * len(data)
+
+
+def test_cache_entries_are_per_algorithm(cache, tmp_path):
+    """Test that hashes are never reused across algorithms."""
+    data = b"y" * 50000
+    (tmp_path / "a.bin").write_bytes(data)
+    (tmp_path / "b.bin").write_bytes(data)
+
+    DuplicateCleaner(str(tmp_path), hash_cache=cache).find_duplicates(False)
+    cleaner = DuplicateCleaner(
+        str(tmp_path), hash_cache=cache, hash_algorithm="blake2b"
+    )
+    cleaner.find_duplicates(recursive=False)
+
+    assert cleaner.bytes_hashed > 0
+    assert "blake2b" in cache.stats()["by_kind"]
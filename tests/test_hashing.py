@@ -0,0 +1,155 @@
+"""
+Unit tests for the hashing module.
+"""
+
+import hashlib
+import pytest
+from src.hashing import (
+    HashExecutor,
+    adaptive_block_size,
+    hash_file,
+    hash_file_edges,
+)
+from src.duplicate_cleaner import DuplicateCleaner
+
+
+@pytest.fixture
+def sample_files(tmp_path):
+    """Create files with distinct contents."""
+    paths = []
+    for i in range(12):
+        file_path = tmp_path / f"file{i}.bin"
+        file_path.write_bytes(bytes([i]) * (1000 + i))
+        paths.append(file_path)
+    return paths
+
+
+def test_hash_file(tmp_path):
+    """Test full-file hashing against hashlib."""
+    file_path = tmp_path / "data.bin"
+    data = b"0123456789" * 10000
+    file_path.write_bytes(data)
+
+    digest, read = hash_file(str(file_path), block_size=4096)
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert read == len(data)
+
+
+def test_hash_file_edges(tmp_path):
+    """Test that only the edges of a file are read."""
+    file_path = tmp_path / "data.bin"
+    data = b"a" * 100 + b"b" * 1000 + b"c" * 100
+    file_path.write_bytes(data)
+
+    digest, read = hash_file_edges(str(file_path), 100)
+    assert digest == hashlib.sha256(b"a" * 100 + b"c" * 100).hexdigest()
+    assert read == 200
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_executor_preserves_job_order(sample_files, backend):
+    """Test that results come back in job order."""
+    executor = HashExecutor(workers=4, backend=backend)
+    jobs = [(str(path),) for path in sample_files]
+
+    results = executor.map(hash_file, jobs)
+    expected = [hash_file(str(path)) for path in sample_files]
+    assert results == expected
+
+
+def test_executor_returns_errors_in_place(sample_files, tmp_path):
+    """Test that a failing job does not stop the others."""
+    executor = HashExecutor(workers=3)
+    jobs = [(str(sample_files[0]),), (str(tmp_path / "missing"),)]
+
+    results = executor.map(hash_file, jobs)
+    assert results[0] == hash_file(str(sample_files[0]))
+    assert isinstance(results[1], OSError)
+
+
+def test_executor_rejects_invalid_settings():
+    """Test validation of backend and worker count."""
+    with pytest.raises(ValueError):
+        HashExecutor(backend="gpu")
+    with pytest.raises(ValueError):
+        HashExecutor(workers=0)
+
+
+def test_parallel_cleaner_matches_serial(tmp_path):
+    """Test that parallel hashing finds the same duplicate sets in order."""
+    for i in range(6):
+        (tmp_path / f"copy{i}.bin").write_bytes(b"z" * 30000)
+        (tmp_path / f"other{i}.bin").write_bytes(bytes([i]) * 30000)
+
+    serial = DuplicateCleaner(str(tmp_path)).find_duplicates(recursive=False)
+    parallel = DuplicateCleaner(str(tmp_path), workers=4).find_duplicates(
+        recursive=False
+    )
+    assert parallel == serial
+
+
+def test_hash_file_with_blake2b(tmp_path):
+    """Test hashing with a non-default algorithm."""
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(b"payload")
+
+    digest, _ = hash_file(str(file_path), "blake2b")
+    assert digest == hashlib.blake2b(b"payload").hexdigest()
+
+
+def test_unknown_algorithm_rejected(tmp_path):
+    """Test that unknown algorithms raise ValueError."""
+    with pytest.raises(ValueError):
+        DuplicateCleaner(str(tmp_path), hash_algorithm="crc7")
+
+
+def test_confirm_sha256_stage(tmp_path):
+    """Test that fast-hash collisions are confirmed with SHA256."""
+    data = b"q" * 50000
+    (tmp_path / "a.bin").write_bytes(data)
+    (tmp_path / "b.bin").write_bytes(data)
+
+    cleaner = DuplicateCleaner(
+        str(tmp_path), hash_algorithm="blake2b", confirm_sha256=True
+    )
+    duplicates = cleaner.find_duplicates(recursive=False)
+
+    assert list(duplicates) == [hashlib.sha256(data).hexdigest()]
+    assert cleaner.result_algorithm == "sha256"
+    assert cleaner.scan_stats["confirm"]["files_in"] == 2
+    assert cleaner.scan_stats["confirm"]["bytes_read"] == 2 * len(data)
+
+
+def test_deletions_record_hash_algorithm(tmp_path):
+    """Test that logged deletions carry the hash and its algorithm."""
+    (tmp_path / "a.txt").write_text("same")
+    (tmp_path / "b.txt").write_text("same")
+
+    cleaner = DuplicateCleaner(str(tmp_path), hash_algorithm="blake2b")
+    cleaner.logger.log_file = str(tmp_path.parent / "log.json")
+    cleaner.clean_duplicates(recursive=False)
+
+    operation = cleaner.logger.read_operations()[0]
+    assert operation["hash_algorithm"] == "blake2b"
+    assert operation["hash"] == hashlib.blake2b(b"same").hexdigest()
+
+
+@pytest.mark.parametrize("method", ["auto", "mmap", "readinto", "read"])
+@pytest.mark.parametrize("size", [0, 1, 4096, 300000])
+def test_hash_methods_agree(tmp_path, method, size):
+    """Test that every read path produces the same digest."""
+    file_path = tmp_path / "data.bin"
+    data = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+    file_path.write_bytes(data)
+
+    digest, read = hash_file(str(file_path), "sha256", 4096, method)
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert read == size
+
+
+def test_adaptive_block_size():
+    """Test that block sizes grow with the file size."""
+    assert adaptive_block_size(100) == 4096
+    assert adaptive_block_size(50000) == 50000
+    assert adaptive_block_size(10 * 1024 * 1024) == 256 * 1024
+    assert adaptive_block_size(1 << 32) == 1024 * 1024
@@ -0,0 +1,233 @@
+"""
+Unit tests for log rotation, segment reading and compaction.
+"""
+
+import os
+import pytest
+from datetime import datetime, timedelta
+
+from src import journal, log_segments
+from src.file_organizer import FileOrganizer
+from src.log_segments import RetentionPolicy
+from src.logger import OrganizerLogger
+
+# Rotation by age and automatic compaction disabled
+NO_AGE = {"max_age_days": None, "compact_after_days": None}
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    """Path of an empty log in a temporary directory."""
+    return str(tmp_path / "organizer_log.json")
+
+
+def write_session(log_file, source, policy=None, operations=1, started=None):
+    """Write one session with the given number of move operations."""
+    logger = OrganizerLogger(log_file, retention=policy or RetentionPolicy(**NO_AGE))
+    if started:
+        logger.session_start = started
+    for i in range(operations):
+        logger.log_operation("move", f"{source}-{i}", f"/dest/{source}-{i}")
+    logger.save()
+
+
+def test_rotation_by_size(log_file):
+    """Test that a full log is archived before the next session starts."""
+    policy = RetentionPolicy(max_bytes=1, **NO_AGE)
+    write_session(log_file, "first", policy)
+    write_session(log_file, "second", policy)
+
+    segments = journal.list_segments(log_file)
+    assert len(segments) == 1
+    assert segments[0]["sessions"] == 1
+    assert segments[0]["file"].endswith(".000001.gz")
+    assert os.path.exists(log_segments.segment_path(log_file, 1, "gzip"))
+
+    # The active log only holds the newest session
+    with open(log_file, "r", encoding="utf-8") as f:
+        assert "second-0" in f.read()
+
+
+def test_long_session_is_rotated(log_file):
+    """Test that a watch session saved batch by batch is rotated between them."""
+    logger = OrganizerLogger(log_file, retention=RetentionPolicy(max_bytes=1, **NO_AGE))
+    first_id = logger.session_id
+    for batch in range(3):
+        logger.log_operation("move", f"batch-{batch}", f"/dest/batch-{batch}")
+        logger.save(rotate=True)
+
+    # Every batch filled the log, so each was closed and archived on its own
+    assert len(journal.list_segments(log_file)) == 3
+    sessions = list(journal.iter_sessions(log_file))
+    assert [s["operations"][0]["source"] for s in sessions] == [
+        "batch-0",
+        "batch-1",
+        "batch-2",
+    ]
+    assert [s["total_operations"] for s in sessions] == [1, 1, 1]
+    assert sessions[0]["session_id"] == first_id
+    assert logger.session_id not in {s["session_id"] for s in sessions}
+
+
+def test_run_is_never_split(tmp_path, log_file):
+    """Test that a run crossing the size limit stays one session to undo."""
+    source = tmp_path / "downloads"
+    source.mkdir()
+    for i in range(350):
+        (source / f"file_{i}.pdf").write_text(str(i))
+    logger = OrganizerLogger(
+        log_file, retention=RetentionPolicy(max_bytes=2000, **NO_AGE)
+    )
+
+    organizer = FileOrganizer(str(source), logger=logger)
+    organizer.organize()
+    assert logger.get_summary()["total_operations"] == 350
+    assert journal.read_last_session(log_file)["total_operations"] == 350
+    assert len(journal.read_last_session(log_file)["operations"]) == 350
+
+    organizer.undo_last_session()
+    assert len([p for p in source.iterdir() if p.is_file()]) == 350
+
+
+def test_no_rotation_below_limits(log_file):
+    """Test that a small, recent log is left alone."""
+    write_session(log_file, "first")
+    write_session(log_file, "second")
+
+    assert journal.list_segments(log_file) == []
+    assert not journal.needs_rotation(log_file, RetentionPolicy())
+
+
+def test_rotation_by_age(log_file):
+    """Test that a log whose oldest session is too old is archived."""
+    old = (datetime.now() - timedelta(days=40)).isoformat()
+    write_session(log_file, "old", started=old)
+
+    policy = RetentionPolicy(max_age_days=30, compact_after_days=None)
+    assert journal.needs_rotation(log_file, policy)
+    write_session(log_file, "new", policy)
+
+    assert len(journal.list_segments(log_file)) == 1
+
+
+def test_reading_spans_segments(log_file):
+    """Test that readers see archived and active sessions in order."""
+    policy = RetentionPolicy(max_bytes=1, **NO_AGE)
+    for name in ("a", "b", "c"):
+        write_session(log_file, name, policy)
+
+    forward = [s["operations"][0]["source"] for s in journal.iter_sessions(log_file)]
+    assert forward == ["a-0", "b-0", "c-0"]
+
+    backward = [
+        s["operations"][0]["source"] for s in journal.iter_sessions_reversed(log_file)
+    ]
+    assert backward == ["c-0", "b-0", "a-0"]
+
+    # With the active log archived, the last session comes from a segment
+    journal.rotate(log_file, policy, force=True)
+    last = journal.read_last_session(log_file)
+    assert last["operations"][0]["source"] == "c-0"
+
+
+def test_reads_only_open_needed_segments(log_file, monkeypatch):
+    """Test that recent-session queries skip older segments."""
+    policy = RetentionPolicy(max_bytes=1, **NO_AGE)
+    for days, name in ((30, "a"), (20, "b"), (10, "c")):
+        started = (datetime.now() - timedelta(days=days)).isoformat()
+        write_session(log_file, name, policy, started=started)
+    write_session(log_file, "d", policy)
+
+    opened = []
+    original = journal.read_segment
+
+    def counting_read_segment(path):
+        opened.append(os.path.basename(path))
+        return original(path)
+
+    monkeypatch.setattr(journal, "read_segment", counting_read_segment)
+
+    assert journal.read_last_session(log_file)["operations"][0]["source"] == "d-0"
+    assert opened == []
+
+    since = datetime.now() - timedelta(days=15)
+    sessions = list(journal.iter_sessions(log_file, since=since))
+    assert [s["operations"][0]["source"] for s in sessions] == ["c-0", "d-0"]
+    assert opened == [os.path.basename(log_file) + ".000003.gz"]
+
+    opened.clear()
+    sessions = list(journal.iter_sessions_reversed(log_file, since=since))
+    assert len(sessions) == 2
+    assert opened == [os.path.basename(log_file) + ".000003.gz"]
+
+
+def test_compact_keeps_summaries(log_file):
+    """Test that compaction drops operations but keeps the counts."""
+    policy = RetentionPolicy(max_bytes=1, **NO_AGE)
+    old = (datetime.now() - timedelta(days=100)).isoformat()
+    write_session(log_file, "old", policy, operations=5, started=old)
+    write_session(log_file, "new", policy, operations=2)
+    journal.rotate(log_file, policy, force=True)
+
+    stats = journal.compact(log_file, datetime.now() - timedelta(days=90))
+    assert stats["sessions"] == 1
+    assert stats["segments"] == 1
+    assert stats["operations_removed"] == 5
+    assert stats["bytes_after"] <= stats["bytes_before"]
+
+    old_session, new_session = journal.iter_sessions(log_file)
+    assert old_session["compacted"]
+    assert old_session["operations"] == []
+    assert old_session["total_operations"] == 5
+    assert old_session["by_type"] == {"move": 5}
+    assert not new_session["compacted"]
+    assert len(new_session["operations"]) == 2
+
+    # Compacting again finds nothing to do
+    assert journal.compact(log_file, datetime.now())["sessions"] == 1
+    assert journal.compact(log_file, datetime.now())["sessions"] == 0
+
+
+def test_keep_segments(log_file):
+    """Test that the oldest segments beyond the limit are deleted."""
+    policy = RetentionPolicy(max_bytes=1, keep_segments=2, **NO_AGE)
+    for name in ("a", "b", "c", "d"):
+        write_session(log_file, name, policy)
+
+    segments = journal.list_segments(log_file)
+    assert [s["number"] for s in segments] == [2, 3]
+    assert not os.path.exists(log_segments.segment_path(log_file, 1, "gzip"))
+    sources = [s["operations"][0]["source"] for s in journal.iter_sessions(log_file)]
+    assert sources == ["b-0", "c-0", "d-0"]
+
+
+def test_manifest_rebuilt_when_missing(log_file):
+    """Test that segments are found again without a manifest."""
+    policy = RetentionPolicy(max_bytes=1, **NO_AGE)
+    for name in ("a", "b", "c"):
+        write_session(log_file, name, policy)
+    expected = journal.list_segments(log_file)
+
+    os.remove(log_segments.manifest_path(log_file))
+    assert journal.list_segments(log_file) == expected
+
+
+def test_policy_from_settings():
+    """Test building and validating a retention policy from settings."""
+    policy = RetentionPolicy.from_settings({"max_bytes": 1024, "keep_segments": 3})
+    assert policy.max_bytes == 1024
+    assert policy.keep_segments == 3
+    assert policy.compression == "gzip"
+    assert RetentionPolicy.from_settings(None) == RetentionPolicy()
+
+    with pytest.raises(ValueError):
+        RetentionPolicy.from_settings({"compression": "lz4"})
+    with pytest.raises(ValueError):
+        RetentionPolicy.from_settings({"max_size": 10})
+
+
+def test_segment_round_trip(tmp_path):
+    """Test writing and reading a compressed segment."""
+    path = str(tmp_path / "segment.gz")
+    log_segments.write_segment(path, ["one\n", "two"], "gzip")
+    assert log_segments.read_segment(path) == ["one", "two"]
@@ -7,6 +7,8 @@ import json
 import os
 from pathlib import Path
 from src.logger import OrganizerLogger
+from src import journal
+from src.log_segments import RetentionPolicy
 
 
 @pytest.fixture
@@ -65,6 +67,19 @@ def test_get_summary(temp_log_file):
     assert summary["by_status"]["success"] == 3
     assert summary["by_status"]["error"] == 1
 
+    # Flushed operations are counted but no longer kept in memory
+    logger.save()
+    assert logger.operations == []
+    assert logger.get_summary()["total_operations"] == 4
+    assert journal.read_last_session(temp_log_file)["by_type"]["move"] == 3
+    operations = logger.read_operations()
+    assert [op["source"] for op in operations] == [
+        "/file1.txt",
+        "/file2.txt",
+        "/file3.txt",
+        "/file4.txt",
+    ]
+
 
 def test_save_log(temp_log_file):
     """Test saving log to file."""
@@ -74,13 +89,21 @@ def test_save_log(temp_log_file):
 
     assert os.path.exists(temp_log_file)
 
-    # Verify log content
+    # Verify log content: header, operation and footer records
     with open(temp_log_file, "r", encoding="utf-8") as f:
-        logs = json.load(f)
+        records = [json.loads(line) for line in f]
 
-    assert isinstance(logs, list)
+    assert [r["record"] for r in records] == [
+        "session_start",
+        "operation",
+        "session_end",
+    ]
+    assert records[2]["total_operations"] == 1
+
+    logs = list(journal.iter_sessions(temp_log_file))
     assert len(logs) == 1
     assert logs[0]["total_operations"] == 1
+    assert logs[0]["operations"][0]["source"] == "/file.txt"
 
 
 def test_append_to_existing_log(temp_log_file):
@@ -96,10 +119,10 @@ def test_append_to_existing_log(temp_log_file):
     logger2.save()
 
     # Verify both sessions are in the log
-    with open(temp_log_file, "r", encoding="utf-8") as f:
-        logs = json.load(f)
+    logs = list(journal.iter_sessions(temp_log_file))
 
     assert len(logs) == 2
+    assert logs[1]["operations"][0]["source"] == "/file2.txt"
 
 
 def test_empty_log(temp_log_file):
@@ -110,3 +133,117 @@ def test_empty_log(temp_log_file):
     assert summary["total_operations"] == 0
     assert summary["by_type"] == {}
     assert summary["by_status"] == {}
+
+
+def test_operations_flushed_incrementally(temp_log_file):
+    """Test that operations reach the journal before save."""
+    logger = OrganizerLogger(temp_log_file)
+    for i in range(OrganizerLogger.FLUSH_EVERY):
+        logger.log_operation("move", f"/file{i}.txt", status="success")
+
+    with open(temp_log_file, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    assert len(lines) == OrganizerLogger.FLUSH_EVERY + 1
+
+    # An unsaved session is still readable
+    session = journal.read_last_session(temp_log_file)
+    assert session["total_operations"] == OrganizerLogger.FLUSH_EVERY
+    assert session["session_end"] is None
+
+
+def test_repeated_save_keeps_one_session(temp_log_file):
+    """Test that saving twice extends the same session."""
+    logger = OrganizerLogger(temp_log_file)
+    logger.log_operation("move", "/a.txt", status="success")
+    logger.save()
+    logger.log_operation("delete_duplicate", "/b.txt", status="success")
+    logger.save()
+
+    sessions = list(journal.iter_sessions(temp_log_file, include_operations=False))
+    assert len(sessions) == 1
+    assert sessions[0]["total_operations"] == 2
+    assert sessions[0]["by_type"] == {"move": 1, "delete_duplicate": 1}
+
+
+def test_torn_last_line_is_skipped(temp_log_file):
+    """Test reading and appending after a crash tore the last record."""
+    logger = OrganizerLogger(temp_log_file)
+    logger.log_operation("move", "/a.txt", status="success")
+    logger.save()
+    with open(temp_log_file, "a", encoding="utf-8") as f:
+        f.write('{"record": "operation", "session_id": "x", "type": "mo')
+
+    assert journal.read_last_session(temp_log_file)["total_operations"] == 1
+    assert len(list(journal.iter_sessions(temp_log_file, False))) == 1
+
+    logger = OrganizerLogger(temp_log_file)
+    logger.log_operation("move", "/b.txt", status="success")
+    logger.save()
+
+    sessions = list(journal.iter_sessions(temp_log_file))
+    assert [s["total_operations"] for s in sessions] == [1, 1]
+    assert sessions[1]["operations"][0]["source"] == "/b.txt"
+
+
+def test_read_sessions_reversed(temp_log_file):
+    """Test reading sessions newest first."""
+    for i in range(5):
+        logger = OrganizerLogger(temp_log_file)
+        for j in range(i + 1):
+            logger.log_operation("move", f"/s{i}/f{j}.txt", status="success")
+        logger.save()
+
+    sessions = list(journal.iter_sessions_reversed(temp_log_file))
+    assert [s["total_operations"] for s in sessions] == [5, 4, 3, 2, 1]
+    assert sessions[0]["operations"][0]["source"] == "/s4/f0.txt"
+
+    summaries = list(
+        journal.iter_sessions_reversed(temp_log_file, include_operations=False)
+    )
+    assert [s["total_operations"] for s in summaries] == [5, 4, 3, 2, 1]
+    assert summaries[0]["operations"] == []
+
+
+def test_legacy_log_migrated_on_save(temp_log_file):
+    """Test that an old JSON log is converted before appending."""
+    legacy = [
+        {
+            "session_start": "2025-11-25T10:00:00",
+            "session_end": "2025-11-25T10:05:00",
+            "total_operations": 1,
+            "by_type": {"move": 1},
+            "by_status": {"success": 1},
+            "operations": [
+                {
+                    "timestamp": "2025-11-25T10:00:01",
+                    "type": "move",
+                    "source": "/old.txt",
+                    "destination": "/Documents/old.txt",
+                    "status": "success",
+                    "details": None,
+                }
+            ],
+        }
+    ]
+    with open(temp_log_file, "w", encoding="utf-8") as f:
+        json.dump(legacy, f, indent=2)
+
+    # Legacy logs can be read without migrating them
+    assert journal.read_last_session(temp_log_file)["operations"][0]["source"] == (
+        "/old.txt"
+    )
+
+    # The legacy session is months old; keep it in the active log
+    logger = OrganizerLogger(
+        temp_log_file, retention=RetentionPolicy(max_age_days=None)
+    )
+    logger.log_operation("move", "/new.txt", status="success")
+    logger.save()
+
+    assert not journal.is_legacy_log(temp_log_file)
+    assert os.path.exists(temp_log_file + ".bak")
+    sessions = list(journal.iter_sessions(temp_log_file))
+    assert [s["operations"][0]["source"] for s in sessions] == [
+        "/old.txt",
+        "/new.txt",
+    ]
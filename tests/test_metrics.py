@@ -0,0 +1,162 @@
+"""
+Unit tests for the Prometheus metrics registry and exporters.
+"""
+
+import urllib.error
+import urllib.request
+import pytest
+from click.testing import CliRunner
+
+from src import metrics, profiling
+from src.cli import cli
+from src.duplicate_cleaner import DuplicateCleaner
+from src.file_organizer import FileOrganizer
+from src.hash_cache import HashCache
+from src.logger import OrganizerLogger
+from src.watcher import DirectoryWatcher
+
+
+@pytest.fixture
+def organizer_metrics():
+    """Enable the organizer metrics for one test."""
+    yield metrics.enable()
+    metrics.disable()
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """Create a directory with a duplicate pair and an unrelated file."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    (directory / "a.pdf").write_text("same content")
+    (directory / "b.pdf").write_text("same content")
+    (directory / "c.jpg").write_text("other content")
+    return directory
+
+
+def test_text_exposition_format():
+    """Test the rendering of counters, gauges and histograms."""
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("ops_total", "Operations.", ("type",))
+    counter.inc(2, ('say "hi"',))
+    registry.gauge("depth", "Queue depth.").set(3)
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE ops_total counter" in lines
+    assert 'ops_total{type="say \\"hi\\""} 2' in lines
+    assert "depth 3" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_sum 5.55" in lines
+    assert "latency_seconds_count 3" in lines
+
+
+def test_invalid_metrics():
+    """Test that misuse is rejected."""
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("ops_total", "Operations.", ("type",))
+    with pytest.raises(ValueError):
+        counter.inc(1, ())
+    with pytest.raises(ValueError):
+        counter.inc(-1, ("move",))
+    with pytest.raises(ValueError):
+        registry.gauge("ops_total", "Operations.")
+    with pytest.raises(ValueError):
+        registry.histogram("latency", "Latency.", buckets=(1, 0.5))
+    assert registry.counter("ops_total", "Operations.", ("type",)) is counter
+
+
+def test_disabled_metrics_are_a_no_op():
+    """Test that the hooks do nothing without enabled metrics."""
+    assert metrics.active() is None
+    metrics.record_operation("move", "success")
+    metrics.set_queue_depth(5)
+    metrics.publish()
+    assert metrics.disable() is None
+
+
+def test_operations_feed_metrics(organizer_metrics, source_dir, tmp_path):
+    """Test operations, latencies, counters and cache lookups."""
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    cache = HashCache(str(tmp_path / "cache.db"))
+    DuplicateCleaner(source_dir, logger, hash_cache=cache).find_duplicates()
+    DuplicateCleaner(source_dir, logger, hash_cache=cache).find_duplicates()
+    FileOrganizer(source_dir, logger=logger).organize()
+    logger.log_operation("move", "x.pdf", status="error", details="denied")
+    cache.close()
+
+    m = organizer_metrics
+    assert m.operations.value(("move", "success")) == 3
+    assert m.operations.value(("move", "error")) == 1
+    assert m.span_seconds.count(("move",)) == 3
+    assert m.files_scanned.value() == 9
+    assert m.bytes_read.value() == 2 * len("same content")
+    assert m.fs_calls.value(("rename",)) == 3
+    assert m.cache_lookups.value(("hit",)) > 0
+    assert m.cache_lookups.value(("miss",)) > 0
+    assert 'organizer_operations_total{type="move",status="error"} 1' in (
+        m.registry.render()
+    )
+
+
+def test_watcher_reports_queue_depth(organizer_metrics, tmp_path):
+    """Test the pending-files gauge and textfile publishing per batch."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    organizer = FileOrganizer(str(directory), logger=logger)
+    watcher = DirectoryWatcher(organizer, settle_seconds=5, backend="polling")
+    textfile = tmp_path / "organizer.prom"
+    metrics.enable(organizer_metrics.registry, textfile=str(textfile))
+
+    (directory / "a.pdf").write_text("a")
+    (directory / "b.pdf").write_text("b")
+    watcher.process_once(now=100.0)
+    assert organizer_metrics.queue_depth.value() == 2
+    assert not textfile.exists()
+
+    watcher.process_once(now=105.0)
+    assert organizer_metrics.queue_depth.value() == 0
+    assert "organizer_watch_pending_files 0" in textfile.read_text()
+
+
+def test_http_endpoint(organizer_metrics):
+    """Test that the server serves /metrics and nothing else."""
+    metrics.record_operation("delete", "success")
+    with metrics.MetricsServer(organizer_metrics.registry, port=0) as server:
+        url = f"http://127.0.0.1:{server.port}"
+        with urllib.request.urlopen(url + "/metrics") as response:
+            assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+            body = response.read().decode()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + "/other")
+
+    assert 'organizer_operations_total{type="delete",status="success"} 1' in body
+
+
+def test_cli_metrics_textfile(source_dir, tmp_path):
+    """Test that --metrics-textfile writes the metrics when the command ends."""
+    textfile = tmp_path / "organizer.prom"
+    result = CliRunner().invoke(
+        cli,
+        [
+            "--metrics-textfile",
+            str(textfile),
+            "organize",
+            "-d",
+            str(source_dir),
+            "--log-file",
+            str(tmp_path / "log.json"),
+        ],
+    )
+
+    assert result.exit_code == 0
+    text = textfile.read_text()
+    assert 'organizer_operations_total{type="move",status="success"} 3' in text
+    assert 'organizer_span_duration_seconds_count{span="move"} 3' in text
+    assert metrics.active() is None
+    assert profiling.span("scan") is profiling.span("move")
@@ -0,0 +1,276 @@
+"""
+Unit tests for move planning and the crash-safe move executor.
+"""
+
+import errno
+import os
+import pytest
+
+from src import mover
+from src.file_organizer import FileOrganizer
+from src.logger import OrganizerLogger
+from src.mover import DestinationNames, MoveExecutor, MovePlan
+from src.walker import walk
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """Create a directory with files for three categories."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    for name in ("a.pdf", "b.pdf", "c.jpg", "d.jpg", "e.zip"):
+        (directory / name).write_text(f"content of {name}")
+    return directory
+
+
+@pytest.fixture
+def logger(tmp_path):
+    """Logger writing next to the test directory."""
+    return OrganizerLogger(str(tmp_path / "log.json"))
+
+
+def build_plan(source_dir):
+    """Plan moves of every file into '<ext>' subdirectories."""
+    plan = MovePlan()
+    for name in sorted(os.listdir(source_dir)):
+        category = name.rsplit(".", 1)[1]
+        plan.add(source_dir / name, source_dir / category / name, category)
+    return plan
+
+
+def test_execute_plan(source_dir, logger):
+    """Test that a plan is applied and its intent log removed."""
+    intent_log = logger.log_file + ".intent"
+    stats = MoveExecutor(intent_log, logger).execute(build_plan(source_dir))
+
+    assert stats == {"renamed": 5, "copied": 0, "errors": 0, "directories": 3}
+    assert (source_dir / "pdf" / "a.pdf").exists()
+    assert (source_dir / "zip" / "e.zip").exists()
+    assert not (source_dir / "a.pdf").exists()
+    assert not os.path.exists(intent_log)
+    assert logger.get_summary()["by_status"] == {"success": 5}
+
+
+def test_plan_rejects_claimed_destination(source_dir):
+    """Test that two moves cannot share a destination."""
+    plan = MovePlan()
+    plan.add(source_dir / "a.pdf", source_dir / "pdf" / "a.pdf", "pdf")
+    assert plan.is_claimed(source_dir / "pdf" / "a.pdf")
+    with pytest.raises(ValueError):
+        plan.add(source_dir / "b.pdf", source_dir / "pdf" / "a.pdf", "pdf")
+
+
+def test_cross_device_moves_are_copied(source_dir, logger, monkeypatch):
+    """Test the copy-then-delete path used across filesystems."""
+
+    def cross_device_rename(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(mover.os, "rename", cross_device_rename)
+    executor = MoveExecutor(logger.log_file + ".intent", logger)
+    executor.COPY_BATCH = 2
+    stats = executor.execute(build_plan(source_dir))
+
+    assert stats["copied"] == 5
+    assert stats["renamed"] == 0
+    assert (source_dir / "jpg" / "c.jpg").read_text() == "content of c.jpg"
+    assert not (source_dir / "c.jpg").exists()
+    assert not list(source_dir.rglob("*.partial"))
+
+
+def interrupt_after(monkeypatch, count):
+    """Make os.rename fail hard after a number of successful calls."""
+    real_rename = os.rename
+    calls = []
+
+    def rename(src, dst):
+        if len(calls) >= count:
+            raise KeyboardInterrupt
+        calls.append(src)
+        real_rename(src, dst)
+
+    monkeypatch.setattr(mover.os, "rename", rename)
+
+
+def test_resume_interrupted_run(source_dir, logger, monkeypatch):
+    """Test that an interrupted run is finished from its intent log."""
+    intent_log = logger.log_file + ".intent"
+    interrupt_after(monkeypatch, 2)
+    with pytest.raises(KeyboardInterrupt):
+        MoveExecutor(intent_log, logger).execute(build_plan(source_dir))
+    monkeypatch.undo()
+
+    executor = MoveExecutor(intent_log, logger)
+    states = [item["state"] for item in executor.pending()]
+    assert states == ["done", "done", "pending", "pending", "pending"]
+
+    stats = executor.resume()
+    assert stats["renamed"] == 3
+    assert not os.path.exists(intent_log)
+    assert sorted(p.name for p in source_dir.rglob("*.*")) == [
+        "a.pdf",
+        "b.pdf",
+        "c.jpg",
+        "d.jpg",
+        "e.zip",
+    ]
+    assert not any(p.is_file() for p in source_dir.iterdir())
+
+
+def test_rollback_interrupted_run(source_dir, logger, monkeypatch):
+    """Test that an interrupted run can be undone from its intent log."""
+    intent_log = logger.log_file + ".intent"
+    interrupt_after(monkeypatch, 3)
+    with pytest.raises(KeyboardInterrupt):
+        MoveExecutor(intent_log, logger).execute(build_plan(source_dir))
+    monkeypatch.undo()
+
+    restored = MoveExecutor(intent_log, logger).rollback()
+
+    assert restored == 3
+    assert not os.path.exists(intent_log)
+    assert sorted(p.name for p in source_dir.iterdir() if p.is_file()) == [
+        "a.pdf",
+        "b.pdf",
+        "c.jpg",
+        "d.jpg",
+        "e.zip",
+    ]
+
+
+def test_copied_state_detected(source_dir, logger):
+    """Test that a finished copy whose source was not deleted is recognized."""
+    intent_log = logger.log_file + ".intent"
+    executor = MoveExecutor(intent_log, logger)
+    plan = build_plan(source_dir)
+    executor._write_intents(plan)
+    executor._close_intents()
+
+    (source_dir / "pdf").mkdir()
+    (source_dir / "pdf" / "a.pdf").write_text("content of a.pdf")
+
+    assert executor.pending()[0]["state"] == "copied"
+    executor.resume()
+    assert not (source_dir / "a.pdf").exists()
+    assert (source_dir / "pdf" / "b.pdf").exists()
+
+
+def test_same_size_destination_is_a_conflict(source_dir, logger):
+    """Test that a different file of the same size keeps the source."""
+    intent_log = logger.log_file + ".intent"
+    executor = MoveExecutor(intent_log, logger)
+    executor._write_intents(build_plan(source_dir))
+    executor._close_intents()
+
+    (source_dir / "pdf").mkdir()
+    (source_dir / "pdf" / "a.pdf").write_text("content of x.pdf")
+
+    assert executor.pending()[0]["state"] == "conflict"
+    executor.resume()
+    assert (source_dir / "a.pdf").read_text() == "content of a.pdf"
+    assert (source_dir / "pdf" / "a.pdf").read_text() == "content of x.pdf"
+
+
+def test_taken_destination_is_not_replaced(source_dir, logger):
+    """Test that a file created at a destination after planning is kept."""
+    plan = build_plan(source_dir)
+    (source_dir / "pdf").mkdir()
+    (source_dir / "pdf" / "a.pdf").write_text("newer file")
+
+    stats = MoveExecutor(logger.log_file + ".intent", logger).execute(plan)
+    assert stats["errors"] == 1
+    assert (source_dir / "a.pdf").read_text() == "content of a.pdf"
+    assert (source_dir / "pdf" / "a.pdf").read_text() == "newer file"
+
+
+def test_rollback_keeps_taken_source(source_dir, logger, monkeypatch):
+    """Test that rollback does not overwrite a file at an old path."""
+    intent_log = logger.log_file + ".intent"
+    interrupt_after(monkeypatch, 1)
+    with pytest.raises(KeyboardInterrupt):
+        MoveExecutor(intent_log, logger).execute(build_plan(source_dir))
+    monkeypatch.undo()
+    (source_dir / "a.pdf").write_text("newer file")
+
+    assert MoveExecutor(intent_log, logger).rollback() == 0
+    assert (source_dir / "a.pdf").read_text() == "newer file"
+    assert (source_dir / "pdf" / "a.pdf").read_text() == "content of a.pdf"
+
+
+def test_organizer_refuses_with_pending_run(source_dir, logger):
+    """Test that organize() does not start over an interrupted run."""
+    organizer = FileOrganizer(str(source_dir), logger=logger)
+    with open(organizer.intent_log, "w", encoding="utf-8") as f:
+        f.write("")
+
+    organizer.organize()
+    assert (source_dir / "a.pdf").exists()
+    assert not (source_dir / "Documents").exists()
+
+
+def test_organizer_plans_before_moving(source_dir, logger):
+    """Test that the organizer plans destinations without touching files."""
+    organizer = FileOrganizer(str(source_dir), logger=logger)
+    entries = [
+        entry
+        for entry in walk(source_dir, max_depth=0)
+        if entry.path.endswith((".pdf", ".jpg"))
+    ]
+    plan = organizer.plan(entries)
+
+    assert plan.by_category() == {"Documents": 2, "Images": 2}
+    assert len(plan.directories) == 2
+    assert (source_dir / "a.pdf").exists()
+
+
+def test_destination_names_skip_taken_counters(tmp_path):
+    """Test that conflicts get the next counter not taken on disk."""
+    for name in ("invoice.pdf", "invoice_1.pdf", "invoice_3.pdf", "other.pdf"):
+        (tmp_path / name).write_text(name)
+
+    names = DestinationNames()
+    assert names.allocate(tmp_path, "new.pdf") == str(tmp_path / "new.pdf")
+    assert names.allocate(tmp_path, "invoice.pdf") == str(tmp_path / "invoice_2.pdf")
+    assert names.allocate(tmp_path, "invoice.pdf") == str(tmp_path / "invoice_4.pdf")
+    # Names reserved in memory count as taken too
+    assert names.allocate(tmp_path, "new.pdf") == str(tmp_path / "new_1.pdf")
+    assert names.allocate(tmp_path, "invoice.png") == str(tmp_path / "invoice.png")
+
+
+def test_destination_names_ignore_numbered_names(tmp_path):
+    """Test that digits in existing names are not taken for counters."""
+    for name in ("IMG.jpg", "IMG_20240101.jpg"):
+        (tmp_path / name).write_text(name)
+
+    names = DestinationNames()
+    assert names.allocate(tmp_path, "IMG.jpg") == str(tmp_path / "IMG_1.jpg")
+    assert names.allocate(tmp_path, "IMG_20240101.jpg") == str(
+        tmp_path / "IMG_20240101_1.jpg"
+    )
+
+
+def test_destination_names_list_each_directory_once(tmp_path, monkeypatch):
+    """Test that resolving many conflicts lists the directory only once."""
+    (tmp_path / "image.png").write_text("x")
+    listed = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path):
+        listed.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(mover.os, "scandir", counting_scandir)
+    names = DestinationNames()
+    allocated = [names.allocate(tmp_path, "image.png") for _ in range(1000)]
+
+    assert listed == [str(tmp_path)]
+    assert len(set(allocated)) == 1000
+    assert allocated[-1] == str(tmp_path / "image_1000.png")
+
+
+def test_destination_names_missing_directory(tmp_path):
+    """Test allocating names in a directory that does not exist yet."""
+    names = DestinationNames()
+    target = tmp_path / "Documents"
+    assert names.allocate(target, "a.pdf") == str(target / "a.pdf")
+    assert names.allocate(target, "a.pdf") == str(target / "a_1.pdf")
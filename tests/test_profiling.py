@@ -0,0 +1,141 @@
+"""
+Unit tests for timing spans, counters and trace output.
+"""
+
+import json
+import pytest
+from click.testing import CliRunner
+
+from src import profiling
+from src.cli import cli
+from src.duplicate_cleaner import DuplicateCleaner
+from src.file_organizer import FileOrganizer
+from src.logger import OrganizerLogger
+
+
+@pytest.fixture
+def profiler():
+    """Enable a recording profiler for one test."""
+    yield profiling.enable(record_events=True)
+    profiling.disable()
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """Create a directory with a duplicate pair and an unrelated file."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    (directory / "a.pdf").write_text("same content")
+    (directory / "b.pdf").write_text("same content")
+    (directory / "c.jpg").write_text("other content")
+    return directory
+
+
+def test_disabled_profiling_is_a_no_op():
+    """Test that spans and counters do nothing without a profiler."""
+    assert profiling.active() is None
+    with profiling.span("scan"):
+        profiling.count("calls.stat")
+    assert profiling.disable() is None
+
+
+def test_spans_and_counters_are_aggregated(profiler):
+    """Test per-name totals, counters and the summary."""
+    for _ in range(3):
+        with profiling.span("outer"):
+            with profiling.span("inner"):
+                profiling.count("calls.stat", 2)
+    profiling.count("files_scanned", 10)
+
+    summary = profiler.summary()
+    assert summary["spans"]["outer"]["calls"] == 3
+    assert summary["spans"]["inner"]["calls"] == 3
+    assert (
+        summary["spans"]["inner"]["total_seconds"]
+        <= summary["spans"]["outer"]["total_seconds"]
+    )
+    assert summary["counters"] == {"calls.stat": 6, "files_scanned": 10}
+    assert summary["syscalls"] == 6
+    assert len(profiler.events) == 6
+    assert "outer" in profiler.report()
+
+
+def test_operations_are_instrumented(profiler, source_dir, tmp_path):
+    """Test that organizing and deduplicating record their phases."""
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    DuplicateCleaner(source_dir, logger).find_duplicates()
+    FileOrganizer(source_dir, logger=logger).organize()
+
+    summary = profiler.summary()
+    for name in ("scan", "hash", "categorize", "mkdir", "move", "log_save"):
+        assert name in summary["spans"], name
+    assert summary["spans"]["move"]["calls"] == 3
+    assert summary["counters"]["calls.rename"] == 3
+    assert summary["counters"]["files_scanned"] == 6
+    assert summary["counters"]["bytes_read"] == 2 * len("same content")
+
+
+def test_chrome_trace(profiler, tmp_path):
+    """Test the Chrome trace event output."""
+    with profiling.span("scan"):
+        profiling.count("calls.scandir")
+
+    path = tmp_path / "trace.json"
+    profiler.write_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [event["name"] for event in spans] == ["scan"]
+    assert spans[0]["dur"] >= 0
+    assert any(event["ph"] == "C" for event in events)
+
+
+def test_speedscope_events_nest(profiler, tmp_path):
+    """Test that the speedscope output opens and closes frames in order."""
+    with profiling.span("outer"):
+        with profiling.span("inner"):
+            pass
+        with profiling.span("inner"):
+            pass
+
+    path = tmp_path / "profile.speedscope.json"
+    profiler.write_trace(str(path))
+    document = json.loads(path.read_text())
+
+    names = [frame["name"] for frame in document["shared"]["frames"]]
+    events = document["profiles"][0]["events"]
+    sequence = [(event["type"], names[event["frame"]]) for event in events]
+    assert sequence == [
+        ("O", "outer"),
+        ("O", "inner"),
+        ("C", "inner"),
+        ("O", "inner"),
+        ("C", "inner"),
+        ("C", "outer"),
+    ]
+    times = [event["at"] for event in events]
+    assert times == sorted(times)
+
+
+def test_cli_profile_flag(source_dir, tmp_path):
+    """Test that --profile prints a breakdown and writes the trace."""
+    trace = tmp_path / "trace.json"
+    result = CliRunner().invoke(
+        cli,
+        [
+            "--profile",
+            "--profile-output",
+            str(trace),
+            "organize",
+            "-d",
+            str(source_dir),
+            "--log-file",
+            str(tmp_path / "log.json"),
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "PROFILE" in result.output
+    assert "categorize" in result.output
+    assert json.loads(trace.read_text())["traceEvents"]
+    assert profiling.active() is None
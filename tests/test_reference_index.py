@@ -0,0 +1,168 @@
+"""
+Unit tests for the reference index and reference roots.
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from src.duplicate_cleaner import DuplicateCleaner
+from src.logger import OrganizerLogger
+from src.reference_index import ReferenceIndex
+
+
+@pytest.fixture
+def archive(tmp_path):
+    """Create an archive directory with a few files, two of them equal."""
+    archive_dir = tmp_path / "archive"
+    (archive_dir / "2023").mkdir(parents=True)
+    (archive_dir / "2023" / "report.pdf").write_bytes(b"report" * 1000)
+    (archive_dir / "2023" / "report_copy.pdf").write_bytes(b"report" * 1000)
+    (archive_dir / "photo.jpg").write_bytes(b"photo" * 3000)
+    (archive_dir / "notes.txt").write_bytes(b"notes")
+    return archive_dir
+
+
+@pytest.fixture
+def downloads(tmp_path):
+    """Create a Downloads directory with one copy of an archived file."""
+    downloads_dir = tmp_path / "downloads"
+    downloads_dir.mkdir()
+    (downloads_dir / "photo (1).jpg").write_bytes(b"photo" * 3000)
+    (downloads_dir / "new.pdf").write_bytes(b"new" * 1000)
+    (downloads_dir / "other.jpg").write_bytes(b"others" * 3000)
+    return downloads_dir
+
+
+@pytest.fixture
+def index(tmp_path):
+    """Create a reference index in a temporary directory."""
+    reference_index = ReferenceIndex(str(tmp_path / "index.db"))
+    yield reference_index
+    reference_index.close()
+
+
+def test_update_hashes_only_new_and_changed_files(index, archive):
+    """Test that updating a root rehashes changes and drops removed files."""
+    counters = index.update(str(archive))
+    assert counters["files"] == counters["hashed"] == 4
+    assert index.count() == 4
+
+    counters = index.update(str(archive))
+    assert counters["hashed"] == 0
+    assert counters["unchanged"] == 4
+
+    (archive / "notes.txt").write_bytes(b"changed notes")
+    (archive / "photo.jpg").unlink()
+    counters = index.update(str(archive))
+    assert counters["hashed"] == 1
+    assert counters["removed"] == 1
+    assert index.stats()["roots"] == {str(archive): 3}
+
+
+def test_lookups(index, archive):
+    """Test looking up sizes and binary digests."""
+    index.update(str(archive))
+
+    assert index.sizes_present([5, 6000, 15000, 7]) == {5, 6000, 15000}
+    digest = hashlib.sha256(b"report" * 1000).digest()
+    paths = sorted(entry.path for entry in index.files_with_digest(digest))
+    assert [os.path.basename(path) for path in paths] == [
+        "report.pdf",
+        "report_copy.pdf",
+    ]
+    assert index.files_with_digest(bytes(32)) == []
+
+
+def test_algorithm_is_kept(tmp_path, archive):
+    """Test that an index only accepts the algorithm it was built with."""
+    db_path = str(tmp_path / "index.db")
+    with ReferenceIndex(db_path, "blake2b") as index:
+        index.update(str(archive))
+
+    with ReferenceIndex(db_path) as index:
+        assert index.algorithm == "blake2b"
+        with pytest.raises(ValueError):
+            DuplicateCleaner(str(archive), reference_index=index)
+    with pytest.raises(ValueError):
+        ReferenceIndex(db_path, "sha256")
+
+
+def test_reference_directory_is_never_modified(tmp_path, archive, downloads):
+    """Test that only target copies are removed, whatever the strategy."""
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    cleaner = DuplicateCleaner(
+        str(downloads), logger, reference_directories=[str(archive)]
+    )
+    report = cleaner.get_duplicate_report()
+    # The archived report and its copy have no target copy to clean
+    assert report["duplicate_sets"] == 1
+    assert report["total_duplicates"] == 1
+    assert report["details"][0]["references"] == [str(archive / "photo.jpg")]
+
+    assert cleaner.clean_duplicates(keep_strategy="shortest") == 1
+    assert not (downloads / "photo (1).jpg").exists()
+    assert len(list(archive.rglob("*"))) == 5
+
+
+def test_reference_index_hashes_only_matching_files(tmp_path, archive, downloads):
+    """Test a scan against the index: archived files are looked up, not read."""
+    with ReferenceIndex(str(tmp_path / "index.db")) as index:
+        index.update(str(archive))
+        logger = OrganizerLogger(str(tmp_path / "log.json"))
+        cleaner = DuplicateCleaner(str(downloads), logger, reference_index=index)
+
+        duplicates = cleaner.find_duplicate_files()
+        (files,) = duplicates.values()
+        assert sorted(file.role for file in files) == ["reference", "target"]
+        # Only the download with an archived size was hashed
+        assert cleaner.scan_stats["full"]["files_in"] == 1
+        assert cleaner.bytes_hashed == 15000
+
+        assert cleaner.clean_duplicates() == 1
+        assert not (downloads / "photo (1).jpg").exists()
+        assert (archive / "photo.jpg").exists()
+
+
+def test_stale_index_entries_are_ignored(tmp_path, archive, downloads):
+    """Test that a reference changed since indexing protects the target copy."""
+    with ReferenceIndex(str(tmp_path / "index.db")) as index:
+        index.update(str(archive))
+        os.utime(archive / "photo.jpg", ns=(1, 1))
+        cleaner = DuplicateCleaner(str(downloads), reference_index=index)
+
+        assert cleaner.find_duplicates() == {}
+
+
+def test_symlinked_reference_root_is_never_modified(tmp_path, archive, downloads):
+    """Test that the archive reached through a symlink in a target is kept."""
+    (downloads / "arch").symlink_to(archive, target_is_directory=True)
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    cleaner = DuplicateCleaner(
+        str(downloads),
+        logger,
+        symlinks="follow",
+        reference_directories=[str(archive)],
+    )
+
+    cleaner.clean_duplicates()
+    assert (archive / "photo.jpg").exists()
+    assert (archive / "2023" / "report.pdf").exists()
+    assert (archive / "2023" / "report_copy.pdf").exists()
+    assert (archive / "notes.txt").exists()
+
+    # A root that is a symlink into another root overlaps it
+    (tmp_path / "link").symlink_to(archive / "2023", target_is_directory=True)
+    with pytest.raises(ValueError):
+        DuplicateCleaner(str(archive), reference_directories=[str(tmp_path / "link")])
+
+
+def test_roots_must_not_overlap(archive, downloads):
+    """Test that a directory cannot be both a target and a reference."""
+    with pytest.raises(ValueError):
+        DuplicateCleaner(str(archive), reference_directories=[str(archive / "2023")])
+    with pytest.raises(ValueError):
+        DuplicateCleaner(str(downloads), target_directories=[str(downloads)])
+    with pytest.raises(ValueError):
+        DuplicateCleaner(str(archive / "2023"), reference_directories=[str(archive)])
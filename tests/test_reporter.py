@@ -0,0 +1,126 @@
+"""
+Unit tests for the console reporter modes.
+"""
+
+import io
+import pytest
+from click.testing import CliRunner
+
+from src import reporter
+from src.cli import cli
+from src.duplicate_cleaner import DuplicateCleaner
+from src.file_organizer import FileOrganizer
+from src.logger import OrganizerLogger
+from src.reporter import Reporter
+
+
+@pytest.fixture
+def source_dir(tmp_path):
+    """Create a directory with a duplicate pair and an unrelated file."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    (directory / "a.pdf").write_text("same content")
+    (directory / "b.pdf").write_text("same content")
+    (directory / "c.jpg").write_text("other content")
+    return directory
+
+
+def run_cleaner(source_dir, tmp_path, mode):
+    """Clean duplicates with a reporter in the given mode; return its output."""
+    for name in ("a.pdf", "b.pdf"):
+        (source_dir / name).write_text("same content")
+    stream = io.StringIO()
+    logger = OrganizerLogger(
+        str(tmp_path / "log.json"), reporter=Reporter(mode, interval=0, stream=stream)
+    )
+    removed = DuplicateCleaner(source_dir, logger).clean_duplicates()
+    assert removed == 1
+    operations = logger.read_operations()
+    assert operations[0]["type"] == "delete_duplicate"
+    return stream.getvalue()
+
+
+def test_invalid_mode():
+    """Test that unknown modes are rejected."""
+    with pytest.raises(ValueError):
+        Reporter("loud")
+
+
+def test_message_routing():
+    """Test which messages each mode shows."""
+    shown = {}
+    for mode in reporter.REPORTER_MODES:
+        stream = io.StringIO()
+        out = Reporter(mode, stream=stream)
+        out.info("summary")
+        out.detail("per file")
+        out.warning("problem")
+        shown[mode] = stream.getvalue().split()
+
+    assert shown["verbose"] == ["summary", "per", "file", "problem"]
+    assert shown["progress"] == ["summary", "problem"]
+    assert shown["quiet"] == ["problem"]
+
+
+def test_progress_line_is_rate_limited():
+    """Test that the progress line is redrawn at most once per interval."""
+    stream = io.StringIO()
+    out = Reporter("progress", interval=3600, stream=stream)
+    out.begin("Moving")
+    for _ in range(1000):
+        out.advance(1, 1024)
+    assert stream.getvalue() == ""
+
+    out.end()
+    assert stream.getvalue().count("\r") == 1
+    assert "Moving: 1,000 files" in stream.getvalue()
+    assert stream.getvalue().endswith("\n")
+
+
+def test_cleaner_output_per_mode(source_dir, tmp_path):
+    """Test that per-file lines only appear in verbose mode."""
+    verbose = run_cleaner(source_dir, tmp_path, "verbose")
+    assert f"Removing: {source_dir}" in verbose
+    assert "Removed 1 duplicate files" in verbose
+
+    progress = run_cleaner(source_dir, tmp_path, "progress")
+    assert f"Removing: {source_dir}" not in progress
+    assert "Removing: 1 files" in progress
+    assert "Hashing: " in progress
+    assert "Removed 1 duplicate files" in progress
+
+    assert run_cleaner(source_dir, tmp_path, "quiet") == ""
+
+
+def test_organizer_progress(source_dir, tmp_path):
+    """Test that organizing reports moved files and bytes on one line."""
+    stream = io.StringIO()
+    logger = OrganizerLogger(
+        str(tmp_path / "log.json"),
+        reporter=Reporter("progress", interval=0, stream=stream),
+    )
+    FileOrganizer(source_dir, logger=logger).organize()
+
+    assert "Moving: 3 files" in stream.getvalue()
+    assert "Moved 2 files to Documents" in stream.getvalue()
+
+
+def test_cli_output_mode(source_dir, tmp_path):
+    """Test that --output-mode quiet silences the organizer."""
+    result = CliRunner().invoke(
+        cli,
+        [
+            "--output-mode",
+            "quiet",
+            "organize",
+            "-d",
+            str(source_dir),
+            "--log-file",
+            str(tmp_path / "log.json"),
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert "Moved" not in result.output
+    assert (source_dir / "Documents" / "a.pdf").exists()
+    assert reporter.default().mode == "verbose"
@@ -0,0 +1,176 @@
+"""
+Unit tests for the compiled category rule engine.
+"""
+
+import random
+import pytest
+import yaml
+
+from src.config_loader import ConfigLoader
+from src.file_organizer import FileOrganizer
+from src.logger import OrganizerLogger
+from src.rules import FileFacts, Rule, RuleSet, parse_size
+
+NOW = 1_700_000_000.0
+DAY = 86400
+
+
+def facts(name, size=1000, age_days=0):
+    """Build the facts of a file that does not exist on disk."""
+    return FileFacts(f"/downloads/{name}", size, NOW - age_days * DAY)
+
+
+def category(rules, name, **kwargs):
+    """Classify a file, checking the compiled and linear results agree."""
+    rule_set = RuleSet.from_config(rules)
+    file = facts(name, **kwargs)
+    compiled = rule_set.match(file, NOW)
+    assert compiled is rule_set.match_linear(file, NOW)
+    return compiled.category if compiled else None
+
+
+def test_parse_size():
+    """Test sizes in bytes and with units."""
+    assert parse_size(512) == 512
+    assert parse_size("2 KB") == 2048
+    assert parse_size("1.5mb") == 1536 * 1024
+    for invalid in ("big", "5 PB", -1, True):
+        with pytest.raises(ValueError):
+            parse_size(invalid)
+
+
+def test_conditions():
+    """Test each kind of condition."""
+    rules = [
+        {"category": "Invoices", "name": "invoice_*.pdf"},
+        {"category": "Scans", "regex": r"^scan\d{3}"},
+        {"category": "Large", "min_size": "1 MB"},
+        {"category": "Old", "extensions": [".txt"], "min_age_days": 30},
+        {"category": "Tiny", "max_size": 10},
+    ]
+    assert category(rules, "Invoice_March.PDF") == "Invoices"
+    assert category(rules, "invoice_march.docx") is None
+    assert category(rules, "scan042.jpg") == "Scans"
+    assert category(rules, "my_scan042.jpg") is None
+    assert category(rules, "movie.mkv", size=5 * 1024 * 1024) == "Large"
+    assert category(rules, "notes.txt", age_days=45) == "Old"
+    assert category(rules, "notes.txt", age_days=3) is None
+    assert category(rules, "empty.bin", size=0) == "Tiny"
+
+
+def test_priority_and_order():
+    """Test that higher priorities win, then the rule listed first."""
+    rules = [
+        {"category": "Reports", "extensions": [".pdf"]},
+        {"category": "Invoices", "name": "invoice*", "priority": 5},
+        {"category": "Documents", "extensions": [".pdf"]},
+    ]
+    assert category(rules, "invoice_1.pdf") == "Invoices"
+    assert category(rules, "summary.pdf") == "Reports"
+
+
+def test_failed_pattern_rule_falls_through():
+    """Test that the next pattern rule is found when the best one fails."""
+    rules = [
+        {"category": "BigNotes", "name": "*notes*", "min_size": 10000},
+        {"category": "Notes", "name": "*notes*"},
+        {"category": "Any", "regex": "o"},
+    ]
+    assert category(rules, "my notes.txt", size=50000) == "BigNotes"
+    assert category(rules, "my notes.txt", size=10) == "Notes"
+    assert category(rules, "photo.jpg") == "Any"
+
+
+def test_mime_and_source_url(tmp_path):
+    """Test MIME type globs and the unreadable source URL of a plain file."""
+    rules = [
+        {"category": "FromGitHub", "source_url": "https://github.com/*"},
+        {"category": "Pictures", "mime": "image/*"},
+    ]
+    assert category(rules, "photo.png") == "Pictures"
+    assert category(rules, "report.pdf") is None
+
+    path = tmp_path / "file.zip"
+    path.write_text("zip")
+    file = FileFacts(str(path), 3, NOW)
+    assert file.source_url is None
+    assert RuleSet.from_config(rules).match(file, NOW) is None
+
+
+def test_invalid_rules():
+    """Test that broken rules are rejected when the config is loaded."""
+    for invalid in (
+        [{"category": "X"}],
+        [{"name": "*.pdf"}],
+        [{"category": "X", "colour": "red"}],
+        [{"category": "X", "regex": "("}],
+        [{"category": "X", "min_size": 10, "max_size": 5}],
+        {"category": "X"},
+    ):
+        with pytest.raises(ValueError):
+            RuleSet.from_config(invalid)
+    with pytest.raises(ValueError):
+        Rule("X", min_size="lots")
+
+
+def test_compiled_matches_linear_on_random_rules():
+    """Test that the compiled lookups agree with testing every rule."""
+    rng = random.Random(1)
+    words = ["invoice", "scan", "photo", "notes", "report", "setup", "a", "img"]
+    extensions = [".pdf", ".jpg", ".txt", ".zip", ".exe", ""]
+    rules = []
+    for index in range(300):
+        rule = {"category": f"C{index}", "priority": rng.randint(0, 3)}
+        kind = rng.randrange(6)
+        if kind == 0:
+            rule["extensions"] = rng.sample(extensions, 2)
+        elif kind == 1:
+            rule["name"] = rng.choice(words) + "*"
+        elif kind == 2:
+            rule["name"] = "*" + rng.choice(words) + rng.choice(extensions)
+        elif kind == 3:
+            rule["name"] = "*" + rng.choice(words) + "?*"
+        elif kind == 4:
+            word = rng.choice(words)
+            rule["regex"] = rng.choice(
+                [word + r"\d", "^" + word, word + "?_", r"\d{2}|" + word, "(?i)" + word]
+            )
+        if kind == 5 or rng.random() < 0.3:
+            low = rng.randint(0, 5000)
+            rule["min_size"] = low
+            rule["max_size"] = low + rng.randint(0, 5000)
+        if rng.random() < 0.2:
+            rule["max_age_days"] = rng.randint(1, 60)
+        rules.append(rule)
+    rule_set = RuleSet.from_config(rules)
+
+    for _ in range(2000):
+        name = (
+            rng.choice(["", "my_"])
+            + rng.choice(words)
+            + str(rng.randint(0, 9))
+            + rng.choice(extensions)
+        )
+        file = facts(name, size=rng.randint(0, 12000), age_days=rng.randint(0, 90))
+        assert rule_set.match(file, NOW) is rule_set.match_linear(file, NOW), name
+
+
+def test_config_rules_take_precedence(tmp_path):
+    """Test that configured rules win over the extension categories."""
+    config = dict(ConfigLoader.DEFAULT_CONFIG)
+    config["rules"] = [{"category": "Invoices", "name": "invoice*"}]
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config))
+
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    (directory / "invoice_7.pdf").write_text("invoice")
+    (directory / "manual.pdf").write_text("manual")
+
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    organizer = FileOrganizer(str(directory), str(config_path), logger)
+    assert len(organizer.config.rules) == 1
+    organizer.organize()
+
+    assert (directory / "Invoices" / "invoice_7.pdf").exists()
+    assert (directory / "Documents" / "manual.pdf").exists()
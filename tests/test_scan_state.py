@@ -0,0 +1,245 @@
+"""
+Unit tests for the incremental scan state.
+"""
+
+import errno
+import os
+import pytest
+
+from src import linking, mover
+from src.duplicate_cleaner import DuplicateCleaner
+from src.file_organizer import FileOrganizer
+from src.hash_cache import HashCache
+from src.logger import OrganizerLogger
+from src.scan_state import ScanState
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a small directory tree whose directory mtimes are not racy."""
+    root = tmp_path / "archive"
+    (root / "a" / "deep").mkdir(parents=True)
+    (root / "b").mkdir()
+    (root / "top.txt").write_text("top")
+    (root / "a" / "one.txt").write_text("one")
+    (root / "a" / "deep" / "two.txt").write_text("two")
+    (root / "b" / "three.txt").write_text("three")
+    age_directories(*(dir_path for dir_path, _, _ in os.walk(root)))
+    return root
+
+
+def age_directories(*directories):
+    """Move directory mtimes a minute back, out of the racy window."""
+    for directory in directories:
+        past = os.stat(directory).st_mtime - 60
+        os.utime(directory, (past, past))
+
+
+@pytest.fixture
+def state(tmp_path):
+    """Scan state stored in the temporary directory."""
+    with ScanState(str(tmp_path / "state.db")) as scan_state:
+        yield scan_state
+
+
+def fresh_names(scan_state, root, **kwargs):
+    """Walk through the state and return the names of fresh files."""
+    return sorted(
+        entry.name for entry, fresh in scan_state.walk(root, **kwargs) if fresh
+    )
+
+
+def test_first_walk_everything_fresh(tree, state):
+    """Test that without stored state every file is new."""
+    assert fresh_names(state, tree) == ["one.txt", "three.txt", "top.txt", "two.txt"]
+    assert state.last_scan["dirs_listed"] == 4
+    assert state.last_scan["dirs_reused"] == 0
+
+
+def test_unchanged_tree_reuses_listings(tree, state):
+    """Test that an unchanged tree is walked without listing directories."""
+    fresh_names(state, tree)
+
+    entries = list(state.walk(tree))
+    assert sorted(entry.name for entry, _ in entries) == [
+        "one.txt",
+        "three.txt",
+        "top.txt",
+        "two.txt",
+    ]
+    assert not any(fresh for _, fresh in entries)
+    assert state.last_scan["dirs_listed"] == 0
+    assert state.last_scan["dirs_reused"] == 4
+
+
+def test_only_changed_directories_listed(tree, state):
+    """Test that new files are found by listing only their directory."""
+    fresh_names(state, tree)
+    (tree / "a" / "deep" / "new.txt").write_text("new")
+    age_directories(tree / "a" / "deep")
+
+    assert fresh_names(state, tree) == ["new.txt"]
+    assert state.last_scan["dirs_listed"] == 1
+    assert state.last_scan["dirs_reused"] == 3
+
+
+def test_removed_subtree_forgotten(tree, state):
+    """Test that files of a deleted directory are no longer reported."""
+    fresh_names(state, tree)
+    (tree / "b" / "three.txt").unlink()
+    (tree / "b").rmdir()
+    age_directories(tree)
+
+    names = sorted(entry.name for entry, _ in state.walk(tree))
+    assert names == ["one.txt", "top.txt", "two.txt"]
+    assert state.stats()["files"] == 3
+
+
+def test_racy_directory_listed_again(tree, state):
+    """Test that a directory modified just now is not trusted next time."""
+    (tree / "b" / "four.txt").write_text("four")
+    fresh_names(state, tree)
+
+    list(state.walk(tree))
+    assert state.last_scan["dirs_listed"] == 1
+
+
+def test_read_only_state_not_updated(tree, tmp_path):
+    """Test that a read-only state leaves files fresh for the next run."""
+    db_path = str(tmp_path / "state.db")
+    with ScanState(db_path, read_only=True) as dry_state:
+        assert len(fresh_names(dry_state, tree)) == 4
+    with ScanState(db_path) as state:
+        assert len(fresh_names(state, tree)) == 4
+
+
+def test_options_scoped(tree, state):
+    """Test that different walk options keep separate state."""
+    fresh_names(state, tree)
+    assert fresh_names(state, tree, max_depth=0) == ["top.txt"]
+    assert fresh_names(state, tree) == []
+
+
+def test_clear_root(tree, state):
+    """Test forgetting the state of a root."""
+    fresh_names(state, tree)
+    state.clear(tree)
+    assert state.stats()["files"] == 0
+    assert len(fresh_names(state, tree)) == 4
+
+
+def test_forget_makes_files_fresh(tree, state):
+    """Test that forgotten files are yielded as fresh by the next walk."""
+    fresh_names(state, tree)
+    state.forget([str(tree / "a" / "deep" / "two.txt"), "/elsewhere/x.txt"])
+
+    assert fresh_names(state, tree) == ["two.txt"]
+    assert state.last_scan["dirs_listed"] == 1
+    assert fresh_names(state, tree) == []
+
+
+def test_incremental_duplicates_compare_with_stored(tree, state, tmp_path):
+    """Test that a new copy is matched against an unchanged original."""
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    (tree / "b" / "copy_of_one.txt").write_text("one")
+    age_directories(tree / "b")
+
+    cleaner = DuplicateCleaner(str(tree), logger, scan_state=state)
+    assert len(cleaner.find_duplicates()) == 1
+
+    # Nothing changed: the known duplicates are not examined again
+    assert cleaner.find_duplicates() == {}
+    assert cleaner.scan_stats["edge"]["files_in"] == 0
+
+    # A new copy in another directory is compared with the stored original
+    (tree / "a" / "deep" / "another_one.txt").write_text("one")
+    age_directories(tree / "a" / "deep")
+    duplicates = cleaner.find_duplicates()
+    assert len(duplicates) == 1
+    assert len(next(iter(duplicates.values()))) == 3
+
+
+def test_incremental_duplicates_restat_candidates(tree, state, tmp_path):
+    """Test that a file changed in place is not matched by its old identity."""
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    hash_cache = HashCache(str(tmp_path / "cache.db"))
+    cleaner = DuplicateCleaner(
+        str(tree), logger, hash_cache=hash_cache, scan_state=state
+    )
+    cleaner.find_duplicates()
+
+    # Same size as 'one', but 'one' itself was rewritten in place
+    (tree / "a" / "one.txt").write_text("uno")
+    (tree / "b" / "new.txt").write_text("one")
+    age_directories(tree / "b")
+
+    # The cached hash of the old content must not be used
+    assert cleaner.find_duplicates() == {}
+    hash_cache.close()
+
+
+def test_incremental_organize(tmp_path):
+    """Test that the organizer only handles new files."""
+    source = tmp_path / "downloads"
+    source.mkdir()
+    (source / "a.pdf").write_text("a")
+    (source / "b.jpg").write_text("b")
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+
+    with ScanState(str(tmp_path / "state.db")) as state:
+        organizer = FileOrganizer(str(source), logger=logger, scan_state=state)
+        organizer.organize()
+        assert (source / "Documents" / "a.pdf").exists()
+
+        # A file that stays behind (e.g. excluded later) is not retried
+        age_directories(source)
+        organizer.organize()
+        assert logger.get_summary()["total_operations"] == 2
+
+        (source / "c.pdf").write_text("c")
+        organizer.organize()
+        assert (source / "Documents" / "c.pdf").exists()
+        assert logger.get_summary()["total_operations"] == 3
+
+
+def test_incremental_organize_retries_failed_moves(tmp_path, monkeypatch):
+    """Test that files left behind or put back by an undo are organized again."""
+    source = tmp_path / "downloads"
+    source.mkdir()
+    (source / "a.pdf").write_text("a")
+    (source / "b.jpg").write_text("b")
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    real_rename = os.rename
+
+    def failing_rename(src, dst):
+        if os.path.basename(src) == "a.pdf":
+            raise OSError(errno.EACCES, "Permission denied", src)
+        real_rename(src, dst)
+
+    with ScanState(str(tmp_path / "state.db")) as state:
+        organizer = FileOrganizer(str(source), logger=logger, scan_state=state)
+        monkeypatch.setattr(mover.os, "rename", failing_rename)
+        organizer.organize()
+        monkeypatch.undo()
+        assert (source / "a.pdf").exists()
+
+        age_directories(source)
+        organizer.organize()
+        assert (source / "Documents" / "a.pdf").exists()
+
+        organizer.undo_last_session()
+        age_directories(source)
+        organizer.organize()
+        assert (source / "Documents" / "a.pdf").exists()
+
+
+def test_incremental_cleaning_retries_skipped_duplicates(tree, state, monkeypatch):
+    """Test that a duplicate that could not be replaced is offered again."""
+    (tree / "b" / "copy_of_one.txt").write_text("one")
+    age_directories(tree / "b")
+    monkeypatch.setattr(linking, "fcntl", None)
+    cleaner = DuplicateCleaner(str(tree), scan_state=state, mode="reflink")
+    cleaner.logger.log_file = str(tree.parent / "log.json")
+
+    assert cleaner.clean_duplicates() == 0
+    assert len(cleaner.find_duplicates()) == 1
@@ -0,0 +1,88 @@
+"""
+Unit tests for byte-by-byte duplicate verification.
+"""
+
+import os
+import pytest
+
+from src.duplicate_cleaner import DuplicateCleaner, DuplicateFile
+from src.logger import OrganizerLogger
+from src.verification import FileComparer
+from src.walker import stat_file
+
+BLOCK = 1024
+
+
+@pytest.fixture
+def comparer():
+    """Create a comparer with small blocks, so files span several."""
+    return FileComparer(block_size=BLOCK)
+
+
+def write(path, data):
+    """Write bytes to a file and return its path as a string."""
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_identical_files(tmp_path, comparer):
+    """Test that equal files are read completely, whatever their length."""
+    for size in (0, 10, BLOCK, 3 * BLOCK, 3 * BLOCK + 7):
+        data = os.urandom(size)
+        first = write(tmp_path / "a", data)
+        second = write(tmp_path / "b", data)
+        comparer.stats = FileComparer.new_stats()
+
+        assert comparer.same_content(first, second)
+        assert comparer.stats["bytes_read"] == 2 * size
+        assert comparer.stats["mismatches"] == 0
+
+
+def test_stops_at_first_difference(tmp_path, comparer):
+    """Test that reading stops at the first block that differs."""
+    data = bytearray(10 * BLOCK)
+    first = write(tmp_path / "a", bytes(data))
+    data[BLOCK + 5] = 1
+    second = write(tmp_path / "b", bytes(data))
+
+    assert not comparer.same_content(first, second)
+    assert comparer.stats["bytes_read"] == 2 * 2 * BLOCK
+    assert comparer.stats["files_verified"] == 1
+    assert comparer.stats["mismatches"] == 1
+
+
+def test_decided_without_reading(tmp_path, comparer):
+    """Test that different sizes and hardlinks need no reads."""
+    first = write(tmp_path / "a", b"x" * 100)
+    shorter = write(tmp_path / "b", b"x" * 99)
+    linked = str(tmp_path / "c")
+    os.link(first, linked)
+
+    assert not comparer.same_content(first, shorter)
+    assert comparer.same_content(first, linked)
+    assert comparer.stats["bytes_read"] == 0
+
+
+def test_cleaner_keeps_files_that_differ(tmp_path):
+    """Test that a hash collision does not delete a different file."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    kept = directory / "a.bin"
+    kept.write_bytes(b"A" * 5000)
+    different = directory / "bb.bin"
+    different.write_bytes(b"B" * 5000)
+    same = directory / "ccc.bin"
+    same.write_bytes(b"A" * 5000)
+
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    cleaner = DuplicateCleaner(str(directory), logger, verify=True)
+    # As if a weak hash had put all three files in one group
+    files = [DuplicateFile(*stat_file(str(p)), "x") for p in (kept, different, same)]
+    removed = cleaner._remove_duplicates({"x": files}, "shortest")
+
+    assert removed == 1
+    assert kept.exists() and different.exists() and not same.exists()
+    operations = logger.read_operations()
+    assert [op["status"] for op in operations] == ["skipped", "success"]
+    assert cleaner.comparer.stats["files_verified"] == 2
+    assert cleaner.comparer.stats["mismatches"] == 1
@@ -0,0 +1,99 @@
+"""
+Unit tests for the directory walker.
+"""
+
+import os
+import pytest
+from src.walker import FileEntry, walk
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a small directory tree."""
+    (tmp_path / "top.txt").write_text("top")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "mid.txt").write_text("middle")
+    (tmp_path / "sub" / "deep").mkdir()
+    (tmp_path / "sub" / "deep" / "low.txt").write_text("low")
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "skip.tmp").write_text("skip")
+    return tmp_path
+
+
+def names(entries):
+    """Get sorted file names from walker entries."""
+    return sorted(entry.name for entry in entries)
+
+
+def test_walk_recursive(tree):
+    """Test walking the whole tree."""
+    assert names(walk(tree)) == ["low.txt", "mid.txt", "skip.tmp", "top.txt"]
+
+
+def test_walk_max_depth(tree):
+    """Test depth limits."""
+    assert names(walk(tree, max_depth=0)) == ["top.txt"]
+    assert names(walk(tree, max_depth=1)) == ["mid.txt", "skip.tmp", "top.txt"]
+
+
+def test_walk_exclude(tree):
+    """Test exclude globs on names and relative paths."""
+    assert names(walk(tree, exclude=["cache"])) == ["low.txt", "mid.txt", "top.txt"]
+    assert names(walk(tree, exclude=["sub/deep", "*.tmp"])) == ["mid.txt", "top.txt"]
+
+
+def test_walk_carries_stat_data(tree):
+    """Test that entries hold the scanned stat data."""
+    entry = next(walk(tree, max_depth=0))
+    stat_result = os.stat(tree / "top.txt")
+
+    assert isinstance(entry, FileEntry)
+    assert entry.size == 3
+    assert entry.identity == (
+        stat_result.st_dev,
+        stat_result.st_ino,
+        stat_result.st_size,
+        stat_result.st_mtime_ns,
+    )
+
+
+def test_walk_without_stat(tree):
+    """Test that stat data can be skipped."""
+    entry = next(walk(tree, max_depth=0, stat=False))
+    assert entry.name == "top.txt"
+    assert entry.size is None
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks unsupported")
+def test_walk_symlink_policies(tree):
+    """Test ignoring, including and following symlinks."""
+    try:
+        os.symlink(tree / "top.txt", tree / "link.txt")
+        os.symlink(tree / "sub", tree / "linked_dir")
+    except OSError:
+        pytest.skip("cannot create symlinks")
+
+    ignored = names(walk(tree, symlinks="ignore"))
+    files = names(walk(tree, symlinks="files"))
+    followed = names(walk(tree, symlinks="follow"))
+
+    assert "link.txt" not in ignored
+    assert "link.txt" in files
+    assert files.count("mid.txt") == 1
+    # The linked directory is the same directory, so it is visited once
+    assert followed.count("mid.txt") == 1
+
+
+def test_walk_rejects_unknown_symlink_policy(tree):
+    """Test validation of the symlink policy."""
+    with pytest.raises(ValueError):
+        list(walk(tree, symlinks="sometimes"))
+
+
+def test_walk_reports_errors(tmp_path):
+    """Test that unreadable directories are reported, not raised."""
+    errors = []
+    missing = tmp_path / "missing"
+
+    assert list(walk(missing, on_error=lambda path, e: errors.append(path))) == []
+    assert errors == [str(missing)]
@@ -0,0 +1,122 @@
+"""
+Unit tests for watch mode.
+"""
+
+import os
+import threading
+import time
+import pytest
+
+from src.file_organizer import FileOrganizer
+from src.logger import OrganizerLogger
+from src.watcher import DirectoryWatcher, is_temporary
+
+
+@pytest.fixture
+def organizer(tmp_path):
+    """Organizer for an empty watched directory."""
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    logger = OrganizerLogger(str(tmp_path / "log.json"))
+    return FileOrganizer(str(directory), logger=logger)
+
+
+def make_watcher(organizer, **kwargs):
+    """Create a polling watcher with a short settle time."""
+    kwargs.setdefault("settle_seconds", 5)
+    return DirectoryWatcher(organizer, backend="polling", **kwargs)
+
+
+def test_is_temporary():
+    """Test recognition of unfinished downloads."""
+    assert is_temporary("movie.mp4.crdownload")
+    assert is_temporary("archive.zip.PART")
+    assert not is_temporary("report.pdf")
+
+
+def test_files_organized_after_settling(organizer):
+    """Test that a file is only organized once it stopped changing."""
+    watcher = make_watcher(organizer)
+    source = organizer.source_dir / "report.pdf"
+    source.write_text("report")
+
+    assert watcher.process_once(now=100.0) == 0
+    assert source.exists()
+
+    # Still within the settle time
+    assert watcher.process_once(now=103.0) == 0
+
+    assert watcher.process_once(now=105.0) == 1
+    assert not source.exists()
+    assert (organizer.source_dir / "Documents" / "report.pdf").exists()
+
+
+def test_changing_file_restarts_settle_timer(organizer):
+    """Test that a growing file is not organized while it is written."""
+    watcher = make_watcher(organizer)
+    source = organizer.source_dir / "video.mp4"
+    source.write_text("part 1")
+    watcher.process_once(now=100.0)
+
+    with open(source, "a") as f:
+        f.write(" and part 2")
+    assert watcher.process_once(now=104.0) == 0
+    assert watcher.process_once(now=106.0) == 0
+    assert watcher.process_once(now=109.0) == 1
+
+
+def test_temporary_downloads_ignored(organizer):
+    """Test that in-progress downloads are left alone until renamed."""
+    watcher = make_watcher(organizer)
+    partial = organizer.source_dir / "setup.exe.crdownload"
+    partial.write_text("binary")
+
+    watcher.process_once(now=100.0)
+    assert watcher.process_once(now=200.0) == 0
+    assert partial.exists()
+
+    final = organizer.source_dir / "setup.exe"
+    os.rename(partial, final)
+    watcher.process_once(now=300.0)
+    assert watcher.process_once(now=310.0) == 1
+    assert not final.exists()
+
+
+def test_micro_batches(organizer):
+    """Test that settled files are organized in batches."""
+    watcher = make_watcher(organizer, batch_size=2)
+    for i in range(5):
+        (organizer.source_dir / f"photo{i}.jpg").write_text(str(i))
+
+    watcher.process_once(now=100.0)
+    assert watcher.process_once(now=110.0) == 5
+    assert watcher.batches == 3
+    assert len(list((organizer.source_dir / "Images").iterdir())) == 5
+
+
+def test_run_until_stopped(organizer):
+    """Test the watch loop end to end with the polling backend."""
+    watcher = DirectoryWatcher(
+        organizer, settle_seconds=0.1, poll_interval=0.05, backend="polling"
+    )
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        (organizer.source_dir / "notes.txt").write_text("notes")
+        target = organizer.source_dir / "Documents" / "notes.txt"
+        deadline = time.monotonic() + 5
+        while not target.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        watcher.stop()
+        thread.join(timeout=5)
+
+    assert target.exists()
+    assert not thread.is_alive()
+    assert watcher.files_organized == 1
+
+
+def test_invalid_backend(organizer):
+    """Test that an unknown backend is rejected."""
+    with pytest.raises(ValueError):
+        DirectoryWatcher(organizer, backend="fanotify")